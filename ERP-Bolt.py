@@ -5,33 +5,652 @@ A complete ERP solution for attendance, invoicing, and delivery management
 """
 
 import os
+import sys
 import json
+import time
+import glob
+import shutil
+import bisect
+import collections
+import hashlib
+import queue
+import atexit
+import signal
+import socket
+import logging
+import argparse
 import sqlite3
-from datetime import datetime, date
-from flask import Flask, request, jsonify, render_template_string, send_file, redirect, url_for
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+import tempfile
+import threading
+import itertools
+import multiprocessing
+import uuid
+import re
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from flask import Flask, Blueprint, current_app, g, request, jsonify, render_template, send_file, redirect, url_for, stream_with_context
+from jinja2 import DictLoader, FileSystemBytecodeCache
+from werkzeug.local import LocalProxy
+from werkzeug.serving import make_server
 import csv
 import io
 import base64
+import zipfile
+
+from amount_words import amount_in_words
+from record_log import date_key
+
+# Settings for create_app(); override with ERP_<NAME> env vars or the config argument
+APP_CONFIG = {
+    'db_path': 'at_commodities.db',
+    'db_pool_size': 8,            # 0 = a fresh connection per query
+    'pdf_job_dir': 'pdf_jobs',
+    'pdf_workers': 0,             # 0 = one render process per CPU
+    'pdf_max_pending': 32,
+    'pdf_cache_dir': 'pdf_cache',
+    'pdf_cache_mb': 256,
+    'template_cache': '',         # Jinja bytecode cache dir; empty = system temp dir
+    'slow_query_ms': 250.0,       # log statements slower than this to the erp.sql logger
+    'metrics_dir': '',            # where serve workers share /metrics totals; set by serve
+    'secret_key': 'at_commodities_secret_key_2025',
+}
+
+def load_app_config(overrides=None):
+    """Return APP_CONFIG merged with environment and explicit overrides"""
+    config = dict(APP_CONFIG)
+    for name, default in APP_CONFIG.items():
+        value = os.environ.get(f'ERP_{name.upper()}')
+        if value is not None:
+            config[name] = type(default)(value)
+    config.update(overrides or {})
+    return config
+
+# SQLite settings applied to every connection; override with ERP_DB_<NAME> env vars
+STORAGE_PROFILE = {
+    'busy_timeout': 5000,         # ms to wait on a locked database
+    'journal_mode': 'WAL',        # readers no longer block behind writers
+    'synchronous': 'NORMAL',      # durable at checkpoints, safe with WAL
+    'cache_size': -16384,         # negative = KiB, so ~16 MB page cache
+    'mmap_size': 134217728,       # 128 MB memory-mapped I/O
+    'temp_store': 'MEMORY',
+}
+
+def load_storage_profile(overrides=None):
+    """Return STORAGE_PROFILE merged with environment and explicit overrides"""
+    profile = dict(STORAGE_PROFILE)
+    for name, default in STORAGE_PROFILE.items():
+        value = os.environ.get(f'ERP_DB_{name.upper()}')
+        if value is not None:
+            profile[name] = type(default)(value)
+    profile.update(overrides or {})
+    return profile
+
+def apply_storage_profile(conn, profile):
+    for name, value in profile.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+# Listing pages show PAGE_SIZE rows by default; ?per_page= may raise it up to MAX_PAGE_SIZE
+PAGE_SIZE = int(os.environ.get('ERP_PAGE_SIZE', 25))
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+def _cursor_value(value):
+    """A value SQLite can bind: text, a float, None or a 64-bit integer"""
+    if isinstance(value, int):
+        return -2 ** 63 <= value < 2 ** 63
+    return value is None or isinstance(value, (str, float))
+
+def decode_cursor(token, length):
+    """Decode a page cursor of `length` sort-key values; malformed tokens fall back to the first page"""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != length or not all(map(_cursor_value, values)):
+        return None
+    return values
+
+# Counters kept current by triggers so summary pages never aggregate base tables
+STATS_QUERIES = {
+    'employees': 'SELECT COUNT(*) FROM employees',
+    'attendance': 'SELECT COUNT(*) FROM attendance',
+    'invoices': 'SELECT COUNT(*) FROM invoices',
+    'invoice_value': 'SELECT COALESCE(SUM(total), 0) FROM invoices',
+    'deliveries': 'SELECT COUNT(*) FROM deliveries',
+    'active_deliveries': "SELECT COUNT(*) FROM deliveries WHERE status != 'delivered'",
+}
+
+STATS_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS stats_employees_insert AFTER INSERT ON employees BEGIN
+        UPDATE stats SET value = value + 1 WHERE key = 'employees';
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_employees_delete AFTER DELETE ON employees BEGIN
+        UPDATE stats SET value = value - 1 WHERE key = 'employees';
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_attendance_insert AFTER INSERT ON attendance BEGIN
+        UPDATE stats SET value = value + 1 WHERE key = 'attendance';
+        INSERT INTO daily_attendance_stats (date, total) VALUES (NEW.date, 1)
+            ON CONFLICT (date) DO UPDATE SET total = total + 1;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_attendance_delete AFTER DELETE ON attendance BEGIN
+        UPDATE stats SET value = value - 1 WHERE key = 'attendance';
+        UPDATE daily_attendance_stats SET total = total - 1 WHERE date = OLD.date;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_attendance_move AFTER UPDATE OF date ON attendance BEGIN
+        UPDATE daily_attendance_stats SET total = total - 1 WHERE date = OLD.date;
+        INSERT INTO daily_attendance_stats (date, total) VALUES (NEW.date, 1)
+            ON CONFLICT (date) DO UPDATE SET total = total + 1;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_invoices_insert AFTER INSERT ON invoices BEGIN
+        UPDATE stats SET value = value + 1 WHERE key = 'invoices';
+        UPDATE stats SET value = value + NEW.total WHERE key = 'invoice_value';
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_invoices_delete AFTER DELETE ON invoices BEGIN
+        UPDATE stats SET value = value - 1 WHERE key = 'invoices';
+        UPDATE stats SET value = value - OLD.total WHERE key = 'invoice_value';
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_invoices_total AFTER UPDATE OF total ON invoices BEGIN
+        UPDATE stats SET value = value - OLD.total + NEW.total WHERE key = 'invoice_value';
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_deliveries_insert AFTER INSERT ON deliveries BEGIN
+        UPDATE stats SET value = value + 1 WHERE key = 'deliveries';
+        UPDATE stats SET value = value + COALESCE(NEW.status != 'delivered', 0) WHERE key = 'active_deliveries';
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_deliveries_delete AFTER DELETE ON deliveries BEGIN
+        UPDATE stats SET value = value - 1 WHERE key = 'deliveries';
+        UPDATE stats SET value = value - COALESCE(OLD.status != 'delivered', 0) WHERE key = 'active_deliveries';
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_deliveries_status AFTER UPDATE OF status ON deliveries BEGIN
+        UPDATE stats SET value = value - COALESCE(OLD.status != 'delivered', 0)
+                                       + COALESCE(NEW.status != 'delivered', 0) WHERE key = 'active_deliveries';
+    END''',
+]
+
+def rebuild_stats(cursor):
+    """Recompute every counter from the base tables; returns {key: (stored, actual)} for drifted ones"""
+    stored = dict(cursor.execute('SELECT key, value FROM stats').fetchall())
+    drift = {}
+    for key, query in STATS_QUERIES.items():
+        actual = cursor.execute(query).fetchone()[0]
+        if stored.get(key) != actual:
+            drift[key] = (stored.get(key), actual)
+        cursor.execute('INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)', (key, actual))
+    
+    stored_daily = dict(cursor.execute('SELECT date, total FROM daily_attendance_stats').fetchall())
+    actual_daily = dict(cursor.execute('SELECT date, COUNT(*) FROM attendance GROUP BY date').fetchall())
+    for day in stored_daily.keys() | actual_daily.keys():
+        if stored_daily.get(day, 0) != actual_daily.get(day, 0):
+            drift[f'attendance on {day}'] = (stored_daily.get(day, 0), actual_daily.get(day, 0))
+    cursor.execute('DELETE FROM daily_attendance_stats')
+    cursor.executemany('INSERT INTO daily_attendance_stats (date, total) VALUES (?, ?)', actual_daily.items())
+    return drift
+
+def _create_stats(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats (
+            key TEXT PRIMARY KEY,
+            value REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_attendance_stats (
+            date TEXT PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for trigger in STATS_TRIGGERS:
+        cursor.execute(trigger)
+    rebuild_stats(cursor)
+
+def _normalize_invoice_items(cursor):
+    """Move line items out of the invoices.items JSON blob into their own table"""
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(invoices)').fetchall()]
+    if 'items' in columns:
+        # Stage the JSON first: invoices is rebuilt without it before invoice_items points at the new table
+        cursor.execute('CREATE TEMP TABLE legacy_invoice_items AS SELECT id, items FROM invoices')
+        _rebuild_invoices_without_items(cursor)
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER NOT NULL,
+            line_no INTEGER NOT NULL,
+            description TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            unit_price REAL NOT NULL,
+            total REAL NOT NULL,
+            FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE CASCADE
+        )
+    ''')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_invoice_items_invoice ON invoice_items (invoice_id, line_no)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_items_description ON invoice_items (description, quantity, total)')
+    if 'items' not in columns:
+        return
+    
+    def backfill():
+        for invoice_id, items in cursor.connection.execute('SELECT id, items FROM temp.legacy_invoice_items'):
+            for line_no, item in enumerate(json.loads(items), 1):
+                yield (invoice_id, line_no, item['description'], item['quantity'], item['unit_price'], item['total'])
+    
+    cursor.executemany('''
+        INSERT OR IGNORE INTO invoice_items (invoice_id, line_no, description, quantity, unit_price, total)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', backfill())
+    cursor.execute('DROP TABLE temp.legacy_invoice_items')
+
+def _rebuild_invoices_without_items(cursor):
+    """Recreate invoices without its items column, keeping every row, index and trigger.
+    
+    This is SQLite's copy-and-rename table rebuild, so it works on releases
+    older than 3.35 where ALTER TABLE DROP COLUMN is missing. Copying rows
+    into the new table fires no triggers, so the stats counters stay as they are.
+    """
+    attached = cursor.execute('''
+        SELECT sql FROM sqlite_master WHERE tbl_name = 'invoices' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    ''').fetchall()
+    sequence = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'invoices'").fetchone()
+    cursor.execute('''
+        CREATE TABLE invoices_rebuilt (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_number TEXT NOT NULL UNIQUE,
+            client_id INTEGER,
+            client_name TEXT NOT NULL,
+            date TEXT NOT NULL,
+            subtotal REAL NOT NULL,
+            tax REAL NOT NULL,
+            discount REAL NOT NULL,
+            total REAL NOT NULL,
+            status TEXT DEFAULT 'draft',
+            FOREIGN KEY (client_id) REFERENCES clients (id)
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO invoices_rebuilt (id, invoice_number, client_id, client_name, date, subtotal, tax, discount, total,
+                                      status)
+        SELECT id, invoice_number, client_id, client_name, date, subtotal, tax, discount, total, status FROM invoices
+    ''')
+    cursor.execute('DROP TABLE invoices')
+    cursor.execute('ALTER TABLE invoices_rebuilt RENAME TO invoices')
+    for (sql,) in attached:
+        cursor.execute(sql)
+    if sequence is not None:
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'invoices'", sequence)
+
+# Worked hours of an attendance row, from its full check-in/check-out timestamps
+SHIFT_HOURS = 'ROUND((julianday(check_out) - julianday(check_in)) * 24, 2)'
+# Close a shift at :now; SET expressions see the old row, so the hours use :now directly
+CHECK_OUT_SQL = '''
+    UPDATE attendance SET check_out = :now, total_hours = ROUND((julianday(:now) - julianday(check_in)) * 24, 2)
+    WHERE id = :id
+'''
+
+def _unique_daily_attendance(cursor):
+    """Keep one attendance row per employee per day, then enforce that with a unique index"""
+    # The earliest row survives; if it was never closed it takes the latest check-out among its duplicates
+    cursor.execute('''
+        UPDATE attendance AS keep SET
+            check_out = dup.check_out,
+            total_hours = ROUND((julianday(dup.check_out) - julianday(keep.check_in)) * 24, 2)
+        FROM (
+            SELECT MIN(id) AS keep_id, MAX(check_out) AS check_out
+            FROM attendance WHERE employee_id IS NOT NULL
+            GROUP BY employee_id, date HAVING COUNT(*) > 1
+        ) AS dup
+        WHERE keep.id = dup.keep_id AND keep.check_out IS NULL AND dup.check_out IS NOT NULL
+    ''')  # UPDATE ... FROM needs SQLite 3.33+
+    cursor.execute('''
+        DELETE FROM attendance
+        WHERE employee_id IS NOT NULL AND id NOT IN (
+            SELECT MIN(id) FROM attendance WHERE employee_id IS NOT NULL GROUP BY employee_id, date
+        )
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS idx_attendance_employee_date')
+    cursor.execute('CREATE UNIQUE INDEX idx_attendance_employee_date ON attendance (employee_id, date)')
+
+def _timestamp_attendance(cursor):
+    """Store check-in/check-out as full 'YYYY-MM-DD HH:MM:SS' timestamps and recompute hours.
+    
+    Old rows only kept the clock time. A check-out earlier than its check-in
+    was an overnight shift, so it is moved to the next day.
+    """
+    cursor.execute("UPDATE attendance SET check_in = date || ' ' || check_in WHERE length(check_in) = 8")
+    cursor.execute('''
+        UPDATE attendance SET check_out = CASE
+            WHEN check_out < substr(check_in, 12) THEN datetime(date || ' ' || check_out, '+1 day')
+            ELSE date || ' ' || check_out
+        END
+        WHERE length(check_out) = 8
+    ''')
+    cursor.execute(f'UPDATE attendance SET total_hours = {SHIFT_HOURS} WHERE check_out IS NOT NULL')
+
+# Ordered schema migrations; each step runs once and is recorded in schema_version.
+# A step is a list of SQL statements or a callable taking a cursor.
+MIGRATIONS = [
+    (1, 'Index attendance, invoice and delivery access paths', [
+        'CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date, check_in)',
+        'CREATE INDEX IF NOT EXISTS idx_attendance_employee_date ON attendance (employee_id, date)',
+        'CREATE INDEX IF NOT EXISTS idx_invoices_date ON invoices (date)',
+        'CREATE INDEX IF NOT EXISTS idx_invoices_client_date ON invoices (client_id, date)',
+        'CREATE INDEX IF NOT EXISTS idx_deliveries_date_time ON deliveries (delivery_date, delivery_time)',
+        'CREATE INDEX IF NOT EXISTS idx_deliveries_status ON deliveries (status)',
+    ]),
+    (2, 'Trigger-maintained summary counters', _create_stats),
+    (3, 'Normalize invoice line items into invoice_items', _normalize_invoice_items),
+    (4, 'One attendance record per employee per day', _unique_daily_attendance),
+    (5, 'Full check-in/check-out timestamps for overnight shifts', _timestamp_attendance),
+    (6, 'Resumable CSV import checkpoints', [
+        '''CREATE TABLE IF NOT EXISTS import_progress (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            rows INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL
+        )''',
+    ]),
+    (7, 'Per-client invoice layout', [
+        "ALTER TABLE clients ADD COLUMN invoice_layout TEXT NOT NULL DEFAULT 'standard'",
+    ]),
+]
+
+# Attendance page counters for one day; TOTAL() keeps an empty day at zero instead of NULL
+ATTENDANCE_STATS_QUERY = '''
+    SELECT COUNT(*), COUNT(check_out),
+           CAST(TOTAL(work_location = 'office') AS INTEGER),
+           CAST(TOTAL(work_location = 'warehouse') AS INTEGER),
+           CAST(TOTAL(work_location = 'field') AS INTEGER)
+    FROM attendance WHERE date = ?
+'''
+
+# Shifts of one day still open, newest first; the attendance page lists yesterday's after midnight
+OPEN_SHIFTS_QUERY = 'SELECT * FROM attendance WHERE date = ? AND check_out IS NULL ORDER BY check_in DESC'
+
+# Payroll hours per employee and period, summed from the shift timestamps in one grouped pass
+PAYROLL_PERIODS = {'day': '%Y-%m-%d', 'week': '%Y-W%W', 'month': '%Y-%m'}
+PAYROLL_QUERY = '''
+    SELECT employee_id, employee_name, strftime('{period}', date) AS period, COUNT(*) AS shifts,
+           ROUND(SUM((julianday(check_out) - julianday(check_in)) * 24), 2) AS hours
+    FROM attendance
+    WHERE date BETWEEN ? AND ? AND check_out IS NOT NULL
+    GROUP BY employee_id, period
+    ORDER BY period, employee_name
+'''
+
+class ConnectionPool:
+    """Pool of reusable SQLite connections, pinned to a thread while checked out"""
+    def __init__(self, db_name, size=8, timeout=10, health_check_interval=30, profile=None):
+        self.db_name = db_name
+        self.size = size
+        self.profile = profile or {}
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._all = set()
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False)
+        apply_storage_profile(conn, self.profile)
+        with self._lock:
+            self._all.add(conn)
+        return conn
+    
+    def _discard(self, conn):
+        with self._lock:
+            self._all.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    def _healthy(self, conn, last_used):
+        """Ping connections that have been idle longer than the check interval"""
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _acquire(self):
+        if self._closed:
+            raise RuntimeError('Connection pool is closed')
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RuntimeError(f'No database connection available after {self.timeout}s')
+        try:
+            while True:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if self._healthy(conn, last_used):
+                    return conn
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def _release(self, conn, broken=False):
+        if broken or self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+        self._slots.release()
+    
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the current thread; nested use shares it"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+        
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                broken = True
+            raise
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn, broken)
+    
+    def close(self):
+        """Close every connection owned by the pool"""
+        self._closed = True
+        with self._lock:
+            conns = list(self._all)
+            self._all.clear()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
 
-app = Flask(__name__)
-app.secret_key = 'at_commodities_secret_key_2025'
 
 class DatabaseManager:
-    def __init__(self, db_name='at_commodities.db'):
+    def __init__(self, db_name='at_commodities.db', pool_size=8, storage_profile=None):
         self.db_name = db_name
-        self.init_database()
+        self.storage_profile = load_storage_profile(storage_profile)
+        self.pool = ConnectionPool(db_name, size=pool_size, profile=self.storage_profile) if pool_size else None
+        # Schema creation and migrations run on first use, not at import
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        # Called as query_observer(query, seconds, rows) after each timed statement
+        self.query_observer = None
+    
+    def _ensure_initialized(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self.init_database()
+                self._initialized = True
     
     def init_database(self):
         """Initialize database with all required tables"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            self._create_schema(conn.cursor())
+        self.migrate()
+    
+    def schema_version(self):
+        with self.connection() as conn:
+            return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+    
+    def migrate(self):
+        """Apply pending MIGRATIONS in order; a no-op on an up-to-date database"""
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TEXT NOT NULL
+                )
+            ''')
+            conn.commit()
+            
+            # Take the write lock before reading the version so concurrent workers don't both migrate
+            conn.execute('BEGIN IMMEDIATE')
+            current = conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+            cursor = conn.cursor()
+            for version, description, step in MIGRATIONS:
+                if version <= current:
+                    continue
+                if callable(step):
+                    step(cursor)
+                else:
+                    for statement in step:
+                        cursor.execute(statement)
+                cursor.execute('INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                               (version, description, datetime.now().isoformat(timespec='seconds')))
+    
+    def _observe(self, query, started, rows):
+        if self.query_observer is not None:
+            self.query_observer(query, time.perf_counter() - started, rows)
+    
+    def iter_query(self, query, params=(), batch_size=1000):
+        """Yield result rows, reading them from the cursor batch_size at a time.
+        
+        The rows come from a connection of their own, outside the pool: a CSV export
+        held open by a slow client must not keep pooled connections from other requests.
+        """
+        self._ensure_initialized()
+        # Only time spent in SQLite is observed, not the consumer's time between batches
+        elapsed, count = 0.0, 0
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        try:
+            apply_storage_profile(conn, self.storage_profile)
+            started = time.perf_counter()
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                elapsed += time.perf_counter() - started
+                if not rows:
+                    break
+                count += len(rows)
+                yield from rows
+                started = time.perf_counter()
+        finally:
+            conn.close()
+        if self.query_observer is not None:
+            self.query_observer(query, elapsed, count)
+    
+    def fetch_page(self, table, order_by, where='', params=(), after=None, before=None, page_size=PAGE_SIZE):
+        """Keyset-paginate `table` newest first on the `order_by` columns.
         
+        Only page_size + 1 rows are read. Returns the page rows together with
+        opaque cursors for the previous and next pages (None at either end).
+        """
+        after, before = decode_cursor(after, len(order_by)), decode_cursor(before, len(order_by))
+        key = ', '.join(order_by)
+        placeholders = ', '.join('?' * len(order_by))
+        conditions = [where] if where else []
+        params = list(params)
+        if before is not None:
+            conditions.append(f'({key}) > ({placeholders})')
+            params += before
+            direction = 'ASC'
+        else:
+            if after is not None:
+                conditions.append(f'({key}) < ({placeholders})')
+                params += after
+            direction = 'DESC'
+        
+        query = f'SELECT * FROM {table}'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY ' + ', '.join(f'{column} {direction}' for column in order_by) + ' LIMIT ?'
+        params.append(page_size + 1)
+        
+        started = time.perf_counter()
+        with self.connection() as conn:
+            cursor = conn.execute(query, params)
+            rows = cursor.fetchall()
+            names = [d[0] for d in cursor.description]
+        self._observe(query, started, len(rows))
+        positions = [names.index(column) for column in order_by]
+        
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if before is not None:
+            rows.reverse()
+            has_prev, has_next = has_more, True
+        else:
+            has_prev, has_next = after is not None, has_more
+        
+        def cursor_for(row):
+            return encode_cursor([row[i] for i in positions])
+        
+        return {
+            'rows': rows,
+            'size': page_size,
+            'prev': cursor_for(rows[0]) if rows and has_prev else None,
+            'next': cursor_for(rows[-1]) if rows and has_next else None,
+        }
+    
+    def read_stats(self, day=None):
+        """Precomputed counters, plus the attendance count for `day` when given"""
+        with self.connection() as conn:
+            stats = dict(conn.execute('SELECT key, value FROM stats').fetchall())
+            if day is not None:
+                row = conn.execute('SELECT total FROM daily_attendance_stats WHERE date = ?', (day,)).fetchone()
+                stats['attendance_on_day'] = row[0] if row else 0
+        return stats
+    
+    def rebuild_stats(self):
+        """Reconcile the counters against the base tables"""
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            return rebuild_stats(conn.cursor())
+    
+    def _create_schema(self, cursor):
         # Employees table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS employees (
@@ -75,7 +694,6 @@ class DatabaseManager:
                 client_id INTEGER,
                 client_name TEXT NOT NULL,
                 date TEXT NOT NULL,
-                items TEXT NOT NULL,
                 subtotal REAL NOT NULL,
                 tax REAL NOT NULL,
                 discount REAL NOT NULL,
@@ -119,111 +737,175 @@ class DatabaseManager:
                 ('Niazi Bricks', 'Mr. Talha Niazi Sb', 'Brick Kiln Area, Lahore')
             ]
             cursor.executemany('INSERT INTO clients (name, contact, address) VALUES (?, ?, ?)', clients)
+    
+    @contextmanager
+    def connection(self):
+        """Yield a connection; pooled when a pool is configured"""
+        self._ensure_initialized()
+        with self._connection() as conn:
+            yield conn
+    
+    @contextmanager
+    def _connection(self):
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+            return
         
-        conn.commit()
-        conn.close()
+        conn = sqlite3.connect(self.db_name)
+        try:
+            apply_storage_profile(conn, self.storage_profile)
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
     
     def execute_query(self, query, params=None, fetch=False):
         """Execute database query"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        
-        if fetch:
-            result = cursor.fetchall()
-        else:
-            result = cursor.lastrowid
+        started = time.perf_counter()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            if fetch:
+                result = cursor.fetchall()
+                rows = len(result)
+            else:
+                result = cursor.lastrowid
+                rows = max(cursor.rowcount, 0)
         
-        conn.commit()
-        conn.close()
+        self._observe(query, started, rows)
         return result
+    
+    def storage_report(self):
+        """Effective value of every storage pragma as SQLite reports it"""
+        with self.connection() as conn:
+            return {name: conn.execute(f'PRAGMA {name}').fetchone()[0] for name in self.storage_profile}
+    
+    def close(self):
+        """Release pooled connections"""
+        if self.pool is not None:
+            self.pool.close()
+
+# Invoice layouts by name; each client's invoice_layout column picks one.
+# Sizes are in points, column widths and margins (top, bottom, left, right) in inches.
+# 'fonts' maps extra font names to TrueType files, registered once per process.
+INVOICE_LAYOUTS = {
+    'standard': {
+        'title': 'Invoice', 'title_size': 24, 'top_space': 14 * 14, 'font_size': 10,
+        'font': 'Helvetica', 'bold_font': 'Helvetica-Bold', 'header_background': 'lightgrey',
+        'column_widths': (3, 1, 1.5, 1.5), 'margins': (0.5, 1, 1, 1),
+    },
+    # No room left for pre-printed letterhead; for clients invoiced on plain paper
+    'compact': {
+        'title': 'Invoice', 'title_size': 18, 'top_space': 12, 'font_size': 9,
+        'font': 'Helvetica', 'bold_font': 'Helvetica-Bold', 'header_background': 'whitesmoke',
+        'column_widths': (3.5, 0.9, 1.3, 1.3), 'margins': (0.75, 0.75, 0.75, 0.75),
+    },
+    'formal': {
+        'title': 'Tax Invoice', 'title_size': 22, 'top_space': 14 * 14, 'font_size': 10,
+        'font': 'Times-Roman', 'bold_font': 'Times-Bold', 'header_background': 'lightgrey',
+        'column_widths': (3, 1, 1.5, 1.5), 'margins': (0.5, 1, 1, 1),
+    },
+}
+DEFAULT_INVOICE_LAYOUT = 'standard'
 
 class InvoiceGenerator:
-    def __init__(self):
-        pass
+    """Invoice PDFs from a registry of layouts compiled once per process.
+    
+    A compiled layout holds the ReportLab paragraph styles, the items TableStyle,
+    column widths and margins, so a render only creates the flowables it fills in.
+    """
+    # Bump whenever the PDF layout changes so cached renders are not reused
+    TEMPLATE_VERSION = 2
+    _registered_fonts = set()
+    
+    def __init__(self, layouts=None):
+        self.layouts = dict(layouts or INVOICE_LAYOUTS)
+        self._compiled = {}
     
     def number_to_words(self, num):
-        """Convert number to words in Pakistani format"""
-        if num == 0:
-            return "Zero"
+        """Convert amount to words in Pakistani format, paise included"""
+        return amount_in_words(num)
+    
+    @classmethod
+    def register_fonts(cls, fonts):
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
         
-        ones = ['', 'One', 'Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine']
-        teens = ['Ten', 'Eleven', 'Twelve', 'Thirteen', 'Fourteen', 'Fifteen', 'Sixteen', 'Seventeen', 'Eighteen', 'Nineteen']
-        tens = ['', '', 'Twenty', 'Thirty', 'Forty', 'Fifty', 'Sixty', 'Seventy', 'Eighty', 'Ninety']
+        for name, path in fonts.items():
+            if name not in cls._registered_fonts:
+                pdfmetrics.registerFont(TTFont(name, path))
+                cls._registered_fonts.add(name)
+    
+    def compile_layout(self, spec):
+        """ReportLab styles and measurements for one layout spec"""
+        # ReportLab is imported on first render so startup does not pay for it
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.platypus import TableStyle
         
-        def convert_hundreds(n):
-            result = ''
-            if n >= 100:
-                result += ones[n // 100] + ' Hundred '
-                n %= 100
-            if n >= 20:
-                result += tens[n // 10] + ' '
-                n %= 10
-            elif n >= 10:
-                result += teens[n - 10] + ' '
-                return result.strip()
-            if n > 0:
-                result += ones[n] + ' '
-            return result.strip()
+        self.register_fonts(spec.get('fonts', {}))
+        styles = getSampleStyleSheet()
+        normal = styles['Normal']
+        if spec['font'] != normal.fontName:
+            normal = ParagraphStyle('InvoiceNormal', parent=normal, fontName=spec['font'])
+        return {
+            'title_text': spec['title'],
+            'top_space': spec['top_space'],
+            'normal': normal,
+            'title': ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=spec['title_size'], spaceAfter=20,
+                                    alignment=TA_CENTER, fontName=spec['bold_font']),
+            'items_table': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), getattr(colors, spec['header_background'])),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), spec['bold_font']),
+                ('FONTNAME', (0, 1), (-1, -1), spec['font']),
+                ('FONTSIZE', (0, 0), (-1, -1), spec['font_size']),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ]),
+            'column_widths': [width * inch for width in spec['column_widths']],
+            'margins': [margin * inch for margin in spec['margins']],
+        }
+    
+    def layout(self, name=None):
+        """Compiled layout by name; unknown names fall back to the default layout"""
+        name = name if name in self.layouts else DEFAULT_INVOICE_LAYOUT
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            compiled = self._compiled[name] = self.compile_layout(self.layouts[name])
+        return compiled
+    
+    def _document(self, filename, layout):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate
         
-        if num < 1000:
-            return convert_hundreds(num) + ' Rupees Only'
-        elif num < 100000:
-            thousands = num // 1000
-            remainder = num % 1000
-            result = convert_hundreds(thousands) + ' Thousand'
-            if remainder > 0:
-                result += ', ' + convert_hundreds(remainder)
-            return result + ' Rupees Only'
-        elif num < 10000000:
-            lakhs = num // 100000
-            remainder = num % 100000
-            result = convert_hundreds(lakhs) + ' Lakh'
-            if remainder >= 1000:
-                thousands = remainder // 1000
-                remainder = remainder % 1000
-                result += ', ' + convert_hundreds(thousands) + ' Thousand'
-            if remainder > 0:
-                result += ', ' + convert_hundreds(remainder)
-            return result + ' Rupees Only'
-        else:
-            crores = num // 10000000
-            remainder = num % 10000000
-            result = convert_hundreds(crores) + ' Crore'
-            if remainder >= 100000:
-                lakhs = remainder // 100000
-                remainder = remainder % 100000
-                result += ', ' + convert_hundreds(lakhs) + ' Lakh'
-            if remainder >= 1000:
-                thousands = remainder // 1000
-                remainder = remainder % 1000
-                result += ', ' + convert_hundreds(thousands) + ' Thousand'
-            if remainder > 0:
-                result += ', ' + convert_hundreds(remainder)
-            return result + ' Rupees Only'
+        top, bottom, left, right = layout['margins']
+        return SimpleDocTemplate(filename, pagesize=A4, topMargin=top, bottomMargin=bottom, leftMargin=left, rightMargin=right)
     
-    def generate_pdf(self, invoice_data, filename=None):
-        """Generate PDF invoice"""
-        if not filename:
-            filename = f"Invoice_{invoice_data['invoice_number']}.pdf"
+    def build_story(self, invoice_data):
+        """Flowables for one invoice, in its client's layout"""
+        from reportlab.platypus import Paragraph, Spacer, Table
         
-        doc = SimpleDocTemplate(filename, pagesize=A4, topMargin=0.5*inch, bottomMargin=1*inch, leftMargin=1*inch, rightMargin=1*inch)
         story = []
-        styles = getSampleStyleSheet()
+        layout = self.layout(invoice_data.get('layout'))
         
         # Add space at top
-        story.append(Spacer(1, 14 * 14))
+        story.append(Spacer(1, layout['top_space']))
         
         # Title
-        title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, spaceAfter=20, alignment=TA_CENTER, fontName='Helvetica-Bold')
-        story.append(Paragraph("Invoice", title_style))
+        story.append(Paragraph(layout['title_text'], layout['title']))
         
         # Invoice details
-        items = json.loads(invoice_data['items'])
+        items = invoice_data['items']
         total_amount = float(invoice_data['total'])
         
         # Create invoice table
@@ -236,32 +918,513 @@ class InvoiceGenerator:
                 f"Rs{item['total']:,.2f}"
             ])
         
-        table = Table(table_data, colWidths=[3*inch, 1*inch, 1.5*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
+        table = Table(table_data, colWidths=layout['column_widths'])
+        table.setStyle(layout['items_table'])
         
         story.append(table)
         story.append(Spacer(1, 20))
         
         # Total
-        story.append(Paragraph(f"<b>Total: Rs{total_amount:,.2f}</b>", styles['Normal']))
-        story.append(Paragraph(f"Amount in words: {self.number_to_words(int(total_amount))}", styles['Normal']))
+        story.append(Paragraph(f"<b>Total: Rs{total_amount:,.2f}</b>", layout['normal']))
+        story.append(Paragraph(f"Amount in words: {self.number_to_words(total_amount)}", layout['normal']))
+        return story
+    
+    def generate_pdf(self, invoice_data, filename=None):
+        """Generate PDF invoice; filename may also be a writable file object"""
+        if not filename:
+            filename = f"Invoice_{invoice_data['invoice_number']}.pdf"
+        
+        layout = self.layout(invoice_data.get('layout'))
+        self._document(filename, layout).build(self.build_story(invoice_data))
+        return filename
+    
+    def generate_batch_pdf(self, invoices, filename):
+        """One PDF holding every invoice, each starting on a new page; margins follow the first invoice"""
+        from reportlab.platypus import PageBreak
         
-        doc.build(story)
+        story = []
+        for invoice_data in invoices:
+            if story:
+                story.append(PageBreak())
+            story.extend(self.build_story(invoice_data))
+        self._document(filename, self.layout(invoices[0].get('layout') if invoices else None)).build(story)
         return filename
 
-# Initialize components
-db = DatabaseManager()
+def render_invoice_pdf(invoice_data, filename):
+    """Process-pool entry point for PdfJobQueue"""
+    return invoice_gen.generate_pdf(invoice_data, filename)
+
+def render_invoice_bytes(invoice_data):
+    """Process-pool entry point for batch renders: (invoice number, PDF bytes, seconds)"""
+    t0 = time.perf_counter()
+    buffer = io.BytesIO()
+    invoice_gen.generate_pdf(invoice_data, buffer)
+    return invoice_data['invoice_number'], buffer.getvalue(), time.perf_counter() - t0
+
+def render_merged_pdf(invoices, filename):
+    """Process-pool entry point for PdfJobQueue.submit_merged"""
+    invoice_gen.generate_batch_pdf(invoices, filename)
+
+class PdfQueueFull(RuntimeError):
+    """Raised when too many PDF jobs are already waiting"""
+
+class PdfJobQueue:
+    """Render invoice PDFs in a process pool so request threads never lay out ReportLab tables.
+    
+    At most max_pending jobs may be queued or running; submit() raises PdfQueueFull
+    beyond that. Failed renders are retried up to max_attempts times. Batch renders
+    take pending slots too, but wait for them instead of failing and never hold more
+    than half, so a large batch cannot crowd out single downloads.
+    
+    A job's file is deleted when take() hands it out, when the job expires after
+    keep_seconds, or at shutdown(). Files older than keep_seconds that a process left
+    behind by exiting without shutdown() are swept when the next queue starts.
+    """
+    def __init__(self, output_dir, workers=None, max_pending=32, max_attempts=3, keep_seconds=3600):
+        self.output_dir = os.path.abspath(output_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.max_batch_pending = max(1, max_pending // 2)
+        self.max_attempts = max_attempts
+        self.keep_seconds = keep_seconds
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._pool = None
+        self._sweep()
+    
+    def _sweep(self):
+        # Only stale files: server workers share output_dir, and a sibling's recent renders may still be wanted
+        cutoff = time.time() - self.keep_seconds
+        try:
+            entries = list(os.scandir(self.output_dir))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            try:
+                if entry.name.endswith('.pdf') and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+    
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+    
+    def _expire(self):
+        cutoff = time.time() - self.keep_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job['finished'] and job['finished'] < cutoff:
+                del self._jobs[job_id]
+                self._remove(job['filename'])
+    
+    def _release_slot(self):
+        with self._lock:
+            self._pending -= 1
+            self._slot_freed.notify_all()
+    
+    def submit(self, invoice_data):
+        """Queue a render and return its job id"""
+        return self._submit(render_invoice_pdf, invoice_data, invoice_data['invoice_number'],
+                            f"Invoice_{invoice_data['invoice_number']}.pdf")
+    
+    def submit_merged(self, invoices, download_name):
+        """Queue one multi-invoice PDF of `invoices` and return its job id"""
+        return self._submit(render_merged_pdf, invoices, None, download_name)
+    
+    def _submit(self, render, payload, invoice_number, download_name):
+        with self._lock:
+            self._expire()
+            if self._pending >= self.max_pending:
+                raise PdfQueueFull(f'{self._pending} PDF jobs already pending')
+            self._pending += 1
+            job_id = uuid.uuid4().hex
+            job = self._jobs[job_id] = {
+                'id': job_id,
+                'invoice_number': invoice_number,
+                'download_name': download_name,
+                'status': 'queued',
+                'attempts': 0,
+                'error': None,
+                'filename': os.path.join(self.output_dir, f'{job_id}.pdf'),
+                'submitted': time.time(),
+                'finished': None,
+                'render': render,
+                'done': threading.Event(),
+            }
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._dispatch(job, payload)
+        return job_id
+    
+    def _dispatch(self, job, payload):
+        with self._lock:
+            job['attempts'] += 1
+            job['status'] = 'running'
+        try:
+            future = self._executor().submit(job['render'], payload, job['filename'])
+        except Exception as e:
+            # A broken pool is replaced and the render retried; any other failure to
+            # submit (e.g. a pool shut down under us) fails the job and frees its slot
+            self._finished(job, payload, error=e, retry=isinstance(e, BrokenProcessPool))
+            return
+        future.add_done_callback(lambda f: self._render_done(job, payload, f))
+    
+    def _render_done(self, job, payload, future):
+        if future.cancelled():
+            self._finished(job, payload, error=CancelledError('render cancelled at shutdown'), retry=False)
+        else:
+            self._finished(job, payload, error=future.exception())
+    
+    def _finished(self, job, payload, error=None, retry=True):
+        if error is not None and retry and job['attempts'] < self.max_attempts:
+            with self._lock:
+                if isinstance(error, BrokenProcessPool):
+                    self._pool = None
+                job['error'] = str(error)
+            self._dispatch(job, payload)
+            return
+        
+        with self._lock:
+            job['status'] = 'failed' if error is not None else 'done'
+            job['error'] = str(error) if error is not None else None
+            job['finished'] = time.time()
+            self._pending -= 1
+            self._slot_freed.notify_all()
+        job['done'].set()
+    
+    def status(self, job_id):
+        """Public view of a job, or None if unknown"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return {k: v for k, v in job.items() if k not in ('done', 'filename', 'render')}
+    
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes; returns its status"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job['done'].wait(timeout)
+        return self.status(job_id)
+    
+    def result_path(self, job_id):
+        job = self._jobs.get(job_id)
+        return job['filename'] if job and job['status'] == 'done' else None
+    
+    def take(self, job_id):
+        """Open a finished job's PDF and forget the job, deleting its file; None if it is not done.
+        
+        The open file stays readable after the deletion, until the caller closes it.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] != 'done':
+                return None
+            del self._jobs[job_id]
+        try:
+            f = open(job['filename'], 'rb')
+        except FileNotFoundError:
+            return None
+        self._remove(job['filename'])
+        return f
+    
+    def _take_batch_slot(self):
+        with self._lock:
+            while self._pending >= self.max_batch_pending:
+                self._slot_freed.wait()
+            self._pending += 1
+    
+    def render_batch(self, invoices):
+        """Render many invoices across the pool, yielding render_invoice_bytes results in order.
+        
+        At most one render per worker is in flight, each holding a pending slot until
+        it finishes, so single downloads queue behind a handful of renders, not the batch.
+        """
+        in_flight = collections.deque()
+        try:
+            for invoice_data in invoices:
+                if len(in_flight) >= self.workers:
+                    yield in_flight.popleft().result()
+                self._take_batch_slot()
+                try:
+                    future = self._executor().submit(render_invoice_bytes, invoice_data)
+                except BaseException:
+                    self._release_slot()
+                    raise
+                future.add_done_callback(lambda f: self._release_slot())
+                in_flight.append(future)
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+    
+    def shutdown(self):
+        """Stop the worker pool and delete the files of every job this queue still holds"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+        for job in jobs:
+            self._remove(job['filename'])
+
+class PdfCache:
+    """Content-addressed store of rendered invoice PDFs with size-bounded LRU eviction.
+    
+    Files are named <invoice id>-<sha256 of invoice row and template version>.pdf,
+    so an edited invoice never matches a stale render and all renders of one
+    invoice can be dropped together.
+    """
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self._locks = [threading.Lock() for _ in range(64)]
+    
+    def key(self, invoice_data):
+        payload = json.dumps([InvoiceGenerator.TEMPLATE_VERSION, invoice_data], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def path(self, invoice_id, key):
+        return os.path.join(self.directory, f'{invoice_id}-{key}.pdf')
+    
+    def open(self, invoice_id, key):
+        """Open a cached PDF for reading, or None; a hit refreshes the entry's LRU position.
+        
+        The open file stays readable even if eviction removes the entry before it is sent.
+        """
+        path = self.path(invoice_id, key)
+        try:
+            f = open(path, 'rb')
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return f
+    
+    def lock(self, key):
+        """Striped lock serializing renders of the same key within this process"""
+        return self._locks[int(key[:8], 16) % len(self._locks)]
+    
+    def put(self, invoice_id, key, rendered_file):
+        """Add a freshly rendered file to the cache, leaving `rendered_file` in place"""
+        os.makedirs(self.directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(self.directory, f'{invoice_id}-*.pdf')):
+            if stale != self.path(invoice_id, key):
+                self._remove(stale)
+        path = self.path(invoice_id, key)
+        tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            os.link(rendered_file, tmp)  # no copy when the job and cache dirs share a filesystem
+        except OSError:
+            shutil.copyfile(rendered_file, tmp)
+        os.replace(tmp, path)  # atomic, so readers never see a partial file
+        self.evict()
+    
+    def invalidate(self, invoice_id):
+        for path in glob.glob(os.path.join(self.directory, f'{invoice_id}-*.pdf')):
+            self._remove(path)
+    
+    def evict(self):
+        """Drop least recently used files until the cache fits in max_bytes"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pdf'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+    
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Distinct SQL statements tracked; anything beyond is counted under "other"
+MAX_STATEMENTS = 200
+
+sql_log = logging.getLogger('erp.sql')
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Counter:
+    kind = 'counter'
+    
+    def __init__(self, name, help, labels):
+        self.name, self.help, self.labels = name, help, labels
+        self.series = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, key, amount=1):
+        with self._lock:
+            self.series[key] = self.series.get(key, 0) + amount
+    
+    def merge(self, key, value):
+        self.inc(key, value)
+    
+    def samples(self):
+        for key, value in sorted(self.series.items()):
+            yield self.name, dict(zip(self.labels, key)), value
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set, as Prometheus expects"""
+    kind = 'histogram'
+    
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, key, seconds):
+        # One slot per bucket, one for +Inf, then the running sum
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts = self.series.get(key)
+            if counts is None:
+                counts = self.series[key] = [0] * (len(self.buckets) + 2)
+            counts[slot] += 1
+            counts[-1] += seconds
+    
+    def merge(self, key, values):
+        with self._lock:
+            counts = self.series.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, value in enumerate(values):
+                counts[i] += value
+    
+    def samples(self):
+        for key, counts in sorted(self.series.items()):
+            labels = dict(zip(self.labels, key))
+            total = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                total += count
+                yield self.name + '_bucket', {**labels, 'le': str(bound)}, total
+            yield self.name + '_sum', labels, counts[-1]
+            yield self.name + '_count', labels, total
+
+class Metrics:
+    """Per-route request latency and per-statement SQL timing, exported in Prometheus text format.
+    
+    Under `serve --workers N` each worker writes its totals to shared_dir every few
+    seconds and /metrics sums the files, so any worker can answer a scrape.
+    """
+    def __init__(self, slow_query_ms=250.0, shared_dir=None, flush_seconds=5.0):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.shared_dir = shared_dir or None
+        self.flush_seconds = flush_seconds
+        self._flushed = time.monotonic()
+        self.requests = Histogram('erp_http_request_duration_seconds',
+                                  'Time until the response starts, by route', ('method', 'route'))
+        self.responses = Counter('erp_http_responses_total', 'Responses by route and status code',
+                                 ('method', 'route', 'status'))
+        self.queries = Histogram('erp_db_query_duration_seconds', 'SQL statement latency', ('statement',))
+        self.query_rows = Counter('erp_db_query_rows_total', 'Rows returned or changed per statement', ('statement',))
+        self.slow_queries = Counter('erp_db_slow_queries_total', 'Statements slower than the slow-query threshold',
+                                    ('statement',))
+        self._metrics = (self.requests, self.responses, self.queries, self.query_rows, self.slow_queries)
+        self._statements = {}
+    
+    def statement_label(self, query):
+        label = self._statements.get(query)
+        if label is None:
+            if len(self._statements) >= MAX_STATEMENTS:
+                return 'other'
+            label = self._statements[query] = ' '.join(query.split())[:160]
+        return label
+    
+    def observe_request(self, method, route, status, seconds):
+        self.requests.observe((method, route), seconds)
+        self.responses.inc((method, route, str(status)))
+        if self.shared_dir and time.monotonic() - self._flushed > self.flush_seconds:
+            self.flush()
+    
+    def observe_query(self, query, seconds, rows):
+        label = (self.statement_label(query),)
+        self.queries.observe(label, seconds)
+        if rows:
+            self.query_rows.inc(label, rows)
+        if seconds >= self.slow_query_seconds:
+            self.slow_queries.inc(label)
+            sql_log.warning("Slow query (%.1f ms, %d rows): %s", seconds * 1000, rows, label[0])
+    
+    def snapshot(self):
+        return {metric.name: [[list(key), value] for key, value in list(metric.series.items())]
+                for metric in self._metrics}
+    
+    def flush(self):
+        """Publish this process's totals for the other workers' /metrics"""
+        self._flushed = time.monotonic()
+        os.makedirs(self.shared_dir, exist_ok=True)
+        path = os.path.join(self.shared_dir, f'{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+    
+    def render(self):
+        """Prometheus text exposition (format 0.0.4)"""
+        metrics = self._metrics
+        if self.shared_dir:
+            self.flush()
+            # Sum every worker's file, dead workers included, so counters never go backwards
+            combined = Metrics()
+            metrics = combined._metrics
+            for path in glob.glob(os.path.join(self.shared_dir, '*.json')):
+                try:
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                for metric in metrics:
+                    for key, value in snapshot.get(metric.name, ()):
+                        metric.merge(tuple(key), value)
+        
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                rendered = ','.join(f'{k}="{_label_value(v)}"' for k, v in labels.items())
+                lines.append(f'{name}{{{rendered}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+# Initialize components. The layout code is stateless and shared with PDF worker
+# processes; the database and PDF stores belong to each app built by create_app()
 invoice_gen = InvoiceGenerator()
+db = LocalProxy(lambda: current_app.extensions['erp']['db'])
+pdf_jobs = LocalProxy(lambda: current_app.extensions['erp']['pdf_jobs'])
+pdf_cache = LocalProxy(lambda: current_app.extensions['erp']['pdf_cache'])
+metrics = LocalProxy(lambda: current_app.extensions['erp']['metrics'])
+
+# HTML Templates, compiled once by compile_templates() before the server starts
+PAGINATION_TEMPLATE = """
+{% if page.prev or page.next %}
+<div class="pagination">
+    <span>{% if page.prev %}<a href="/{{ active_page }}?before={{ page.prev }}&per_page={{ page.size }}">&larr; Newer</a>{% endif %}</span>
+    <span>{% if page.next %}<a href="/{{ active_page }}?after={{ page.next }}&per_page={{ page.size }}">Older &rarr;</a>{% endif %}</span>
+</div>
+{% endif %}
+"""
 
-# HTML Templates
 BASE_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
@@ -310,6 +1473,8 @@ BASE_TEMPLATE = """
         .modal-content { background: white; margin: 5% auto; padding: 30px; border-radius: 10px; max-width: 600px; max-height: 80vh; overflow-y: auto; }
         .close { float: right; font-size: 28px; font-weight: bold; cursor: pointer; }
         .close:hover { color: #ef4444; }
+        .pagination { display: flex; justify-content: space-between; margin-top: 20px; }
+        .pagination a { color: #3b82f6; text-decoration: none; font-weight: 600; }
     </style>
 </head>
 <body>
@@ -344,7 +1509,8 @@ BASE_TEMPLATE = """
 </html>
 """
 
-DASHBOARD_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}', """
+DASHBOARD_TEMPLATE = """{% extends "base.html" %}
+{% block content %}
 <div class="header">
     <h1>📊 Dashboard</h1>
     <p>Welcome to A.T Commodities ERP System</p>
@@ -396,9 +1562,11 @@ DASHBOARD_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}',
         </div>
     </div>
 </div>
-""")
+{% endblock %}
+"""
 
-ATTENDANCE_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}', """
+ATTENDANCE_TEMPLATE = """{% extends "base.html" %}
+{% block content %}
 <div class="header">
     <h1>🕒 Daily Attendance</h1>
     <p>Track employee attendance and work locations</p>
@@ -478,8 +1646,8 @@ ATTENDANCE_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}',
             {% for record in today_records %}
             <tr>
                 <td>{{ record[2] }}</td>
-                <td>{{ record[3] }}</td>
-                <td>{{ record[4] or '-' }}</td>
+                <td>{{ record[3] | clock }}{% if record[6] != today %} <small>(yesterday)</small>{% endif %}</td>
+                <td>{{ record[4] | clock or '-' }}{% if record[4] and record[4][:10] != record[6] %} <small>(+1 day)</small>{% endif %}</td>
                 <td>
                     <span style="background: {% if record[5] == 'office' %}#dbeafe{% elif record[5] == 'warehouse' %}#d1fae5{% else %}#fed7aa{% endif %}; 
                                  color: {% if record[5] == 'office' %}#1e40af{% elif record[5] == 'warehouse' %}#065f46{% else %}#9a3412{% endif %}; 
@@ -503,118 +1671,13 @@ ATTENDANCE_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}',
     {% if not today_records %}
     <p style="text-align: center; color: #64748b; margin-top: 20px;">No attendance records for today</p>
     {% endif %}
+{% include "pagination.html" %}
 </div>
-""")
-
-# Routes
-@app.route('/')
-def dashboard():
-    # Get statistics
-    today = date.today().isoformat()
-    
-    total_employees = db.execute_query('SELECT COUNT(*) FROM employees', fetch=True)[0][0]
-    today_attendance = db.execute_query('SELECT COUNT(*) FROM attendance WHERE date = ?', (today,), fetch=True)[0][0]
-    total_invoices = db.execute_query('SELECT COUNT(*) FROM invoices', fetch=True)[0][0]
-    active_deliveries = db.execute_query("SELECT COUNT(*) FROM deliveries WHERE status != 'delivered'", fetch=True)[0][0]
-    
-    # Calculate storage used (rough estimate)
-    storage_used = os.path.getsize('at_commodities.db') // 1024 if os.path.exists('at_commodities.db') else 0
-    
-    stats = {
-        'total_employees': total_employees,
-        'today_attendance': today_attendance,
-        'total_invoices': total_invoices,
-        'active_deliveries': active_deliveries,
-        'storage_used': storage_used
-    }
-    
-    return render_template_string(DASHBOARD_TEMPLATE, active_page='dashboard', stats=stats)
-
-@app.route('/attendance')
-def attendance():
-    employees = db.execute_query('SELECT id, name, department FROM employees', fetch=True)
-    
-    today = date.today().isoformat()
-    today_records = db.execute_query('SELECT * FROM attendance WHERE date = ? ORDER BY check_in DESC', (today,), fetch=True)
-    
-    # Calculate today's stats
-    total = len(today_records)
-    checked_out = len([r for r in today_records if r[4]])  # check_out is not None
-    office = len([r for r in today_records if r[5] == 'office'])
-    warehouse = len([r for r in today_records if r[5] == 'warehouse'])
-    field = len([r for r in today_records if r[5] == 'field'])
-    
-    today_stats = {
-        'total': total,
-        'checked_out': checked_out,
-        'office': office,
-        'warehouse': warehouse,
-        'field': field
-    }
-    
-    return render_template_string(ATTENDANCE_TEMPLATE, 
-                                active_page='attendance', 
-                                employees=employees, 
-                                today_records=today_records,
-                                today_stats=today_stats)
-
-@app.route('/attendance/checkin', methods=['POST'])
-def attendance_checkin():
-    employee_id = request.form.get('employee_id')
-    work_location = request.form.get('work_location')
-    
-    # Get employee name
-    employee = db.execute_query('SELECT name FROM employees WHERE id = ?', (employee_id,), fetch=True)
-    if not employee:
-        return redirect(url_for('attendance'))
-    
-    employee_name = employee[0][0]
-    today = date.today().isoformat()
-    current_time = datetime.now().strftime('%H:%M:%S')
-    
-    # Check if already checked in today
-    existing = db.execute_query('SELECT id FROM attendance WHERE employee_id = ? AND date = ?', (employee_id, today), fetch=True)
-    if existing:
-        return render_template_string(ATTENDANCE_TEMPLATE.replace('{% if message %}', '{% if True %}'), 
-                                    active_page='attendance',
-                                    message='Employee already checked in today!',
-                                    message_type='error',
-                                    employees=db.execute_query('SELECT id, name, department FROM employees', fetch=True),
-                                    today_records=db.execute_query('SELECT * FROM attendance WHERE date = ? ORDER BY check_in DESC', (today,), fetch=True),
-                                    today_stats={'total': 0, 'checked_out': 0, 'office': 0, 'warehouse': 0, 'field': 0})
-    
-    # Insert attendance record
-    db.execute_query('''
-        INSERT INTO attendance (employee_id, employee_name, check_in, work_location, date)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (employee_id, employee_name, current_time, work_location, today))
-    
-    return redirect(url_for('attendance'))
-
-@app.route('/attendance/checkout', methods=['POST'])
-def attendance_checkout():
-    record_id = request.form.get('record_id')
-    current_time = datetime.now().strftime('%H:%M:%S')
-    
-    # Get check-in time to calculate hours
-    record = db.execute_query('SELECT check_in FROM attendance WHERE id = ?', (record_id,), fetch=True)
-    if record:
-        check_in_time = datetime.strptime(record[0][0], '%H:%M:%S')
-        check_out_time = datetime.strptime(current_time, '%H:%M:%S')
-        total_hours = (check_out_time - check_in_time).total_seconds() / 3600
-        
-        db.execute_query('''
-            UPDATE attendance SET check_out = ?, total_hours = ? WHERE id = ?
-        ''', (current_time, round(total_hours, 2), record_id))
-    
-    return redirect(url_for('attendance'))
+{% endblock %}
+"""
 
-@app.route('/invoices')
-def invoices():
-    invoices_data = db.execute_query('SELECT * FROM invoices ORDER BY date DESC', fetch=True)
-    clients = db.execute_query('SELECT * FROM clients', fetch=True)
-    
-    INVOICES_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}', """
+INVOICES_TEMPLATE = """{% extends "base.html" %}
+{% block content %}
     <div class="header">
         <h1>📄 Invoice Generator</h1>
         <p>Create and manage invoices for your clients</p>
@@ -644,13 +1707,18 @@ def invoices():
                     <td>{{ invoice[1] }}</td>
                     <td>{{ invoice[3] }}</td>
                     <td>{{ invoice[4] }}</td>
-                    <td>Rs{{ "%.2f"|format(invoice[9]) }}</td>
+                    <td>Rs{{ "%.2f"|format(invoice[8]) }}</td>
                     <td>
-                        <span style="background: {% if invoice[10] == 'paid' %}#d1fae5{% elif invoice[10] == 'sent' %}#dbeafe{% else %}#f3f4f6{% endif %}; 
-                                     color: {% if invoice[10] == 'paid' %}#065f46{% elif invoice[10] == 'sent' %}#1e40af{% else %}#374151{% endif %}; 
-                                     padding: 4px 8px; border-radius: 4px; font-size: 12px;">
-                            {{ invoice[10].title() }}
-                        </span>
+                        <form method="POST" action="/invoices/update_status/{{ invoice[0] }}" style="display: inline;">
+                            <select name="status" onchange="this.form.submit()" 
+                                    style="background: {% if invoice[9] == 'paid' %}#d1fae5{% elif invoice[9] == 'sent' %}#dbeafe{% else %}#f3f4f6{% endif %}; 
+                                           color: {% if invoice[9] == 'paid' %}#065f46{% elif invoice[9] == 'sent' %}#1e40af{% else %}#374151{% endif %}; 
+                                           border: none; padding: 4px 8px; border-radius: 4px; font-size: 12px;">
+                                <option value="draft" {% if invoice[9] == 'draft' %}selected{% endif %}>Draft</option>
+                                <option value="sent" {% if invoice[9] == 'sent' %}selected{% endif %}>Sent</option>
+                                <option value="paid" {% if invoice[9] == 'paid' %}selected{% endif %}>Paid</option>
+                            </select>
+                        </form>
                     </td>
                     <td>
                         <a href="/invoices/download/{{ invoice[0] }}" class="btn btn-primary" style="padding: 6px 12px; font-size: 12px; text-decoration: none;">📥 PDF</a>
@@ -665,6 +1733,7 @@ def invoices():
         {% if not invoices %}
         <p style="text-align: center; color: #64748b; margin-top: 20px;">No invoices created yet</p>
         {% endif %}
+    {% include "pagination.html" %}
     </div>
 
     <!-- Invoice Modal -->
@@ -751,87 +1820,11 @@ def invoices():
             button.closest('.item-row').remove();
         }
     </script>
-    """)
-    
-    return render_template_string(INVOICES_TEMPLATE, 
-                                active_page='invoices', 
-                                invoices=invoices_data,
-                                clients=clients)
-
-@app.route('/invoices/create', methods=['POST'])
-def create_invoice():
-    client_id = request.form.get('client_id')
-    invoice_number = request.form.get('invoice_number')
-    descriptions = request.form.getlist('description[]')
-    quantities = request.form.getlist('quantity[]')
-    unit_prices = request.form.getlist('unit_price[]')
-    tax_percent = float(request.form.get('tax_percent', 0))
-    discount_percent = float(request.form.get('discount_percent', 0))
-    
-    # Get client name
-    client = db.execute_query('SELECT name FROM clients WHERE id = ?', (client_id,), fetch=True)
-    if not client:
-        return redirect(url_for('invoices'))
-    
-    client_name = client[0][0]
-    
-    # Build items
-    items = []
-    subtotal = 0
-    for i in range(len(descriptions)):
-        quantity = float(quantities[i])
-        unit_price = float(unit_prices[i])
-        total = quantity * unit_price
-        subtotal += total
-        
-        items.append({
-            'description': descriptions[i],
-            'quantity': quantity,
-            'unit_price': unit_price,
-            'total': total
-        })
-    
-    # Calculate totals
-    tax = subtotal * (tax_percent / 100)
-    discount = subtotal * (discount_percent / 100)
-    total = subtotal + tax - discount
-    
-    # Save invoice
-    db.execute_query('''
-        INSERT INTO invoices (invoice_number, client_id, client_name, date, items, subtotal, tax, discount, total)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (invoice_number, client_id, client_name, date.today().isoformat(), 
-          json.dumps(items), subtotal, tax, discount, total))
-    
-    return redirect(url_for('invoices'))
+{% endblock %}
+"""
 
-@app.route('/invoices/download/<int:invoice_id>')
-def download_invoice(invoice_id):
-    invoice = db.execute_query('SELECT * FROM invoices WHERE id = ?', (invoice_id,), fetch=True)
-    if not invoice:
-        return "Invoice not found", 404
-    
-    invoice_data = {
-        'invoice_number': invoice[0][1],
-        'client_name': invoice[0][3],
-        'date': invoice[0][4],
-        'items': invoice[0][5],
-        'total': invoice[0][9]
-    }
-    
-    filename = invoice_gen.generate_pdf(invoice_data)
-    return send_file(filename, as_attachment=True)
-
-@app.route('/invoices/delete/<int:invoice_id>', methods=['POST'])
-def delete_invoice(invoice_id):
-    db.execute_query('DELETE FROM invoices WHERE id = ?', (invoice_id,))
-    return redirect(url_for('invoices'))
-
-@app.route('/deliveries')
-def deliveries():
-    deliveries_data = db.execute_query('SELECT * FROM deliveries ORDER BY delivery_date DESC, delivery_time DESC', fetch=True)
-    
-    DELIVERIES_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}', """
+DELIVERIES_TEMPLATE = """{% extends "base.html" %}
+{% block content %}
     <div class="header">
         <h1>🚚 Vehicle Delivery Ledger</h1>
         <p>Track vehicle deliveries and logistics</p>
@@ -907,6 +1900,7 @@ def deliveries():
         {% if not deliveries %}
         <p style="text-align: center; color: #64748b; margin-top: 20px;">No delivery records found</p>
         {% endif %}
+    {% include "pagination.html" %}
     </div>
 
     <!-- Delivery Modal -->
@@ -955,58 +1949,11 @@ def deliveries():
             </form>
         </div>
     </div>
-    """)
-    
-    # Calculate stats
-    total = len(deliveries_data)
-    pending = len([d for d in deliveries_data if d[7] == 'pending'])
-    in_transit = len([d for d in deliveries_data if d[7] == 'in-transit'])
-    delivered = len([d for d in deliveries_data if d[7] == 'delivered'])
-    
-    stats = {
-        'total': total,
-        'pending': pending,
-        'in_transit': in_transit,
-        'delivered': delivered
-    }
-    
-    return render_template_string(DELIVERIES_TEMPLATE, 
-                                active_page='deliveries', 
-                                deliveries=deliveries_data,
-                                stats=stats,
-                                today=date.today().isoformat())
-
-@app.route('/deliveries/create', methods=['POST'])
-def create_delivery():
-    vehicle_number = request.form.get('vehicle_number')
-    driver_name = request.form.get('driver_name')
-    delivery_date = request.form.get('delivery_date')
-    delivery_time = request.form.get('delivery_time')
-    destination = request.form.get('destination')
-    load_details = request.form.get('load_details')
-    status = request.form.get('status')
-    
-    db.execute_query('''
-        INSERT INTO deliveries (vehicle_number, driver_name, delivery_date, delivery_time, destination, load_details, status)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (vehicle_number, driver_name, delivery_date, delivery_time, destination, load_details, status))
-    
-    return redirect(url_for('deliveries'))
-
-@app.route('/deliveries/update_status/<int:delivery_id>', methods=['POST'])
-def update_delivery_status(delivery_id):
-    status = request.form.get('status')
-    db.execute_query('UPDATE deliveries SET status = ? WHERE id = ?', (status, delivery_id))
-    return redirect(url_for('deliveries'))
-
-@app.route('/deliveries/delete/<int:delivery_id>', methods=['POST'])
-def delete_delivery(delivery_id):
-    db.execute_query('DELETE FROM deliveries WHERE id = ?', (delivery_id,))
-    return redirect(url_for('deliveries'))
+{% endblock %}
+"""
 
-@app.route('/downloads')
-def downloads():
-    DOWNLOADS_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}', """
+DOWNLOADS_TEMPLATE = """{% extends "base.html" %}
+{% block content %}
     <div class="header">
         <h1>📥 Download Center</h1>
         <p>Export and download reports from all modules</p>
@@ -1038,7 +1985,9 @@ def downloads():
             <p>Download daily or monthly attendance records</p>
             <div style="margin-top: 20px;">
                 <a href="/downloads/attendance?type=daily&date={{ end_date }}" class="btn btn-primary" style="display: block; margin-bottom: 10px; text-decoration: none; text-align: center;">📊 Daily Report</a>
-                <a href="/downloads/attendance?type=monthly&start={{ start_date }}&end={{ end_date }}" class="btn btn-success" style="display: block; text-decoration: none; text-align: center;">📈 Monthly Report</a>
+                <a href="/downloads/attendance?type=monthly&start={{ start_date }}&end={{ end_date }}" class="btn btn-success" style="display: block; margin-bottom: 10px; text-decoration: none; text-align: center;">📈 Monthly Report</a>
+                <a href="/downloads/payroll?period=week&start={{ start_date }}&end={{ end_date }}" class="btn btn-primary" style="display: block; margin-bottom: 10px; text-decoration: none; text-align: center;">💰 Weekly Payroll Hours</a>
+                <a href="/downloads/payroll?period=month&start={{ start_date }}&end={{ end_date }}" class="btn btn-success" style="display: block; text-decoration: none; text-align: center;">💰 Monthly Payroll Hours</a>
             </div>
         </div>
         
@@ -1048,7 +1997,8 @@ def downloads():
             <div style="margin-top: 20px;">
                 <a href="/downloads/invoices?start={{ start_date }}&end={{ end_date }}" class="btn btn-primary" style="display: block; margin-bottom: 10px; text-decoration: none; text-align: center;">📋 All Invoices</a>
                 <a href="/downloads/invoices?start={{ start_date }}&end={{ end_date }}&client=1" class="btn btn-success" style="display: block; margin-bottom: 10px; text-decoration: none; text-align: center;">🏢 A.L.U International</a>
-                <a href="/downloads/invoices?start={{ start_date }}&end={{ end_date }}&client=2" class="btn" style="background: #f59e0b; color: white; display: block; text-decoration: none; text-align: center;">🧱 Niazi Bricks</a>
+                <a href="/downloads/invoices?start={{ start_date }}&end={{ end_date }}&client=2" class="btn" style="background: #f59e0b; color: white; display: block; margin-bottom: 10px; text-decoration: none; text-align: center;">🧱 Niazi Bricks</a>
+                <a href="/invoices/batch?start={{ start_date }}&end={{ end_date }}" class="btn" style="background: #8b5cf6; color: white; display: block; text-decoration: none; text-align: center;">🗜️ All PDFs (ZIP)</a>
             </div>
         </div>
         
@@ -1090,69 +2040,727 @@ def downloads():
             <li><strong>Client-specific reports</strong> filter invoices by the selected client</li>
         </ul>
     </div>
-    """)
+{% endblock %}
+"""
+
+TEMPLATES = {
+    'base.html': BASE_TEMPLATE,
+    'pagination.html': PAGINATION_TEMPLATE,
+    'dashboard.html': DASHBOARD_TEMPLATE,
+    'attendance.html': ATTENDANCE_TEMPLATE,
+    'invoices.html': INVOICES_TEMPLATE,
+    'deliveries.html': DELIVERIES_TEMPLATE,
+    'downloads.html': DOWNLOADS_TEMPLATE,
+}
+
+def configure_templates(app, cache_dir=None):
+    """Serve the page templates from memory with a persistent bytecode cache"""
+    app.jinja_loader = DictLoader(TEMPLATES)
+    app.jinja_options = {
+        **app.jinja_options,
+        'bytecode_cache': FileSystemBytecodeCache(cache_dir or None),
+        'auto_reload': False,
+    }
+
+def compile_templates(app):
+    """Compile every page template up front instead of on its first request"""
+    for name in TEMPLATES:
+        app.jinja_env.get_template(name)
+
+def page_args():
+    """Cursor and page size for a listing request"""
+    page_size = request.args.get('per_page', PAGE_SIZE, type=int)
+    return {
+        'after': request.args.get('after'),
+        'before': request.args.get('before'),
+        'page_size': max(1, min(page_size, MAX_PAGE_SIZE)),
+    }
+
+def today_attendance_page(today):
+    return db.fetch_page('attendance', ('check_in', 'id'), 'date = ?', (today,), **page_args())
+
+def today_attendance_stats(today):
+    """Headline counts for the whole day in one aggregate pass, not just the visible page"""
+    total, checked_out, office, warehouse, field = db.execute_query(ATTENDANCE_STATS_QUERY, (today,), fetch=True)[0]
+    return {
+        'total': total,
+        'checked_out': checked_out,
+        'office': office,
+        'warehouse': warehouse,
+        'field': field
+    }
+
+def render_attendance(today, **context):
+    """Attendance page shared by the normal view and the check-in error path"""
+    page = today_attendance_page(today)
+    records = page['rows']
+    if page['prev'] is None:
+        # A night shift still open after midnight heads the first page, so it can be checked out here
+        yesterday = (date.fromisoformat(today) - timedelta(days=1)).isoformat()
+        records = db.execute_query(OPEN_SHIFTS_QUERY, (yesterday,), fetch=True) + records
+    return render_template('attendance.html', 
+                                active_page='attendance', 
+                                employees=db.execute_query('SELECT id, name, department FROM employees', fetch=True), 
+                                today=today,
+                                today_records=records,
+                                page=page,
+                                today_stats=today_attendance_stats(today),
+                                **context)
+
+# Routes
+bp = Blueprint('erp', __name__)
+
+@bp.route('/')
+def dashboard():
+    # Get statistics
+    today = date.today().isoformat()
+    
+    counters = db.read_stats(day=today)
+    
+    # Calculate storage used (rough estimate)
+    storage_used = os.path.getsize(db.db_name) // 1024 if os.path.exists(db.db_name) else 0
+    
+    stats = {
+        'total_employees': int(counters['employees']),
+        'today_attendance': counters['attendance_on_day'],
+        'total_invoices': int(counters['invoices']),
+        'active_deliveries': int(counters['active_deliveries']),
+        'storage_used': storage_used
+    }
+    
+    return render_template('dashboard.html', active_page='dashboard', stats=stats)
+
+@bp.route('/attendance')
+def attendance():
+    return render_attendance(date.today().isoformat())
+
+@bp.route('/attendance/checkin', methods=['POST'])
+def attendance_checkin():
+    employee_id = request.form.get('employee_id')
+    work_location = request.form.get('work_location')
+    today = date.today().isoformat()
+    now = datetime.now().isoformat(sep=' ', timespec='seconds')
+    
+    # Look up the name and insert in one statement; the unique (employee_id, date)
+    # index turns a second check-in for the day into a no-op, even under races
+    with db.connection() as conn:
+        inserted = conn.execute('''
+            INSERT INTO attendance (employee_id, employee_name, check_in, work_location, date)
+            SELECT id, name, ?, ?, ? FROM employees WHERE id = ?
+            ON CONFLICT (employee_id, date) DO NOTHING
+        ''', (now, work_location, today, employee_id)).rowcount
+        known = inserted or conn.execute('SELECT 1 FROM employees WHERE id = ?', (employee_id,)).fetchone()
+    
+    if not known:
+        return redirect(url_for('.attendance'))
+    
+    if not inserted:
+        return render_attendance(today, message='Employee already checked in today!', message_type='error')
+    
+    return redirect(url_for('.attendance'))
+
+@bp.route('/attendance/checkout', methods=['POST'])
+def attendance_checkout():
+    record_id = request.form.get('record_id')
+    now = datetime.now().isoformat(sep=' ', timespec='seconds')
+    
+    # Hours come from full timestamps in SQL, so shifts past midnight stay positive
+    db.execute_query(CHECK_OUT_SQL, {'now': now, 'id': record_id})
+    
+    return redirect(url_for('.attendance'))
+
+# Largest crew accepted by one /attendance/batch request
+MAX_ATTENDANCE_BATCH = 1000
+WORK_LOCATIONS = ('office', 'warehouse', 'field')
+
+def _batch_entries(payload):
+    """Validate a batch body; returns (action, [(employee_id or None, work_location)]) or raises ValueError"""
+    if not isinstance(payload, dict):
+        raise ValueError('Expected a JSON object')
+    action = payload.get('action')
+    if action not in ('checkin', 'checkout'):
+        raise ValueError("action must be 'checkin' or 'checkout'")
+    entries = payload.get('entries')
+    if not isinstance(entries, list) or not entries:
+        raise ValueError('entries must be a non-empty list')
+    if len(entries) > MAX_ATTENDANCE_BATCH:
+        raise ValueError(f'At most {MAX_ATTENDANCE_BATCH} entries per batch')
+    
+    default_location = payload.get('work_location', 'office')
+    parsed = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            entry = {'employee_id': entry}
+        try:
+            employee_id = int(entry.get('employee_id'))
+        except (TypeError, ValueError):
+            employee_id = None
+        parsed.append((employee_id, entry.get('work_location', default_location)))
+    return action, parsed
+
+def batch_check_in(conn, entries, today, now):
+    """Check in every entry in one transaction; returns one result dict per entry"""
+    ids = json.dumps(sorted({employee_id for employee_id, _ in entries if employee_id is not None}))
+    names = dict(conn.execute('SELECT id, name FROM employees WHERE id IN (SELECT value FROM json_each(?))',
+                              (ids,)).fetchall())
+    present = {row[0] for row in conn.execute('''
+        SELECT employee_id FROM attendance
+        WHERE date = ? AND employee_id IN (SELECT value FROM json_each(?))
+    ''', (today, ids))}
+    
+    results, rows, seen = [], [], set()
+    for employee_id, work_location in entries:
+        if employee_id is None:
+            status = 'invalid_employee_id'
+        elif employee_id not in names:
+            status = 'unknown_employee'
+        elif work_location not in WORK_LOCATIONS:
+            status = 'invalid_work_location'
+        elif employee_id in present:
+            status = 'already_checked_in'
+        elif employee_id in seen:
+            status = 'duplicate_in_batch'
+        else:
+            status = 'checked_in'
+            seen.add(employee_id)
+            rows.append((employee_id, names[employee_id], now, work_location, today))
+        results.append({'employee_id': employee_id, 'status': status})
+    
+    conn.executemany('''
+        INSERT INTO attendance (employee_id, employee_name, check_in, work_location, date)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (employee_id, date) DO NOTHING
+    ''', rows)
+    record_ids = dict(conn.execute('''
+        SELECT employee_id, id FROM attendance
+        WHERE date = ? AND employee_id IN (SELECT value FROM json_each(?))
+    ''', (today, json.dumps(sorted(seen)))).fetchall())
+    for result in results:
+        if result['status'] == 'checked_in':
+            result['record_id'] = record_ids[result['employee_id']]
+    return results
+
+def batch_check_out(conn, entries, today, now):
+    """Close each entry's latest attendance record in one transaction.
+    
+    Yesterday's records are included so a night shift can check out after midnight;
+    a shift closed yesterday leaves the employee not checked in today.
+    """
+    ids = json.dumps(sorted({employee_id for employee_id, _ in entries if employee_id is not None}))
+    known = {row[0] for row in conn.execute('SELECT id FROM employees WHERE id IN (SELECT value FROM json_each(?))',
+                                            (ids,))}
+    yesterday = date.fromordinal(date.fromisoformat(today).toordinal() - 1).isoformat()
+    # Ascending, so each employee ends up mapped to their latest record
+    records = {row[0]: row[1:] for row in conn.execute('''
+        SELECT employee_id, id, check_out, date FROM attendance
+        WHERE date >= ? AND employee_id IN (SELECT value FROM json_each(?))
+        ORDER BY date
+    ''', (yesterday, ids))}
+    
+    results, rows, seen = [], [], set()
+    for employee_id, _ in entries:
+        record = records.get(employee_id)
+        result = {'employee_id': employee_id}
+        if employee_id is None:
+            result['status'] = 'invalid_employee_id'
+        elif employee_id not in known:
+            result['status'] = 'unknown_employee'
+        elif record is None or (record[1] and record[2] != today):
+            result['status'] = 'not_checked_in'
+        elif employee_id in seen:
+            result['status'] = 'duplicate_in_batch'
+        elif record[1]:
+            result['status'] = 'already_checked_out'
+        else:
+            seen.add(employee_id)
+            rows.append({'now': now, 'id': record[0]})
+            result.update(status='checked_out', record_id=record[0])
+        results.append(result)
+    
+    conn.executemany(CHECK_OUT_SQL, rows)
+    hours = dict(conn.execute('SELECT id, total_hours FROM attendance WHERE id IN (SELECT value FROM json_each(?))',
+                              (json.dumps([row['id'] for row in rows]),)))
+    for result in results:
+        if result['status'] == 'checked_out':
+            result['total_hours'] = hours[result['record_id']]
+    return results
+
+@bp.route('/attendance/batch', methods=['POST'])
+def attendance_batch():
+    """Check a whole crew in or out: {"action": "checkin", "entries": [{"employee_id": 1}, ...]}"""
+    try:
+        action, entries = _batch_entries(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    today = date.today().isoformat()
+    now = datetime.now().isoformat(sep=' ', timespec='seconds')
+    with db.connection() as conn:
+        # Take the write lock first so no other check-in lands between the duplicate check and the insert
+        conn.execute('BEGIN IMMEDIATE')
+        if action == 'checkin':
+            results = batch_check_in(conn, entries, today, now)
+        else:
+            results = batch_check_out(conn, entries, today, now)
+    
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return jsonify({'action': action, 'date': today, 'time': now, 'summary': summary, 'results': results})
+
+@bp.route('/invoices')
+def invoices():
+    page = db.fetch_page('invoices', ('date', 'id'), **page_args())
+    clients = db.execute_query('SELECT * FROM clients', fetch=True)
+    
+    return render_template('invoices.html', 
+                                active_page='invoices', 
+                                invoices=page['rows'],
+                                page=page,
+                                clients=clients)
+
+@bp.route('/invoices/create', methods=['POST'])
+def create_invoice():
+    client_id = request.form.get('client_id')
+    invoice_number = request.form.get('invoice_number')
+    descriptions = request.form.getlist('description[]')
+    quantities = request.form.getlist('quantity[]')
+    unit_prices = request.form.getlist('unit_price[]')
+    tax_percent = float(request.form.get('tax_percent', 0))
+    discount_percent = float(request.form.get('discount_percent', 0))
+    
+    # Get client name
+    client = db.execute_query('SELECT name FROM clients WHERE id = ?', (client_id,), fetch=True)
+    if not client:
+        return redirect(url_for('.invoices'))
+    
+    client_name = client[0][0]
+    
+    # Build items
+    items = []
+    subtotal = 0
+    for i in range(len(descriptions)):
+        quantity = float(quantities[i])
+        unit_price = float(unit_prices[i])
+        total = quantity * unit_price
+        subtotal += total
+        
+        items.append({
+            'description': descriptions[i],
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'total': total
+        })
+    
+    # Calculate totals
+    tax = subtotal * (tax_percent / 100)
+    discount = subtotal * (discount_percent / 100)
+    total = subtotal + tax - discount
+    
+    # Save invoice and its line items in one transaction
+    with db.connection() as conn:
+        cursor = conn.execute('''
+            INSERT INTO invoices (invoice_number, client_id, client_name, date, subtotal, tax, discount, total)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (invoice_number, client_id, client_name, date.today().isoformat(), 
+              subtotal, tax, discount, total))
+        conn.executemany('''
+            INSERT INTO invoice_items (invoice_id, line_no, description, quantity, unit_price, total)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(cursor.lastrowid, line_no, item['description'], item['quantity'], item['unit_price'], item['total'])
+              for line_no, item in enumerate(items, 1)])
+    
+    return redirect(url_for('.invoices'))
+
+PDF_WAIT_SECONDS = 30
+
+INVOICE_COLUMNS = ('id', 'invoice_number', 'client_id', 'client_name', 'date', 'subtotal', 'tax', 'discount', 'total', 'status')
+
+def iter_invoices(where, params=()):
+    """Invoice dicts with their line items and client layout, read with a single join"""
+    query = f'''
+        SELECT {', '.join('i.' + column for column in INVOICE_COLUMNS)}, c.invoice_layout,
+               it.description, it.quantity, it.unit_price, it.total
+        FROM invoices i
+        LEFT JOIN clients c ON c.id = i.client_id
+        LEFT JOIN invoice_items it ON it.invoice_id = i.id
+        WHERE {where}
+        ORDER BY i.date, i.id, it.line_no
+    '''
+    width = len(INVOICE_COLUMNS) + 1
+    # A pooled read: callers take one invoice or a list, never a stream held open by a client
+    for _, rows in itertools.groupby(db.execute_query(query, params, fetch=True), key=lambda row: row[0]):
+        rows = list(rows)
+        invoice = dict(zip(INVOICE_COLUMNS, rows[0]))
+        invoice['layout'] = rows[0][width - 1] or DEFAULT_INVOICE_LAYOUT
+        invoice['items'] = [
+            {'description': row[width], 'quantity': row[width + 1], 'unit_price': row[width + 2], 'total': row[width + 3]}
+            for row in rows if row[width] is not None
+        ]
+        yield invoice
+
+def send_pdf(f, download_name):
+    """Send an open PDF file as a download; the response closes it"""
+    response = send_file(f, mimetype='application/pdf', as_attachment=True, download_name=download_name)
+    response.content_length = os.fstat(f.fileno()).st_size
+    return response
+
+def load_invoice_data(invoice_id):
+    return next(iter_invoices('i.id = ?', (invoice_id,)), None)
+
+@bp.route('/invoices/download/<int:invoice_id>')
+def download_invoice(invoice_id):
+    invoice_data = load_invoice_data(invoice_id)
+    if not invoice_data:
+        return "Invoice not found", 404
+    
+    download_name = f"Invoice_{invoice_data['invoice_number']}.pdf"
+    key = pdf_cache.key(invoice_data)
+    cached = pdf_cache.open(invoice_id, key)
+    if cached:
+        return send_pdf(cached, download_name)
+    
+    with pdf_cache.lock(key):
+        # Another request may have rendered it while we waited for the lock
+        cached = pdf_cache.open(invoice_id, key)
+        if not cached:
+            # Render in the PDF worker pool; this thread only waits, so other requests keep flowing
+            try:
+                job_id = pdf_jobs.submit(invoice_data)
+            except PdfQueueFull:
+                return "PDF renderer is busy, please retry shortly", 503, {'Retry-After': '5'}
+            
+            job = pdf_jobs.wait(job_id, timeout=PDF_WAIT_SECONDS)
+            if job['status'] == 'failed':
+                return f"Could not generate invoice PDF: {job['error']}", 500
+            if job['status'] != 'done':
+                return redirect(url_for('.pdf_job_status', job_id=job_id))
+            pdf_cache.put(invoice_id, key, pdf_jobs.result_path(job_id))
+            # Send the job's own file, since the cache entry may already be evicted; taking it
+            # deletes the job's link, so the cache holds the only copy and eviction frees its space
+            cached = pdf_jobs.take(job_id)
+    
+    return send_pdf(cached, download_name)
+
+@bp.route('/invoices/<int:invoice_id>/pdf', methods=['POST'])
+def submit_pdf_job(invoice_id):
+    invoice_data = load_invoice_data(invoice_id)
+    if not invoice_data:
+        return jsonify({'error': 'Invoice not found'}), 404
+    
+    try:
+        job_id = pdf_jobs.submit(invoice_data)
+    except PdfQueueFull as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+    
+    return jsonify({**pdf_jobs.status(job_id),
+                    'status_url': url_for('.pdf_job_status', job_id=job_id),
+                    'file_url': url_for('.pdf_job_file', job_id=job_id)}), 202
+
+@bp.route('/pdf-jobs/<job_id>')
+def pdf_job_status(job_id):
+    job = pdf_jobs.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
+@bp.route('/pdf-jobs/<job_id>/file')
+def pdf_job_file(job_id):
+    job = pdf_jobs.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job['status'] != 'done':
+        return jsonify(job), 409
+    # A job's file is served once and then deleted
+    f = pdf_jobs.take(job_id)
+    if f is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return send_pdf(f, job['download_name'])
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only stream that collects bytes until drained; lets zipfile stream its output"""
+    def __init__(self):
+        self.chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def select_batch_invoices(start_date, end_date, client_id=None):
+    where = 'i.date BETWEEN ? AND ?'
+    params = [start_date, end_date]
+    if client_id:
+        where += ' AND i.client_id = ?'
+        params.append(client_id)
+    return list(iter_invoices(where, params))
+
+def iter_invoice_zip(invoices, report):
+    """Stream a ZIP of invoice PDFs rendered across the worker pool.
+    
+    `report` receives one (invoice number, seconds, bytes) row per invoice as it
+    is archived; a render_report.csv with the same rows closes the archive.
+    """
+    sink = _ChunkSink()
+    t0 = time.perf_counter()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for invoice_number, pdf, seconds in pdf_jobs.render_batch(invoices):
+            archive.writestr(f'Invoice_{invoice_number}.pdf', pdf)
+            report.append((invoice_number, seconds, len(pdf)))
+            yield sink.drain()
+        elapsed = time.perf_counter() - t0
+        
+        summary = io.StringIO()
+        writer = csv.writer(summary)
+        writer.writerow(['Invoice Number', 'Render Seconds', 'Bytes'])
+        writer.writerows((number, f'{seconds:.3f}', size) for number, seconds, size in report)
+        writer.writerow([])
+        writer.writerow(['Invoices', 'Wall Seconds', 'Invoices/sec'])
+        writer.writerow([len(report), f'{elapsed:.3f}', f'{len(report) / elapsed:.1f}' if elapsed else '0'])
+        archive.writestr('render_report.csv', summary.getvalue())
+    yield sink.drain()
+
+@bp.route('/invoices/batch')
+def batch_invoices():
+    start_date = request.args.get('start', (date.today().replace(day=1)).isoformat())
+    end_date = request.args.get('end', date.today().isoformat())
+    client_id = request.args.get('client')
+    invoices = select_batch_invoices(start_date, end_date, client_id)
+    if not invoices:
+        return "No invoices in this range", 404
+    
+    name = f"invoices_{start_date}_to_{end_date}{'_client_' + client_id if client_id else ''}"
+    if request.args.get('format') == 'pdf':
+        # One document can't be streamed page by page, so it renders as a PDF job like single invoices
+        try:
+            job_id = pdf_jobs.submit_merged(invoices, f'{name}.pdf')
+        except PdfQueueFull:
+            return "PDF renderer is busy, please retry shortly", 503, {'Retry-After': '5'}
+        job = pdf_jobs.wait(job_id, timeout=PDF_WAIT_SECONDS)
+        if job['status'] == 'failed':
+            return f"Could not generate invoices PDF: {job['error']}", 500
+        if job['status'] != 'done':
+            return redirect(url_for('.pdf_job_status', job_id=job_id))
+        response = send_pdf(pdf_jobs.take(job_id), f'{name}.pdf')
+        response.headers['X-Render-Seconds'] = f"{job['finished'] - job['submitted']:.3f}"
+        return response
+    
+    return current_app.response_class(
+        stream_with_context(iter_invoice_zip(invoices, [])),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename={name}.zip'}
+    )
+
+def batch_invoices_command(argv):
+    """CLI: render every invoice in a date range into one ZIP or merged PDF"""
+    parser = argparse.ArgumentParser(prog='ERP-Bolt.py batch-invoices')
+    parser.add_argument('--start', default=date.today().replace(day=1).isoformat())
+    parser.add_argument('--end', default=date.today().isoformat())
+    parser.add_argument('--client', help='client id')
+    parser.add_argument('--format', choices=('zip', 'pdf'), default='zip')
+    parser.add_argument('--output', help='output file (default invoices_<start>_to_<end>.<format>)')
+    args = parser.parse_args(argv)
+    
+    invoices = select_batch_invoices(args.start, args.end, args.client)
+    output = args.output or f'invoices_{args.start}_to_{args.end}.{args.format}'
+    if not invoices:
+        print("No invoices in this range")
+        return 1
+    
+    t0 = time.perf_counter()
+    report = []
+    if args.format == 'pdf':
+        job = pdf_jobs.wait(pdf_jobs.submit_merged(invoices, os.path.basename(output)))
+        if job['status'] != 'done':
+            print(f"❌ Could not generate {output}: {job['error']}")
+            return 1
+        shutil.move(pdf_jobs.result_path(job['id']), output)
+    else:
+        with open(output, 'wb') as f:
+            for chunk in iter_invoice_zip(invoices, report):
+                f.write(chunk)
+    elapsed = time.perf_counter() - t0
+    
+    for number, seconds, size in report:
+        print(f"  {number:<20}{seconds * 1000:>9.1f} ms{size / 1024:>9.1f} KB")
+    print(f"📦 {len(invoices)} invoices -> {output} in {elapsed:.2f}s ({len(invoices) / elapsed:.1f} invoices/s)")
+    return 0
+
+def set_layout_command(argv):
+    """CLI: choose the invoice layout a client's PDFs are rendered with"""
+    parser = argparse.ArgumentParser(prog='ERP-Bolt.py set-layout')
+    parser.add_argument('client_id', type=int)
+    parser.add_argument('layout', choices=sorted(INVOICE_LAYOUTS))
+    args = parser.parse_args(argv)
+    
+    with db.connection() as conn:
+        updated = conn.execute('UPDATE clients SET invoice_layout = ? WHERE id = ?', (args.layout, args.client_id)).rowcount
+    if not updated:
+        print(f"No client with id {args.client_id}")
+        return 1
+    # Cached PDFs are keyed on the invoice data, which now carries the new layout
+    print(f"🎨 Client {args.client_id} invoices now use the '{args.layout}' layout")
+    return 0
+
+@bp.route('/invoices/delete/<int:invoice_id>', methods=['POST'])
+def delete_invoice(invoice_id):
+    # foreign_keys stays off, so the line items go with their invoice explicitly, in the same transaction
+    with db.connection() as conn:
+        conn.execute('DELETE FROM invoice_items WHERE invoice_id = ?', (invoice_id,))
+        conn.execute('DELETE FROM invoices WHERE id = ?', (invoice_id,))
+    pdf_cache.invalidate(invoice_id)
+    return redirect(url_for('.invoices'))
+
+@bp.route('/invoices/update_status/<int:invoice_id>', methods=['POST'])
+def update_invoice_status(invoice_id):
+    status = request.form.get('status')
+    db.execute_query('UPDATE invoices SET status = ? WHERE id = ?', (status, invoice_id))
+    pdf_cache.invalidate(invoice_id)
+    return redirect(url_for('.invoices'))
+
+@bp.route('/deliveries')
+def deliveries():
+    page = db.fetch_page('deliveries', ('delivery_date', 'delivery_time', 'id'), **page_args())
+    
+    # Calculate stats across all deliveries, not just the visible page
+    by_status = dict(db.execute_query('SELECT status, COUNT(*) FROM deliveries GROUP BY status', fetch=True))
+    total = sum(by_status.values())
+    pending = by_status.get('pending', 0)
+    in_transit = by_status.get('in-transit', 0)
+    delivered = by_status.get('delivered', 0)
+    
+    stats = {
+        'total': total,
+        'pending': pending,
+        'in_transit': in_transit,
+        'delivered': delivered
+    }
+    
+    return render_template('deliveries.html', 
+                                active_page='deliveries', 
+                                deliveries=page['rows'],
+                                page=page,
+                                stats=stats,
+                                today=date.today().isoformat())
+
+@bp.route('/deliveries/create', methods=['POST'])
+def create_delivery():
+    vehicle_number = request.form.get('vehicle_number')
+    driver_name = request.form.get('driver_name')
+    delivery_date = request.form.get('delivery_date')
+    delivery_time = request.form.get('delivery_time')
+    destination = request.form.get('destination')
+    load_details = request.form.get('load_details')
+    status = request.form.get('status')
+    
+    db.execute_query('''
+        INSERT INTO deliveries (vehicle_number, driver_name, delivery_date, delivery_time, destination, load_details, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (vehicle_number, driver_name, delivery_date, delivery_time, destination, load_details, status))
     
+    return redirect(url_for('.deliveries'))
+
+@bp.route('/deliveries/update_status/<int:delivery_id>', methods=['POST'])
+def update_delivery_status(delivery_id):
+    status = request.form.get('status')
+    db.execute_query('UPDATE deliveries SET status = ? WHERE id = ?', (status, delivery_id))
+    return redirect(url_for('.deliveries'))
+
+@bp.route('/deliveries/delete/<int:delivery_id>', methods=['POST'])
+def delete_delivery(delivery_id):
+    db.execute_query('DELETE FROM deliveries WHERE id = ?', (delivery_id,))
+    return redirect(url_for('.deliveries'))
+
+@bp.route('/downloads')
+def downloads():
     # Get date range from query params
     start_date = request.args.get('start_date', (date.today().replace(day=1)).isoformat())
     end_date = request.args.get('end_date', date.today().isoformat())
     
     # Calculate stats
-    attendance_records = db.execute_query('SELECT COUNT(*) FROM attendance', fetch=True)[0][0]
-    total_invoices = db.execute_query('SELECT COUNT(*) FROM invoices', fetch=True)[0][0]
-    total_deliveries = db.execute_query('SELECT COUNT(*) FROM deliveries', fetch=True)[0][0]
-    total_invoice_value = db.execute_query('SELECT COALESCE(SUM(total), 0) FROM invoices', fetch=True)[0][0]
+    counters = db.read_stats()
     
     stats = {
-        'attendance_records': attendance_records,
-        'total_invoices': total_invoices,
-        'total_deliveries': total_deliveries,
-        'total_invoice_value': f"{total_invoice_value:,.0f}"
+        'attendance_records': int(counters['attendance']),
+        'total_invoices': int(counters['invoices']),
+        'total_deliveries': int(counters['deliveries']),
+        'total_invoice_value': f"{counters['invoice_value']:,.0f}"
     }
     
-    return render_template_string(DOWNLOADS_TEMPLATE, 
+    return render_template('downloads.html', 
                                 active_page='downloads',
                                 start_date=start_date,
                                 end_date=end_date,
                                 stats=stats)
 
-@app.route('/downloads/attendance')
+CSV_CHUNK_SIZE = 64 * 1024
+
+def stream_csv(header, rows, chunk_size=CSV_CHUNK_SIZE):
+    """Encode rows as CSV, yielding roughly chunk_size characters at a time"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if output.tell() >= chunk_size:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
+
+def csv_response(filename, header, rows):
+    """Streaming CSV attachment; rows are pulled from the database as the client reads"""
+    return current_app.response_class(
+        stream_with_context(stream_csv(header, rows)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@bp.route('/downloads/attendance')
 def download_attendance():
     report_type = request.args.get('type', 'daily')
     
     if report_type == 'daily':
         report_date = request.args.get('date', date.today().isoformat())
-        records = db.execute_query('SELECT * FROM attendance WHERE date = ?', (report_date,), fetch=True)
+        records = db.iter_query('SELECT * FROM attendance WHERE date = ?', (report_date,))
         filename = f'attendance_daily_{report_date}.csv'
     else:
         start_date = request.args.get('start', (date.today().replace(day=1)).isoformat())
         end_date = request.args.get('end', date.today().isoformat())
-        records = db.execute_query('SELECT * FROM attendance WHERE date BETWEEN ? AND ?', (start_date, end_date), fetch=True)
+        records = db.iter_query('SELECT * FROM attendance WHERE date BETWEEN ? AND ?', (start_date, end_date))
         filename = f'attendance_monthly_{start_date}_to_{end_date}.csv'
     
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Employee Name', 'Date', 'Check In', 'Check Out', 'Location', 'Total Hours'])
+    rows = ([
+        record[2],  # employee_name
+        record[6],  # date
+        record[3],  # check_in
+        record[4] or 'Not checked out',  # check_out
+        record[5],  # work_location
+        record[7] or '0'  # total_hours
+    ] for record in records)
     
-    for record in records:
-        writer.writerow([
-            record[2],  # employee_name
-            record[6],  # date
-            record[3],  # check_in
-            record[4] or 'Not checked out',  # check_out
-            record[5],  # work_location
-            record[7] or '0'  # total_hours
-        ])
-    
-    # Create response
-    output.seek(0)
-    return app.response_class(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': f'attachment; filename={filename}'}
-    )
+    return csv_response(filename, ['Employee Name', 'Date', 'Check In', 'Check Out', 'Location', 'Total Hours'], rows)
+
+@bp.route('/downloads/payroll')
+def download_payroll():
+    period = request.args.get('period', 'week')
+    if period not in PAYROLL_PERIODS:
+        period = 'week'
+    start_date = request.args.get('start', (date.today().replace(day=1)).isoformat())
+    end_date = request.args.get('end', date.today().isoformat())
+    
+    records = db.iter_query(PAYROLL_QUERY.format(period=PAYROLL_PERIODS[period]), (start_date, end_date))
+    filename = f'payroll_{period}_{start_date}_to_{end_date}.csv'
+    return csv_response(filename, ['Employee ID', 'Employee Name', 'Period', 'Shifts', 'Total Hours'], records)
 
-@app.route('/downloads/invoices')
+@bp.route('/downloads/invoices')
 def download_invoices():
     start_date = request.args.get('start', (date.today().replace(day=1)).isoformat())
     end_date = request.args.get('end', date.today().isoformat())
@@ -1169,72 +2777,435 @@ def download_invoices():
     else:
         filename = f'invoices_all_{start_date}_to_{end_date}.csv'
     
-    records = db.execute_query(query, params, fetch=True)
-    
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Invoice Number', 'Client', 'Date', 'Subtotal', 'Tax', 'Discount', 'Total', 'Status'])
+    rows = ([
+        record[1],  # invoice_number
+        record[3],  # client_name
+        record[4],  # date
+        f"{record[5]:.2f}",  # subtotal
+        f"{record[6]:.2f}",  # tax
+        f"{record[7]:.2f}",  # discount
+        f"{record[8]:.2f}",  # total
+        record[9]  # status
+    ] for record in db.iter_query(query, params))
     
-    for record in records:
-        writer.writerow([
-            record[1],  # invoice_number
-            record[3],  # client_name
-            record[4],  # date
-            f"{record[6]:.2f}",  # subtotal
-            f"{record[7]:.2f}",  # tax
-            f"{record[8]:.2f}",  # discount
-            f"{record[9]:.2f}",  # total
-            record[10]  # status
-        ])
-    
-    output.seek(0)
-    return app.response_class(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': f'attachment; filename={filename}'}
-    )
+    return csv_response(filename, ['Invoice Number', 'Client', 'Date', 'Subtotal', 'Tax', 'Discount', 'Total', 'Status'], rows)
 
-@app.route('/downloads/deliveries')
+@bp.route('/downloads/deliveries')
 def download_deliveries():
     report_type = request.args.get('type', 'daily')
     
     if report_type == 'daily':
         report_date = request.args.get('date', date.today().isoformat())
-        records = db.execute_query('SELECT * FROM deliveries WHERE delivery_date = ?', (report_date,), fetch=True)
+        records = db.iter_query('SELECT * FROM deliveries WHERE delivery_date = ?', (report_date,))
         filename = f'deliveries_daily_{report_date}.csv'
     else:
         start_date = request.args.get('start', (date.today().replace(day=1)).isoformat())
         end_date = request.args.get('end', date.today().isoformat())
-        records = db.execute_query('SELECT * FROM deliveries WHERE delivery_date BETWEEN ? AND ?', (start_date, end_date), fetch=True)
+        records = db.iter_query('SELECT * FROM deliveries WHERE delivery_date BETWEEN ? AND ?', (start_date, end_date))
         filename = f'deliveries_monthly_{start_date}_to_{end_date}.csv'
     
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Vehicle Number', 'Driver Name', 'Date', 'Time', 'Destination', 'Load Details', 'Status'])
+    rows = ([
+        record[1],  # vehicle_number
+        record[2],  # driver_name
+        record[3],  # delivery_date
+        record[4],  # delivery_time
+        record[5],  # destination
+        record[6] or '',  # load_details
+        record[7]  # status
+    ] for record in records)
     
+    return csv_response(filename, ['Vehicle Number', 'Driver Name', 'Date', 'Time', 'Destination', 'Load Details', 'Status'], rows)
+
+# Bulk import of CLI records and Bolt CSV exports
+IMPORT_CHUNK_SIZE = 5000
+CLI_ATTENDANCE_FILE = re.compile(r'attendance_(\d{4}-\d{2}-\d{2})\.csv$')
+
+def _import_timestamp(day, value):
+    """'YYYY-MM-DD HH:MM:SS' from a bare HH:MM[:SS] on `day` or an existing timestamp; None when absent"""
+    value = value.strip()
+    if not value or value == 'Not checked out':
+        return None
+    stamp = datetime.fromisoformat(value if len(value) > 8 else f'{day} {value}')
+    return stamp.isoformat(sep=' ', timespec='seconds')
+
+def _attendance_record(employee_name, day, entry, exit_, location):
+    day = date.fromisoformat(day.strip()).isoformat()
+    check_in = _import_timestamp(day, entry)
+    if not employee_name.strip() or check_in is None:
+        raise ValueError('employee and check-in time are required')
+    check_out = _import_timestamp(day, exit_)
+    if check_out is not None and check_out < check_in:
+        # An exit before the entry was an overnight shift
+        check_out = (datetime.fromisoformat(check_out) + timedelta(days=1)).isoformat(sep=' ', timespec='seconds')
+    return {'employee_name': employee_name.strip(), 'date': day, 'check_in': check_in, 'check_out': check_out,
+            'work_location': (location.strip() or 'unknown').lower()}
+
+def _cli_attendance(row, path):
+    # Employee, Location, Entry Time, Exit Time; the day comes from the file name
+    match = CLI_ATTENDANCE_FILE.search(os.path.basename(path))
+    if not match:
+        raise ValueError('file name does not carry the attendance date')
+    return _attendance_record(row[0], match.group(1), row[2], row[3], row[1])
+
+def _bolt_attendance(row, path):
+    # Employee Name, Date, Check In, Check Out, Location, Total Hours (recomputed on insert)
+    return _attendance_record(row[0], row[1], row[2], row[3], row[4])
+
+def _cli_delivery(row, path):
+    # Date (DD-MMM-YYYY or ISO, as the CLI log accepts), Client, Vehicle No, Quantity; historical CLI deliveries were completed
+    day = date_key(row[0])
+    if not day:
+        raise ValueError(f'unrecognised delivery date {row[0].strip()!r}')
+    delivery_date = date.fromordinal(day).isoformat()
+    if not row[2].strip():
+        raise ValueError('vehicle number is required')
+    return (row[2].strip(), '', delivery_date, '', row[1].strip(), row[3].strip(), 'delivered')
+
+def _bolt_delivery(row, path):
+    # Vehicle Number, Driver Name, Date, Time, Destination, Load Details, Status
+    if not row[0].strip():
+        raise ValueError('vehicle number is required')
+    return (row[0].strip(), row[1].strip(), date.fromisoformat(row[2].strip()).isoformat(), row[3].strip(),
+            row[4].strip(), row[5].strip(), row[6].strip() or 'pending')
+
+# CSV header -> (target table, row parser, append-only). Only an append-only file (the CLI's
+# deliveries.csv) resumes after the rows already read once it grows; the CLI rewrites attendance
+# day files in place and Bolt exports are written afresh, so those are re-read whenever they change.
+IMPORT_FORMATS = {
+    ('Employee', 'Location', 'Entry Time', 'Exit Time'): ('attendance', _cli_attendance, False),
+    ('Employee Name', 'Date', 'Check In', 'Check Out', 'Location', 'Total Hours'): ('attendance', _bolt_attendance, False),
+    ('Date', 'Client', 'Vehicle No', 'Quantity'): ('deliveries', _cli_delivery, True),
+    ('Vehicle Number', 'Driver Name', 'Date', 'Time', 'Destination', 'Load Details', 'Status'): ('deliveries', _bolt_delivery, False),
+}
+
+def _insert_attendance(conn, records):
+    """Insert parsed attendance, creating unknown employees; returns rows inserted or checked out"""
+    employee_ids = dict(conn.execute('SELECT name, MIN(id) FROM employees GROUP BY name'))
     for record in records:
-        writer.writerow([
-            record[1],  # vehicle_number
-            record[2],  # driver_name
-            record[3],  # delivery_date
-            record[4],  # delivery_time
-            record[5],  # destination
-            record[6] or '',  # load_details
-            record[7]  # status
-        ])
-    
-    output.seek(0)
-    return app.response_class(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': f'attachment; filename={filename}'}
-    )
+        name = record['employee_name']
+        if name not in employee_ids:
+            employee_ids[name] = conn.execute("INSERT INTO employees (name, department, email) VALUES (?, 'Imported', '')",
+                                              (name,)).lastrowid
+        record['employee_id'] = employee_ids[name]
+    # Hours come from the timestamps in SQL. A day already on file is kept, except that a
+    # re-read file can close its open shift: the CLI rewrites the row when the employee leaves.
+    return conn.executemany('''
+        INSERT INTO attendance (employee_id, employee_name, check_in, check_out, work_location, date, total_hours)
+        VALUES (:employee_id, :employee_name, :check_in, :check_out, :work_location, :date,
+                ROUND((julianday(:check_out) - julianday(:check_in)) * 24, 2))
+        ON CONFLICT (employee_id, date) DO UPDATE SET
+            check_out = excluded.check_out,
+            total_hours = ROUND((julianday(excluded.check_out) - julianday(attendance.check_in)) * 24, 2)
+        WHERE attendance.check_out IS NULL AND excluded.check_out IS NOT NULL
+    ''', records).rowcount
+
+def _insert_deliveries(conn, records):
+    return conn.executemany('''
+        INSERT INTO deliveries (vehicle_number, driver_name, delivery_date, delivery_time, destination, load_details, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', records).rowcount
+
+IMPORT_WRITERS = {'attendance': _insert_attendance, 'deliveries': _insert_deliveries}
+
+def iter_import_rows(path, skip=0):
+    """Stream (line number, rows read, row) from a CSV after its header, skipping the first `skip` rows.
+    
+    Rows read counts every CSV row after the header, blank ones included, so it is
+    the unit `skip` takes when an import resumes.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for read, row in enumerate(itertools.islice(reader, skip, None), start=skip + 1):
+            if any(cell.strip() for cell in row):
+                yield reader.line_num, read, row
+
+def import_csv(path, chunk_size=IMPORT_CHUNK_SIZE, max_errors=10):
+    """Import one CSV in chunked transactions, resuming after the last committed chunk.
+    
+    Progress is recorded in import_progress in the same transaction as the rows, so an
+    interrupted import neither loses nor repeats a chunk. Returns per-file counts.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = tuple(cell.strip() for cell in next(csv.reader(f), ()))
+    if header not in IMPORT_FORMATS:
+        raise ValueError(f'unrecognised CSV header {list(header)}')
+    table, parse, append_only = IMPORT_FORMATS[header]
+    write = IMPORT_WRITERS[table]
+    
+    stat = os.stat(path)
+    path_key = os.path.abspath(path)
+    with db.connection() as conn:
+        progress = conn.execute('SELECT size, mtime, rows, completed FROM import_progress WHERE path = ?',
+                                (path_key,)).fetchone()
+    skip = 0
+    if progress:
+        size, mtime, rows, completed = progress
+        if completed and (size, mtime) == (stat.st_size, stat.st_mtime):
+            return {'table': table, 'read': 0, 'inserted': 0, 'skipped': rows, 'rejected': 0, 'errors': []}
+        # Resume an interrupted import of an unchanged file, or an append-only log that grew;
+        # any other change may have rewritten rows already read, so the file is read again
+        unchanged = (size, mtime) == (stat.st_size, stat.st_mtime)
+        skip = rows if unchanged or (append_only and stat.st_size >= size) else 0
+    
+    result = {'table': table, 'read': 0, 'inserted': 0, 'skipped': skip, 'rejected': 0, 'errors': []}
+    done = skip
+    rows = iter_import_rows(path, skip)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        records = []
+        for line, _, row in chunk:
+            try:
+                records.append(parse(row, path))
+            except (ValueError, IndexError) as exc:
+                result['rejected'] += 1
+                if len(result['errors']) < max_errors:
+                    result['errors'].append(f'line {line}: {exc}')
+        if chunk:
+            done = chunk[-1][1]
+        with db.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if records:
+                result['inserted'] += write(conn, records)
+            conn.execute('''
+                INSERT INTO import_progress (path, size, mtime, rows, completed, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, rows = excluded.rows,
+                                                 completed = excluded.completed, updated_at = excluded.updated_at
+            ''', (path_key, stat.st_size, stat.st_mtime, done, not chunk, datetime.now().isoformat(timespec='seconds')))
+        result['read'] += len(chunk)
+        if not chunk:
+            return result
+
+def import_command(argv):
+    """CLI: stream CLI record CSVs and Bolt CSV exports into the database"""
+    parser = argparse.ArgumentParser(prog='ERP-Bolt.py import')
+    parser.add_argument('paths', nargs='*', default=['records'],
+                        help='CSV files or directories of CSVs (default: the CLI records directory)')
+    parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='rows per transaction')
+    parser.add_argument('--restart', action='store_true', help='forget saved progress and re-read every file')
+    args = parser.parse_args(argv)
+    
+    files = []
+    for path in args.paths:
+        files.extend(sorted(glob.glob(os.path.join(path, '*.csv'))) if os.path.isdir(path) else [path])
+    if not files:
+        print("No CSV files to import")
+        return 1
+    if args.restart:
+        db.execute_query(f"DELETE FROM import_progress WHERE path IN ({', '.join('?' * len(files))})",
+                         [os.path.abspath(path) for path in files])
+    
+    totals = {'read': 0, 'inserted': 0, 'rejected': 0}
+    failed = False
+    t0 = time.perf_counter()
+    for path in files:
+        file_t0 = time.perf_counter()
+        try:
+            result = import_csv(path, chunk_size=args.chunk_size)
+        except (OSError, ValueError, UnicodeDecodeError) as exc:
+            print(f"❌ {path}: {exc}")
+            failed = True
+            continue
+        elapsed = time.perf_counter() - file_t0
+        for key in totals:
+            totals[key] += result[key]
+        failed = failed or bool(result['rejected'])
+        if not result['read'] and result['skipped']:
+            print(f"⏭️  {path}: already imported ({result['skipped']:,} rows)")
+            continue
+        duplicates = result['read'] - result['rejected'] - result['inserted']
+        resumed = f", resumed after row {result['skipped']:,}" if result['skipped'] else ''
+        print(f"📥 {path} -> {result['table']}: {result['read']:,} read, {result['inserted']:,} inserted, "
+              f"{duplicates:,} already on file, {result['rejected']:,} rejected{resumed} "
+              f"({result['read'] / elapsed if elapsed else 0:,.0f} rows/s)")
+        for error in result['errors']:
+            print(f"   ⚠️  {error}")
+    
+    elapsed = time.perf_counter() - t0
+    print(f"✅ {totals['inserted']:,} of {totals['read']:,} rows imported from {len(files)} file(s) in {elapsed:.2f}s "
+          f"({totals['read'] / elapsed if elapsed else 0:,.0f} rows/s)")
+    return 1 if failed else 0
+
+@bp.app_template_filter('clock')
+def clock(value):
+    """Time of day from a 'YYYY-MM-DD HH:MM:SS' attendance timestamp"""
+    return value[11:19] if value and len(value) > 8 else value
+
+# Request timing for /metrics
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+def _record_request(status):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe_request(request.method, route, status, time.perf_counter() - started)
+
+@bp.after_app_request
+def record_request(response):
+    _record_request(response.status_code)
+    return response
+
+@bp.teardown_app_request
+def record_failed_request(exc):
+    # Unhandled errors skip after_request handlers
+    if exc is not None:
+        _record_request(500)
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    return current_app.response_class(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def create_app(config=None, storage_profile=None):
+    """Build the web app with its own database pool, PDF job queue and PDF cache"""
+    config = load_app_config(config)
+    app = Flask(__name__)
+    app.secret_key = config['secret_key']
+    app.config['ERP'] = config
+    configure_templates(app, config['template_cache'])
+    app.register_blueprint(bp)
+    
+    database = DatabaseManager(config['db_path'], pool_size=config['db_pool_size'], storage_profile=storage_profile)
+    jobs = PdfJobQueue(config['pdf_job_dir'], workers=config['pdf_workers'] or None,
+                       max_pending=config['pdf_max_pending'])
+    app_metrics = Metrics(slow_query_ms=config['slow_query_ms'], shared_dir=config['metrics_dir'])
+    database.query_observer = app_metrics.observe_query
+    app.extensions['erp'] = {
+        'db': database,
+        'pdf_jobs': jobs,
+        'pdf_cache': PdfCache(config['pdf_cache_dir'], max_bytes=config['pdf_cache_mb'] * 1024 * 1024),
+        'metrics': app_metrics,
+    }
+    atexit.register(database.close)
+    atexit.register(jobs.shutdown)
+    return app
+
+def _serve_worker(fd, host, port, config, quiet):
+    """One server process: its own app and pools, answering requests on threads"""
+    if quiet:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    app = create_app(config)
+    compile_templates(app)
+    server = make_server(host, port, app, threaded=True, fd=fd)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        app.extensions['erp']['pdf_jobs'].shutdown()
+        app.extensions['erp']['db'].close()
+
+def serve(host='0.0.0.0', port=5000, workers=None, config=None, quiet=False):
+    """Pre-fork WSGI server: `workers` processes share one listening socket.
+    
+    Each worker builds its own app with create_app(), so connection pools and
+    PDF render pools are never shared across processes. Workers that die are
+    restarted. Without fork (Windows) a single threaded process is used.
+    """
+    config = load_app_config(config)
+    workers = workers or os.cpu_count() or 1
+    if not hasattr(os, 'fork'):
+        workers = 1
+    owns_metrics_dir = workers > 1 and not config['metrics_dir']
+    if owns_metrics_dir:
+        config['metrics_dir'] = tempfile.mkdtemp(prefix='erp-metrics-')
+    
+    # Migrate once here instead of racing in every worker's first request
+    DatabaseManager(config['db_path'], pool_size=0).init_database()
+    
+    listener = socket.create_server((host, port), backlog=1024)
+    # Non-blocking, so workers that lose the race for a connection go back to polling
+    listener.setblocking(False)
+    if workers == 1:
+        try:
+            _serve_worker(listener.fileno(), host, port, config, quiet)
+        finally:
+            listener.close()
+        return
+    
+    context = multiprocessing.get_context('fork')
+    
+    def spawn():
+        proc = context.Process(target=_serve_worker, args=(listener.fileno(), host, port, config, quiet))
+        proc.start()
+        return proc
+    
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    procs = []
+    try:
+        procs = [spawn() for _ in range(workers)]
+        while True:
+            time.sleep(1)
+            for i, proc in enumerate(procs):
+                if not proc.is_alive():
+                    print(f"⚠️  Worker {proc.pid} exited with code {proc.exitcode}; restarting", file=sys.stderr)
+                    procs[i] = spawn()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.join()
+        listener.close()
+        if owns_metrics_dir:
+            shutil.rmtree(config['metrics_dir'], ignore_errors=True)
+
+def serve_command(argv):
+    """CLI: run the multi-process, multi-threaded server"""
+    parser = argparse.ArgumentParser(prog='ERP-Bolt.py serve')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('ERP_WORKERS', 0)) or None,
+                        help='server processes (default: one per CPU)')
+    parser.add_argument('--db', help='database path (default ERP_DB_PATH or at_commodities.db)')
+    parser.add_argument('--pool-size', type=int, help='database connections per worker')
+    parser.add_argument('--quiet', action='store_true', help='no per-request access log')
+    args = parser.parse_args(argv)
+    
+    overrides = {}
+    if args.db:
+        overrides['db_path'] = args.db
+    if args.pool_size is not None:
+        overrides['db_pool_size'] = args.pool_size
+    config = load_app_config(overrides)
+    workers = args.workers or os.cpu_count() or 1
+    print(f"🚀 Serving A.T Commodities ERP on http://{args.host}:{args.port} "
+          f"({workers} worker(s), {config['db_pool_size']} connections each, database {config['db_path']})")
+    serve(args.host, args.port, workers, config, quiet=args.quiet)
+    return 0
 
 if __name__ == '__main__':
+    if sys.argv[1:2] == ['serve']:
+        sys.exit(serve_command(sys.argv[2:]))
+    
+    app = create_app()
+    with app.app_context():
+        if sys.argv[1:2] == ['batch-invoices']:
+            sys.exit(batch_invoices_command(sys.argv[2:]))
+        
+        if sys.argv[1:2] == ['import']:
+            sys.exit(import_command(sys.argv[2:]))
+        
+        if sys.argv[1:2] == ['set-layout']:
+            sys.exit(set_layout_command(sys.argv[2:]))
+        
+        if sys.argv[1:2] == ['rebuild-stats']:
+            drift = db.rebuild_stats()
+            for key, (stored, actual) in sorted(drift.items()):
+                print(f"🔧 {key}: {stored} -> {actual}")
+            print(f"Stats reconciled ({len(drift)} counter(s) corrected)")
+            sys.exit(0)
+        
+        storage = db.storage_report()
+    
+    compile_templates(app)
     print("🚀 Starting A.T Commodities ERP System...")
     print("🌐 Visit http://localhost:5000 to access the system")
     print("📊 Features: Dashboard, Attendance, Invoices, Deliveries, Downloads")
-    print("💾 Database: SQLite (at_commodities.db)")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    print(f"💾 Database: SQLite ({app.config['ERP']['db_path']})")
+    print("⚙️  Storage: " + ", ".join(f"{k}={v}" for k, v in storage.items()))
+    print("🧵 For production use 'python ERP-Bolt.py serve --workers N'")
+    app.run(debug=True, host='0.0.0.0', port=5000)
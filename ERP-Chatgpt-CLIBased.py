@@ -1,11 +1,15 @@
 import os
-import datetime
+import sys
 import csv
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from num2words import num2words
+import json
+import time
+import argparse
+import datetime
+import itertools
+from functools import lru_cache
+
+from amount_words import amount_in_words
+from record_log import RecordLog, date_key, text_key
 
 # Constants
 CLIENTS = {
@@ -25,6 +29,14 @@ LOCATIONS = ["Office", "Warehouse", "Field"]
 DATA_DIR = "records"
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# deliveries.csv is an append-only log indexed by date, client and vehicle
+DELIVERY_HEADER = ["Date", "Client", "Vehicle No", "Quantity"]
+DELIVERY_INDEX = {"date": (0, date_key), "client": (1, text_key), "vehicle": (2, text_key)}
+
+
+def open_deliveries(sync_every=1):
+    return RecordLog(os.path.join(DATA_DIR, "deliveries.csv"), DELIVERY_HEADER, DELIVERY_INDEX, sync_every=sync_every)
+
 
 def get_invoice_input():
     print("Select Client:")
@@ -41,16 +53,68 @@ def get_invoice_input():
     return customer, company, invoice_no, delivery_date, vehicle_no, quantity, unit_price
 
 
-def generate_invoice_pdf(customer, company, invoice_no, delivery_date, vehicle_no, quantity, unit_price, total):
-    amount_in_words = num2words(total, lang='en_IN').title().replace("And", "") + " Rupees Only"
+@lru_cache(maxsize=None)
+def pdf_styles():
+    """Paragraph and table styles, built once per process on the first invoice"""
+    from reportlab.platypus import TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Center', alignment=1, parent=styles['Normal']))
+    header_rule = [
+        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 10),
+        ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
+    ]
+    table_styles = {
+        'details': TableStyle(header_rule + [('LINEBELOW', (0, 1), (-1, 1), 1, colors.black)]),
+        'items': TableStyle(header_rule + [('LINEBELOW', (0, 1), (-1, 1), 1, colors.black),
+                                           ('ALIGN', (2, 0), (-1, -1), 'RIGHT')]),
+        'attendance': TableStyle(header_rule + [('ALIGN', (1, 0), (-1, -1), 'CENTER')]),
+    }
+    return styles, table_styles
+
+
+# Attendance file path -> ((mtime, size), flowables); a rewritten day file no longer matches its key
+_attendance_flowables = {}
+
+
+def attendance_flowables(attendance_file):
+    """Heading and table for a day's attendance, parsed and built only when the file changes"""
+    try:
+        stat = os.stat(attendance_file)
+    except FileNotFoundError:
+        return []
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _attendance_flowables.get(attendance_file)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    styles, table_styles = pdf_styles()
+    with open(attendance_file, newline="") as f:
+        rows = list(csv.reader(f))
+    table = Table(rows, colWidths=[160, 80, 80, 100])
+    table.setStyle(table_styles['attendance'])
+    # Flowables re-wrap on every build, so the same objects can go into any number of invoices
+    flowables = [Spacer(1, 30), Paragraph("Attendance Record:", styles['Heading3']), table]
+    _attendance_flowables[attendance_file] = (key, flowables)
+    return flowables
+
+
+def generate_invoice_pdf(customer, company, invoice_no, delivery_date, vehicle_no, quantity, unit_price, total, verbose=True):
+    # ReportLab is only needed here, so the menu starts without loading it
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+
+    styles, table_styles = pdf_styles()
+    style_center = styles['Center']
     file_name = os.path.join(DATA_DIR, f"Invoice_{invoice_no}.pdf")
     doc = SimpleDocTemplate(file_name, pagesize=letter)
     elements = []
 
     elements.append(Spacer(1, 14 * 12))
-    styles = getSampleStyleSheet()
-    style_center = ParagraphStyle(name='Center', alignment=1, parent=styles['Normal'])
-
     elements.append(Paragraph("Invoice", styles['Heading2']))
     elements.append(Paragraph(f"Submitted on: {datetime.datetime.now().strftime('%d/%m/%Y')}", style_center))
     elements.append(Spacer(1, 20))
@@ -59,11 +123,7 @@ def generate_invoice_pdf(customer, company, invoice_no, delivery_date, vehicle_n
         ['Invoice for', 'Payable to', 'Invoice #'],
         [customer, company, invoice_no]
     ], colWidths=[200, 150, 100])
-    details_table.setStyle(TableStyle([
-        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 10),
-        ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
-        ('LINEBELOW', (0, 1), (-1, 1), 1, colors.black),
-    ]))
+    details_table.setStyle(table_styles['details'])
     elements.append(details_table)
     elements.append(Spacer(1, 20))
 
@@ -71,38 +131,23 @@ def generate_invoice_pdf(customer, company, invoice_no, delivery_date, vehicle_n
         ['Description', 'Delivery Date', 'Qty (M/TON)', 'Unit Price', 'Total Price'],
         [f'Coal ({vehicle_no})', delivery_date, f'{quantity:.3f}', f'Rs{unit_price:,.0f}', f'Rs{total:,.0f}']
     ], colWidths=[120, 90, 80, 80, 90])
-    items_table.setStyle(TableStyle([
-        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 10),
-        ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
-        ('LINEBELOW', (0, 1), (-1, 1), 1, colors.black),
-        ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
-    ]))
+    items_table.setStyle(table_styles['items'])
     elements.append(items_table)
     elements.append(Spacer(1, 20))
 
     elements.append(Paragraph("Notes:", styles['Normal']))
     elements.append(Paragraph(f"Rs{total:,.0f}", styles['Normal']))
     elements.append(Spacer(1, 10))
-    elements.append(Paragraph(amount_in_words, styles['Normal']))
+    elements.append(Paragraph(amount_in_words(total), styles['Normal']))
 
     # Attendance PDF Embed
     today = datetime.date.today().strftime("%Y-%m-%d")
-    attendance_file = os.path.join(DATA_DIR, f"attendance_{today}.csv")
-    if os.path.exists(attendance_file):
-        elements.append(Spacer(1, 30))
-        elements.append(Paragraph("Attendance Record:", styles['Heading3']))
-        with open(attendance_file) as f:
-            rows = list(csv.reader(f))
-        table = Table(rows, colWidths=[160, 80, 80, 100])
-        table.setStyle(TableStyle([
-            ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 10),
-            ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
-            ('ALIGN', (1, 0), (-1, -1), 'CENTER')
-        ]))
-        elements.append(table)
+    elements.extend(attendance_flowables(os.path.join(DATA_DIR, f"attendance_{today}.csv")))
 
     doc.build(elements)
-    print(f"Invoice PDF with attendance saved as {file_name}")
+    if verbose:
+        print(f"Invoice PDF with attendance saved as {file_name}")
+    return file_name
 
 
 def mark_attendance():
@@ -125,23 +170,240 @@ def mark_attendance():
 
 
 def log_delivery():
-    filename = os.path.join(DATA_DIR, "deliveries.csv")
-    header = ["Date", "Client", "Vehicle No", "Quantity"]
-    if not os.path.exists(filename):
-        with open(filename, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(header)
-
     date = input("Delivery Date (DD-MMM-YYYY): ")
     client = input("Client Name: ")
     vehicle = input("Vehicle No: ")
     qty = input("Quantity: ")
 
-    with open(filename, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([date, client, vehicle, qty])
+    with open_deliveries() as log:
+        log.append([date, client, vehicle, qty])
+
+    print(f"Delivery logged in {log.path}")
+
+
+def search_deliveries():
+    print("Search deliveries by:")
+    print("1. Vehicle No")
+    print("2. Client")
+    print("3. Date range")
+    choice = input("Select option: ")
+
+    with open_deliveries() as log:
+        if choice == "1":
+            rows = log.find("vehicle", input("Vehicle No: "))
+        elif choice == "2":
+            rows = log.find("client", input("Client Name: "))
+        elif choice == "3":
+            rows = log.between("date", input("From (DD-MMM-YYYY): "), input("To (DD-MMM-YYYY): "))
+        else:
+            print("Invalid choice.")
+            return
+        try:
+            rows = list(rows)
+        except ValueError as exc:
+            print(f"Invalid search: {exc}")
+            return
+
+    print(f"\n{'Date':<14}{'Client':<24}{'Vehicle No':<14}{'Quantity':>10}")
+    for row in rows:
+        date, client, vehicle, qty = (row + [""] * 4)[:4]
+        print(f"{date:<14}{client:<24}{vehicle:<14}{qty:>10}")
+    print(f"{len(rows)} deliveries found")
+
+
+# Batch mode: records come from JSON, JSON Lines or CSV files (or stdin) instead of prompts
+INVOICE_FIELDS = ["client", "invoice_no", "delivery_date", "vehicle_no", "quantity", "unit_price"]
+ATTENDANCE_FIELDS = ["employee", "location", "entry", "exit"]
+# exit stays blank while the employee is still on shift, as in mark_attendance
+ATTENDANCE_REQUIRED = ["employee", "location", "entry"]
+DELIVERY_FIELDS = ["date", "client", "vehicle_no", "quantity"]
+
+
+def read_records(path, fmt=None):
+    """Yield one dict per record from a JSON array, JSON Lines or CSV file; '-' reads stdin"""
+    f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")
+    try:
+        if fmt is None:
+            fmt = "csv" if path.lower().endswith(".csv") else "json"
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+            return
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        if first == "[":
+            yield from json.loads(first + f.read())
+            return
+        # JSON Lines streams one record at a time
+        for line in itertools.chain([first + f.readline()], f):
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def require(record, fields):
+    missing = [field for field in fields if str(record.get(field) or "").strip() == ""]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    return [str(record[field]).strip() for field in fields]
+
+
+def invoice_values(record):
+    """Map a batch record onto generate_invoice_pdf's arguments"""
+    client, invoice_no, delivery_date, vehicle_no, quantity, unit_price = require(record, INVOICE_FIELDS)
+    by_name = {company.lower(): key for key, (company, _) in CLIENTS.items()}
+    if client not in CLIENTS and client.lower() not in by_name:
+        raise ValueError(f"unknown client {client!r}")
+    company, customer = CLIENTS[client if client in CLIENTS else by_name[client.lower()]]
+    quantity, unit_price = float(quantity), float(unit_price)
+    return customer, company, invoice_no, delivery_date, vehicle_no, quantity, unit_price, quantity * unit_price
+
+
+def render_invoice(values):
+    generate_invoice_pdf(*values, verbose=False)
+    return values[2]
+
 
-    print(f"Delivery logged in {filename}")
+def batch_invoices(records, workers=None):
+    """Render invoices in a process pool, keeping only a few per worker in flight"""
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    workers = workers or os.cpu_count() or 1
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        for number, record in enumerate(records, start=1):
+            try:
+                in_flight[pool.submit(render_invoice, invoice_values(record))] = number
+            except (ValueError, TypeError, AttributeError) as exc:
+                print(f"Record {number}: {exc}", file=sys.stderr)
+                failed += 1
+            if len(in_flight) >= workers * 4:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done, failed = collect_invoice(future, in_flight.pop(future), done, failed)
+        for future in list(in_flight):
+            done, failed = collect_invoice(future, in_flight.pop(future), done, failed)
+    return done, failed
+
+
+def collect_invoice(future, number, done, failed):
+    try:
+        future.result()
+    except Exception as exc:
+        print(f"Record {number}: {exc}", file=sys.stderr)
+        return done, failed + 1
+    return done + 1, failed
+
+
+def attendance_location(name):
+    """The LOCATIONS entry matching `name`, ignoring case; the menu offers no others"""
+    for location in LOCATIONS:
+        if location.lower() == name.lower():
+            return location
+    raise ValueError(f"unknown location {name!r} (expected {', '.join(LOCATIONS)})")
+
+
+def batch_attendance(records, day=None):
+    """Write attendance day files; batch rows replace the same employee's row, others are kept"""
+    days = {}
+    failed = 0
+    for number, record in enumerate(records, start=1):
+        try:
+            employee, location, entry = require(record, ATTENDANCE_REQUIRED)
+            exit_ = str(record.get("exit") or "").strip()
+            location = attendance_location(location)
+            record_day = datetime.date.fromisoformat(str(record.get("date") or day or datetime.date.today()))
+        except ValueError as exc:
+            print(f"Record {number}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        days.setdefault(record_day.isoformat(), {})[employee] = [employee, location, entry, exit_]
+
+    for record_day, rows in days.items():
+        filename = os.path.join(DATA_DIR, f"attendance_{record_day}.csv")
+        merged = {}
+        if os.path.exists(filename):
+            with open(filename, newline="") as f:
+                merged = {row[0]: row for row in itertools.islice(csv.reader(f), 1, None) if row}
+        merged.update(rows)
+        # Write beside the day file and swap it in, so readers never see half a day
+        with open(filename + ".tmp", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Employee", "Location", "Entry Time", "Exit Time"])
+            writer.writerows(merged.values())
+        os.replace(filename + ".tmp", filename)
+    return sum(len(rows) for rows in days.values()), failed
+
+
+def batch_deliveries(records):
+    done = failed = 0
+    with open_deliveries(sync_every=1000) as log:
+        for number, record in enumerate(records, start=1):
+            try:
+                log.append(require(record, DELIVERY_FIELDS))
+            except ValueError as exc:
+                print(f"Record {number}: {exc}", file=sys.stderr)
+                failed += 1
+                continue
+            done += 1
+    return done, failed
+
+
+def batch_main(argv):
+    """Non-interactive entry point; exit status 0 = all records done, 1 = some failed, 2 = bad input"""
+    parser = argparse.ArgumentParser(prog="ERP-Chatgpt-CLIBased.py",
+                                     description="Batch mode; run without arguments for the interactive menu")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, fields in (("invoices", INVOICE_FIELDS), ("attendance", ATTENDANCE_FIELDS + ["date"]),
+                         ("deliveries", DELIVERY_FIELDS)):
+        command = commands.add_parser(name, help=f"records with fields: {', '.join(fields)}")
+        command.add_argument("input", nargs="?", default="-", help="JSON, JSON Lines or CSV file (default: stdin)")
+        command.add_argument("--format", choices=("json", "csv"), help="input format (default: from the file extension)")
+    commands.choices["invoices"].add_argument("--workers", type=int, help="PDF render processes (default: one per CPU)")
+    commands.choices["attendance"].add_argument("--date", help="day for records without a date (default: today)")
+    search = commands.add_parser("search", help="search logged deliveries")
+    search.add_argument("--vehicle")
+    search.add_argument("--client")
+    search.add_argument("--from", dest="start", help="first delivery date (DD-MMM-YYYY or YYYY-MM-DD)")
+    search.add_argument("--to", dest="end", help="last delivery date (defaults to --from)")
+    args = parser.parse_args(argv)
+
+    if args.command == "search":
+        with open_deliveries() as log:
+            try:
+                if args.vehicle:
+                    rows = list(log.find("vehicle", args.vehicle))
+                elif args.client:
+                    rows = list(log.find("client", args.client))
+                elif args.start:
+                    rows = list(log.between("date", args.start, args.end or args.start))
+                else:
+                    parser.error("search needs --vehicle, --client or --from")
+            except ValueError as exc:
+                print(f"Invalid search: {exc}", file=sys.stderr)
+                return 2
+        csv.writer(sys.stdout).writerows([DELIVERY_HEADER] + rows)
+        return 0
+
+    records = read_records(args.input, args.format)
+    t0 = time.perf_counter()
+    try:
+        if args.command == "invoices":
+            done, failed = batch_invoices(records, workers=args.workers)
+        elif args.command == "attendance":
+            done, failed = batch_attendance(records, day=args.date)
+        else:
+            done, failed = batch_deliveries(records)
+    except (OSError, ValueError, AttributeError) as exc:
+        print(f"Cannot read {args.input}: {exc}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - t0
+    print(f"{args.command}: {done} done, {failed} failed in {elapsed:.2f}s "
+          f"({done / elapsed if elapsed else 0:.1f} records/s)")
+    return 1 if failed else 0
 
 
 def main():
@@ -151,6 +413,7 @@ def main():
         print("2. Mark Attendance")
         print("3. Log Delivery")
         print("4. Exit")
+        print("5. Search Deliveries")
         choice = input("Select option: ")
 
         if choice == "1":
@@ -163,9 +426,13 @@ def main():
             log_delivery()
         elif choice == "4":
             break
+        elif choice == "5":
+            search_deliveries()
         else:
             print("Invalid choice. Try again.")
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(batch_main(sys.argv[1:]))
     main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Amount-to-words conversion in the Indian/Pakistani numbering system
+Shared by ERP-Bolt.py and ERP-Chatgpt-CLIBased.py for invoice totals
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+_ONES = ['', 'One', 'Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine',
+         'Ten', 'Eleven', 'Twelve', 'Thirteen', 'Fourteen', 'Fifteen', 'Sixteen', 'Seventeen', 'Eighteen', 'Nineteen']
+_TENS = ['', '', 'Twenty', 'Thirty', 'Forty', 'Fifty', 'Sixty', 'Seventy', 'Eighty', 'Ninety']
+
+def _below_hundred(n):
+    if n < 20:
+        return _ONES[n]
+    return (_TENS[n // 10] + ' ' + _ONES[n % 10]).strip()
+
+# Words for 0-999, built once at import
+_BELOW_THOUSAND = tuple(
+    ((_ONES[n // 100] + ' Hundred ' if n >= 100 else '') + _below_hundred(n % 100)).strip()
+    for n in range(1000)
+)
+
+# Above a thousand the Indian system groups two digits at a time
+_MAGNITUDES = (
+    (10 ** 11, 'Kharab'),
+    (10 ** 9, 'Arab'),
+    (10 ** 7, 'Crore'),
+    (10 ** 5, 'Lakh'),
+    (10 ** 3, 'Thousand'),
+)
+
+@lru_cache(maxsize=4096)
+def integer_to_words(n):
+    """'Twelve Lakh, Thirty Four Thousand, Five Hundred Sixty Seven' for 1234567"""
+    if n < 1000:
+        return _BELOW_THOUSAND[n]
+
+    parts = []
+    for value, name in _MAGNITUDES:
+        if n >= value:
+            count, n = divmod(n, value)
+            parts.append(f'{integer_to_words(count)} {name}')
+    if n:
+        parts.append(_BELOW_THOUSAND[n])
+    return ', '.join(parts)
+
+@lru_cache(maxsize=4096)
+def amount_in_words(amount):
+    """Rupee amount in words, e.g. 'Five Hundred Rupees and Fifty Paise Only'.
+
+    Paise are rounded half-up; negative amounts (credit notes) are prefixed with 'Minus'.
+    """
+    paise_total = int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    rupees, paise = divmod(abs(paise_total), 100)
+
+    if rupees and paise:
+        words = f'{integer_to_words(rupees)} Rupees and {integer_to_words(paise)} Paise Only'
+    elif paise:
+        words = f'{integer_to_words(paise)} Paise Only'
+    else:
+        words = f'{integer_to_words(rupees) or "Zero"} Rupees Only'
+    return 'Minus ' + words if paise_total < 0 else words
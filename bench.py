@@ -0,0 +1,814 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the A.T Commodities ERP web app
+
+    python bench.py [routes|checkin|render|layouts|metrics|words|records|serve|suite ...]
+
+Each benchmark builds its own scratch database unless told otherwise; the
+pass/fail checks live in tests/ and run under pytest.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import itertools
+import http.client
+import importlib.util
+import uuid
+import io
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, timedelta
+from flask import render_template, render_template_string
+
+ERP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ERP-Bolt.py')
+
+def load_erp():
+    """Import ERP-Bolt.py (its hyphenated name rules out a plain import) as erp_bolt"""
+    if 'erp_bolt' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('erp_bolt', ERP_SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        # Registered before it runs, so PDF worker processes can unpickle its functions
+        sys.modules['erp_bolt'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['erp_bolt']
+
+erp = load_erp()
+
+def _measure_throughput(app, path, concurrency, duration):
+    """Hit one route from several threads and return requests/sec"""
+    deadline = time.perf_counter() + duration
+    counts = [0] * concurrency
+    
+    def worker(slot):
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            client.get(path)
+            counts[slot] += 1
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / duration
+
+def benchmark_checkins(employees=48, readers=4, profiles=None):
+    """Fire simultaneous check-ins (plus attendance page readers) at a scratch database"""
+    profiles = profiles or {
+        'rollback journal': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+        'storage profile': {},
+    }
+    results = {}
+    for label, overrides in profiles.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            app = erp.create_app({'db_path': os.path.join(tmp, 'bench.db'), 'db_pool_size': employees + readers},
+                             storage_profile=overrides)
+            with app.app_context():
+                try:
+                    erp.db.execute_query('DELETE FROM employees')
+                    with erp.db.connection() as conn:
+                        conn.executemany('INSERT INTO employees (name, department, email) VALUES (?, ?, ?)',
+                                         [(f'Bench {i}', 'Warehouse', f'bench{i}@atcommodities.com')
+                                          for i in range(employees)])
+                    ids = [row[0] for row in erp.db.execute_query('SELECT id FROM employees', fetch=True)]
+                    start = threading.Barrier(len(ids) + readers)
+                    latencies, errors, reads = [], [], [0]
+                    done = threading.Event()
+                    
+                    def check_in(emp_id):
+                        client = app.test_client()
+                        start.wait()
+                        t0 = time.perf_counter()
+                        resp = client.post('/attendance/checkin', data={'employee_id': emp_id, 'work_location': 'warehouse'})
+                        latencies.append(time.perf_counter() - t0)
+                        if resp.status_code >= 500:
+                            errors.append(emp_id)
+                    
+                    def read_page():
+                        client = app.test_client()
+                        start.wait()
+                        while not done.is_set():
+                            client.get('/attendance')
+                            reads[0] += 1
+                    
+                    writers = [threading.Thread(target=check_in, args=(i,)) for i in ids]
+                    others = [threading.Thread(target=read_page) for _ in range(readers)]
+                    t0 = time.perf_counter()
+                    for t in writers + others:
+                        t.start()
+                    for t in writers:
+                        t.join()
+                    elapsed = time.perf_counter() - t0
+                    done.set()
+                    for t in others:
+                        t.join()
+                    
+                    stored = erp.db.execute_query('SELECT COUNT(*) FROM attendance', fetch=True)[0][0]
+                    latencies.sort()
+                    results[label] = {
+                        'elapsed': elapsed,
+                        'stored': stored,
+                        'errors': len(errors),
+                        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+                        'reads': reads[0],
+                    }
+                finally:
+                    erp.db.close()
+    
+    print(f"{employees} simultaneous check-ins, {readers} concurrent /attendance readers")
+    print(f"{'Profile':<20}{'wall s':>8}{'p95 ms':>9}{'stored':>8}{'errors':>8}{'page reads':>12}")
+    for label, r in results.items():
+        print(f"{label:<20}{r['elapsed']:>8.2f}{r['p95_ms']:>9.1f}{r['stored']:>8}{r['errors']:>8}{r['reads']:>12}")
+    return results
+
+def current_rss_kb():
+    """Private resident memory of this process in KB.
+    
+    File-backed pages (the mmap'd database) are excluded since the OS can drop them.
+    Falls back to the peak RSS where /proc is unavailable.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident, shared = (int(v) for v in f.read().split()[1:3])
+        return (resident - shared) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def benchmark_renders(iterations=500):
+    """Per-request render latency of each page: precompiled vs compiled from source every time"""
+    empty_page = {'rows': [], 'size': erp.PAGE_SIZE, 'prev': None, 'next': 'x'}
+    contexts = {
+        'dashboard.html': {'active_page': 'dashboard', 'stats': {'total_employees': 5, 'today_attendance': 3,
+                                                                 'total_invoices': 120, 'active_deliveries': 4,
+                                                                 'storage_used': 512}},
+        'attendance.html': {'active_page': 'attendance', 'page': empty_page,
+                            'employees': [(i, f'Employee {i}', 'Warehouse') for i in range(20)],
+                            'today_records': [(i, i, f'Employee {i}', '2025-01-01 09:00:00', None, 'office', '2025-01-01', None)
+                                              for i in range(erp.PAGE_SIZE)],
+                            'today_stats': {'total': 25, 'checked_out': 0, 'office': 25, 'warehouse': 0, 'field': 0}},
+        'invoices.html': {'active_page': 'invoices', 'page': empty_page, 'clients': [(1, 'Client', 'Contact', 'Addr')],
+                          'invoices': [(i, f'ATC-{i}', 1, 'Client', '2025-01-01', 100.0, 0, 0, 100.0, 'draft')
+                                       for i in range(erp.PAGE_SIZE)]},
+        'deliveries.html': {'active_page': 'deliveries', 'page': empty_page, 'today': '2025-01-01',
+                            'stats': {'total': 25, 'pending': 25, 'in_transit': 0, 'delivered': 0},
+                            'deliveries': [(i, 'ABC-123', 'Driver', '2025-01-01', '10:00', 'Karachi', 'Coal', 'pending')
+                                           for i in range(erp.PAGE_SIZE)]},
+        'downloads.html': {'active_page': 'downloads', 'start_date': '2025-01-01', 'end_date': '2025-01-31',
+                           'stats': {'attendance_records': 10, 'total_invoices': 10, 'total_deliveries': 10,
+                                     'total_invoice_value': '1,000'}},
+    }
+    
+    print(f"{'Template':<18}{'compiled ms':>13}{'per-request ms':>16}")
+    results = {}
+    app = erp.create_app()
+    erp.compile_templates(app)
+    with app.test_request_context():
+        for name, context in contexts.items():
+            t0 = time.perf_counter()
+            for _ in range(iterations):
+                render_template(name, **context)
+            compiled = (time.perf_counter() - t0) / iterations * 1000
+            
+            t0 = time.perf_counter()
+            for _ in range(iterations):
+                render_template_string(erp.TEMPLATES[name], **context)
+            from_source = (time.perf_counter() - t0) / iterations * 1000
+            
+            results[name] = (compiled, from_source)
+            print(f"{name:<18}{compiled:>13.3f}{from_source:>16.3f}")
+    return results
+
+def benchmark_layouts(renders=1000):
+    """Per-invoice CPU time and style allocations with the compiled layout registry vs styles rebuilt per render"""
+    import tracemalloc
+    from reportlab import rl_config
+    
+    class RebuiltStyles(erp.InvoiceGenerator):
+        # What every render paid before the registry: a fresh stylesheet, paragraph styles and TableStyle
+        def layout(self, name=None):
+            return self.compile_layout(self.layouts[name if name in self.layouts else erp.DEFAULT_INVOICE_LAYOUT])
+    
+    items = [{'description': product, 'quantity': 12.5, 'unit_price': 4800.0, 'total': 60000.0}
+             for product in ('Coal', 'Sand', 'Bricks')]
+    invariant, rl_config.invariant = rl_config.invariant, 1
+    ok = True
+    try:
+        print(f"{'Layout':<10}{'Styles':<11}{'CPU ms/PDF':>12}{'style blocks/PDF':>18}")
+        for name in erp.INVOICE_LAYOUTS:
+            invoice = {'invoice_number': 'BENCH-1', 'items': items, 'total': 180000.0, 'layout': name}
+            results = {}
+            for label, generator in (('rebuilt', RebuiltStyles()), ('registry', erp.InvoiceGenerator())):
+                generator.generate_pdf(invoice, io.BytesIO())  # warm imports and fonts
+                t0 = time.process_time()
+                for _ in range(renders):
+                    pdf = io.BytesIO()
+                    generator.generate_pdf(invoice, pdf)
+                cpu_ms = (time.process_time() - t0) / renders * 1000
+                
+                # Blocks held by the styles each render builds (a lower bound: the rest of the stylesheet is freed)
+                tracemalloc.start()
+                kept = [generator.layout(name) for _ in range(renders)]
+                allocs = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename')) / renders
+                tracemalloc.stop()
+                del kept
+                results[label] = (cpu_ms, allocs, pdf.getvalue())
+                print(f"{name:<10}{label:<11}{cpu_ms:>12.3f}{allocs:>18.1f}")
+            
+            (base_cpu, base_allocs, base_pdf), (cpu, allocs, pdf) = results['rebuilt'], results['registry']
+            if pdf != base_pdf:
+                print(f"❌ {name}: registry output differs from freshly built styles")
+                ok = False
+            elif cpu >= base_cpu or allocs >= base_allocs:
+                print(f"❌ {name}: registry is not cheaper ({cpu:.3f} vs {base_cpu:.3f} ms, "
+                      f"{allocs:.1f} vs {base_allocs:.1f} allocations)")
+                ok = False
+            else:
+                print(f"✅ {name}: {(1 - cpu / base_cpu) * 100:.0f}% less CPU and {base_allocs - allocs:,.0f} fewer "
+                      f"allocations per PDF over {renders:,} renders, identical PDFs")
+    finally:
+        rl_config.invariant = invariant
+    return ok
+
+def benchmark_routes(paths=('/', '/attendance'), concurrency=8, duration=5.0):
+    """Compare requests/sec per route with per-query connections vs the pool, on one scratch database"""
+    pool_size = erp.load_app_config()['db_pool_size'] or 8
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, size in (('per-query connect', 0), (f'pooled ({pool_size})', pool_size)):
+            app = erp.create_app({'db_path': os.path.join(tmp, 'bench.db'), 'db_pool_size': size,
+                                  'pdf_job_dir': os.path.join(tmp, 'jobs'), 'pdf_cache_dir': os.path.join(tmp, 'cache')})
+            try:
+                for path in paths:
+                    results[(label, path)] = _measure_throughput(app, path, concurrency, duration)
+            finally:
+                app.extensions['erp']['pdf_jobs'].shutdown()
+                app.extensions['erp']['db'].close()
+    
+    print(f"{'Mode':<22}{'Route':<14}{'req/s':>10}")
+    for (label, path), rps in results.items():
+        print(f"{label:<22}{path:<14}{rps:>10.1f}")
+    return results
+
+def benchmark_amount_words(iterations=100_000):
+    """amount_in_words per call, uncached and from its LRU cache, next to num2words"""
+    import random
+    from amount_words import amount_in_words
+    rng = random.Random(1)
+    amounts = [rng.randrange(10 ** 9) / 100 for _ in range(1000)]
+    
+    t0 = time.perf_counter()
+    for i in range(iterations):
+        amount_in_words.__wrapped__(amounts[i % len(amounts)])
+    ours = (time.perf_counter() - t0) / iterations * 1e6
+    t0 = time.perf_counter()
+    for i in range(iterations):
+        amount_in_words(amounts[i % len(amounts)])
+    cached = (time.perf_counter() - t0) / iterations * 1e6
+    print(f"amount_in_words: {ours:.2f} µs/call uncached, {cached:.2f} µs/call from the LRU cache")
+    
+    try:
+        from num2words import num2words
+    except ImportError:
+        print("num2words not installed; skipping comparison")
+        return
+    t0 = time.perf_counter()
+    for i in range(iterations // 10):
+        num2words(amounts[i % len(amounts)], lang='en_IN')
+    theirs = (time.perf_counter() - t0) / (iterations // 10) * 1e6
+    print(f"num2words(lang='en_IN'): {theirs:.2f} µs/call ({theirs / ours:.0f}x slower)")
+
+def benchmark_record_log(rows=1_000_000, seed=1):
+    """Append rate, index size and lookup latency of the CLI's indexed delivery log"""
+    import random
+    from record_log import RecordLog, date_key, text_key
+    rng = random.Random(seed)
+    header = ['Date', 'Client', 'Vehicle No', 'Quantity']
+    keys = {'date': (0, date_key), 'client': (1, text_key), 'vehicle': (2, text_key)}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'deliveries.csv')
+        t0 = time.perf_counter()
+        with RecordLog(path, header, keys, sync_every=10000) as log:
+            for start in range(0, rows, 10000):
+                log.extend([date.fromordinal(737000 + rng.randrange(1500)).strftime('%d-%b-%Y'), f'Client {rng.randrange(200)}',
+                            f'LES-{rng.randrange(20000)}', str(rng.randint(5, 40))] for _ in range(start, min(rows, start + 10000)))
+        written = time.perf_counter() - t0
+        log_mb = os.path.getsize(path) / 1024 / 1024
+        index_mb = sum(os.path.getsize(os.path.join(path + '.idx', name)) for name in os.listdir(path + '.idx')) / 1024 / 1024
+        print(f"append: {rows:,} rows in {written:.1f}s ({rows / written:,.0f} rows/s), "
+              f"log {log_mb:.0f} MB, index {index_mb:.0f} MB")
+        
+        with RecordLog(path, header, keys) as log:
+            t0 = time.perf_counter()
+            hits = sum(len(list(log.find('vehicle', f'LES-{rng.randrange(20000)}'))) for _ in range(100))
+            print(f"vehicle lookup: {(time.perf_counter() - t0) * 10:.2f} ms/query ({hits / 100:.0f} rows each)")
+            t0 = time.perf_counter()
+            hits = len(list(log.between('date', '01-Jan-2019', '07-Jan-2019')))
+            print(f"7-day range: {(time.perf_counter() - t0) * 1000:.1f} ms for {hits:,} rows")
+            t0 = time.perf_counter()
+            hits = sum(1 for row in log.scan() if text_key(row[2]) == text_key('LES-7'))
+            print(f"full CSV scan for one vehicle: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+def benchmark_metrics(iterations=100_000, requests=500):
+    """Cost of the /metrics request and query hooks next to a real /attendance request"""
+    sample = erp.Metrics(slow_query_ms=float('inf'))
+    t0 = time.perf_counter()
+    for i in range(iterations):
+        sample.observe_request('GET', '/attendance', 200, i % 50 / 1000)
+    request_hook = (time.perf_counter() - t0) / iterations
+    query = 'SELECT * FROM attendance WHERE date = ? ORDER BY check_in DESC, id DESC LIMIT ?'
+    t0 = time.perf_counter()
+    for i in range(iterations):
+        sample.observe_query(query, i % 50 / 1000, 25)
+    query_hook = (time.perf_counter() - t0) / iterations
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        app = erp.create_app({'db_path': os.path.join(tmp, 'bench.db'), 'pdf_cache_dir': os.path.join(tmp, 'cache')})
+        client = app.test_client()
+        client.get('/attendance')
+        t0 = time.perf_counter()
+        for _ in range(requests):
+            client.get('/attendance')
+        per_request = (time.perf_counter() - t0) / requests
+        # Bucket slots hold per-bucket counts; the last slot is the running sum
+        queries = sum(sum(counts[:-1]) for counts in
+                      app.extensions['erp']['metrics'].queries.series.values()) / (requests + 1)
+        app.extensions['erp']['db'].close()
+    
+    overhead = request_hook + queries * query_hook
+    print(f"Request hook {request_hook * 1e6:.2f} µs, query hook {query_hook * 1e6:.2f} µs")
+    print(f"/attendance: {per_request * 1000:.2f} ms per request, {queries:.1f} queries each; "
+          f"metrics add {overhead * 1e6:.1f} µs ({overhead / per_request:.2%})")
+    return overhead / per_request
+
+# Default size of the synthetic dataset built by 'suite'
+BENCH_DATASET = {
+    'employees': 2000,
+    'clients': 200,
+    'attendance': 1_000_000,
+    'invoices': 200_000,
+    'deliveries': 200_000,
+}
+
+def generate_dataset(db_path, sizes=None, seed=1, chunk_size=10_000):
+    """Fill db_path with synthetic employees, clients, attendance, invoices and deliveries.
+    
+    Attendance runs back from today, one row per employee per day. Today's rows are
+    still checked in, and every tenth employee has not arrived yet, so the check-in
+    and check-out routes have real work to do.
+    """
+    import random
+    sizes = {**BENCH_DATASET, **(sizes or {})}
+    rng = random.Random(seed)
+    today = date.today()
+    now = datetime.now()
+    days = max(1, -(-sizes['attendance'] // max(sizes['employees'], 1)))
+    dates = [date.fromordinal(today.toordinal() - offset).isoformat() for offset in range(days)]
+    locations = ('office', 'warehouse', 'field')
+    products = ('Coal', 'Sand', 'Bricks', 'Cement', 'Steel', 'Gravel')
+    cities = ('Karachi', 'Lahore', 'Islamabad', 'Faisalabad', 'Multan', 'Peshawar')
+    
+    def chunks(rows):
+        while True:
+            batch = list(itertools.islice(rows, chunk_size))
+            if not batch:
+                return
+            yield batch
+    
+    def employees():
+        departments = ('Operations', 'Sales', 'Logistics', 'Accounts', 'Warehouse')
+        for i in range(sizes['employees']):
+            yield (f'Employee {i + 1}', departments[i % len(departments)], f'employee{i + 1}@atcommodities.com')
+    
+    def clients():
+        for i in range(sizes['clients']):
+            yield (f'Client {i + 1}', f'Contact {i + 1}', f'Plot {i + 1}, {cities[i % len(cities)]}')
+    
+    def attendance(employee_rows):
+        produced = 0
+        for day in dates:
+            for emp_id, name in employee_rows:
+                if produced == sizes['attendance']:
+                    return
+                if day == dates[0] and emp_id % 10 == 0:
+                    continue
+                # Every twentieth employee works the night shift, checking out the next morning
+                if emp_id % 20 == 0:
+                    check_in = f'{day} {rng.randint(20, 21):02d}:{rng.randint(0, 59):02d}:00'
+                    check_out = f'{date.fromisoformat(day) + timedelta(days=1)} {rng.randint(4, 6):02d}:{rng.randint(0, 59):02d}:00'
+                else:
+                    check_in = f'{day} {rng.randint(8, 9):02d}:{rng.randint(0, 59):02d}:00'
+                    check_out = f'{day} {rng.randint(16, 18):02d}:{rng.randint(0, 59):02d}:00'
+                if day == dates[0]:
+                    # Today's shifts are still open and must have started before now
+                    started = max(now - timedelta(minutes=rng.randint(1, 60)), datetime.combine(today, datetime.min.time()))
+                    check_in, check_out = started.isoformat(sep=' ', timespec='seconds'), None
+                produced += 1
+                yield (emp_id, name, check_in, check_out, rng.choice(locations), day, None)
+    
+    def invoices(client_rows, first_id):
+        for i in range(sizes['invoices']):
+            invoice_id = first_id + i
+            client_id, client_name = rng.choice(client_rows)
+            lines = []
+            for line_no in range(1, rng.randint(1, 4) + 1):
+                quantity = round(rng.uniform(1, 50), 3)
+                unit_price = rng.choice((2500, 4800, 12000, 18500))
+                lines.append((invoice_id, line_no, rng.choice(products), quantity, unit_price,
+                              round(quantity * unit_price, 2)))
+            subtotal = sum(line[5] for line in lines)
+            tax, discount = round(subtotal * 0.17, 2), round(subtotal * rng.choice((0, 0, 0.02)), 2)
+            yield ((invoice_id, f'BENCH-{invoice_id:07d}', client_id, client_name, rng.choice(dates),
+                    subtotal, tax, discount, round(subtotal + tax - discount, 2),
+                    rng.choice(('draft', 'sent', 'paid', 'paid'))), lines)
+    
+    def deliveries():
+        for _ in range(sizes['deliveries']):
+            yield (f'{rng.choice("ABCKLM")}{rng.choice("ABCKLM")}-{rng.randint(100, 9999)}', f'Driver {rng.randint(1, 300)}',
+                   rng.choice(dates), f'{rng.randint(6, 20):02d}:{rng.choice(("00", "15", "30", "45"))}',
+                   rng.choice(cities), f'{rng.randint(5, 40)} ton {rng.choice(products).lower()}',
+                   rng.choice(('pending', 'in-transit', 'delivered', 'delivered')))
+    
+    database = erp.DatabaseManager(db_path, pool_size=1)
+    counts = {}
+    t0 = time.perf_counter()
+    try:
+        with database.connection() as conn:
+            for batch in chunks(employees()):
+                conn.executemany('INSERT INTO employees (name, department, email) VALUES (?, ?, ?)', batch)
+            for batch in chunks(clients()):
+                conn.executemany('INSERT INTO clients (name, contact, address) VALUES (?, ?, ?)', batch)
+            employee_rows = conn.execute('SELECT id, name FROM employees ORDER BY id').fetchall()
+            client_rows = conn.execute('SELECT id, name FROM clients').fetchall()
+            
+            for batch in chunks(attendance(employee_rows)):
+                conn.executemany('''
+                    INSERT INTO attendance (employee_id, employee_name, check_in, check_out, work_location, date, total_hours)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', batch)
+            conn.execute(f'UPDATE attendance SET total_hours = {erp.SHIFT_HOURS} WHERE check_out IS NOT NULL')
+            
+            first_id = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM invoices').fetchone()[0]
+            for batch in chunks(invoices(client_rows, first_id)):
+                conn.executemany('''
+                    INSERT INTO invoices (id, invoice_number, client_id, client_name, date, subtotal, tax, discount, total, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [invoice for invoice, _ in batch])
+                conn.executemany('''
+                    INSERT INTO invoice_items (invoice_id, line_no, description, quantity, unit_price, total)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [line for _, lines in batch for line in lines])
+            
+            for batch in chunks(deliveries()):
+                conn.executemany('''
+                    INSERT INTO deliveries (vehicle_number, driver_name, delivery_date, delivery_time, destination, load_details, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', batch)
+            
+            counts = _table_counts(conn)
+        with database.connection() as conn:
+            conn.execute('ANALYZE')
+    finally:
+        database.close()
+    
+    elapsed = time.perf_counter() - t0
+    print(f"🌱 Generated {sum(counts.values()):,} rows into {db_path} in {elapsed:.1f}s: " +
+          ", ".join(f"{table} {count:,}" for table, count in counts.items()))
+    return counts
+
+def _table_counts(conn):
+    return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ('employees', 'clients', 'attendance', 'invoices', 'invoice_items', 'deliveries')}
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def _bench_request(client, method, path, data=None):
+    """Issue one request and drain the body without buffering it; returns (status, bytes).
+    
+    `data` is form fields, or a str sent as a JSON body.
+    """
+    content_type = 'application/json' if isinstance(data, str) else None
+    response = client.open(path, method=method, data=data, content_type=content_type, buffered=False)
+    size = 0
+    try:
+        for chunk in response.response:
+            size += len(chunk)
+    finally:
+        response.close()
+    return response.status_code, size
+
+def benchmark_suite(db_path, requests=200, exports=5, pdfs=20):
+    """Drive every route, CSV export and PDF path against db_path; returns per-scenario results"""
+    import random
+    rng = random.Random(7)
+    today = date.today()
+    month_ago = date.fromordinal(today.toordinal() - 29).isoformat()
+    today = today.isoformat()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        app = erp.create_app({'db_path': db_path, 'pdf_job_dir': os.path.join(tmp, 'jobs'),
+                          'pdf_cache_dir': os.path.join(tmp, 'cache'), 'slow_query_ms': float('inf')})
+        client = app.test_client()
+        with app.app_context():
+            employee_ids = [row[0] for row in erp.db.execute_query('SELECT id FROM employees', fetch=True)]
+            absent = [row[0] for row in erp.db.execute_query(
+                'SELECT id FROM employees WHERE id NOT IN (SELECT employee_id FROM attendance WHERE date = ?)',
+                (today,), fetch=True)]
+            open_records = [row[0] for row in erp.db.execute_query(
+                'SELECT id FROM attendance WHERE date = ? AND check_out IS NULL', (today,), fetch=True)]
+            invoice_ids = [row[0] for row in erp.db.execute_query('SELECT id FROM invoices', fetch=True)]
+            delivery_ids = [row[0] for row in erp.db.execute_query('SELECT id FROM deliveries', fetch=True)]
+            attendance_next = erp.db.fetch_page('attendance', ('check_in', 'id'), 'date = ?', (today,))['next']
+            invoices_next = erp.db.fetch_page('invoices', ('date', 'id'))['next']
+            deliveries_next = erp.db.fetch_page('deliveries', ('delivery_date', 'delivery_time', 'id'))['next']
+        pdf_ids = rng.sample(invoice_ids, min(pdfs, len(invoice_ids)))
+        to_render = list(pdf_ids)
+        serial = itertools.count(1)
+        
+        def new_invoice():
+            return {'client_id': '1', 'invoice_number': f'SUITE-{uuid.uuid4().hex[:12]}',
+                    'description[]': ['Coal', 'Sand'], 'quantity[]': [str(next(serial) % 40 + 1), '3.5'],
+                    'unit_price[]': ['4800', '2500'], 'tax_percent': '17', 'discount_percent': '0'}
+        
+        def new_delivery():
+            return {'vehicle_number': f'BN-{next(serial)}', 'driver_name': 'Bench Driver', 'delivery_date': today,
+                    'delivery_time': '10:30', 'destination': 'Karachi', 'load_details': '20 ton coal', 'status': 'pending'}
+        
+        def crew(action):
+            entries = [{'employee_id': employee_id, 'work_location': 'warehouse'}
+                       for employee_id in rng.sample(employee_ids, min(20, len(employee_ids)))]
+            return json.dumps({'action': action, 'entries': entries})
+        
+        # The delete scenarios only remove rows the create scenarios added, so the dataset is left as it was
+        created = {'invoices': [], 'deliveries': []}
+        created_queries = {'invoices': "SELECT id FROM invoices WHERE invoice_number LIKE 'SUITE-%'",
+                           'deliveries': "SELECT id FROM deliveries WHERE driver_name = 'Bench Driver'"}
+        
+        def created_id(table):
+            if not created[table]:
+                with app.app_context():
+                    created[table] = [row[0] for row in erp.db.execute_query(created_queries[table], fetch=True)]
+            return created[table].pop() if created[table] else 0
+        
+        def pdf_job():
+            """Submit a render job, poll its status until it finishes, then fetch the file"""
+            response = client.post(f'/invoices/{rng.choice(pdf_ids)}/pdf')
+            if response.status_code != 202:
+                return response.status_code, 0
+            job = response.get_json()
+            status = job['status']
+            while status not in ('done', 'failed'):
+                time.sleep(0.005)
+                status = client.get(job['status_url']).get_json()['status']
+            return _bench_request(client, 'GET', job['file_url'])
+        
+        # name -> (method, path or path factory, form data factory, iterations); a None method
+        # marks a multi-request exchange whose factory returns (status, bytes) itself
+        scenarios = {
+            'GET /': ('GET', '/', None, requests),
+            'GET /attendance': ('GET', '/attendance', None, requests),
+            'GET /attendance (page 2)': ('GET', f'/attendance?after={attendance_next}', None, requests),
+            'GET /invoices': ('GET', '/invoices', None, requests),
+            'GET /invoices (page 2)': ('GET', f'/invoices?after={invoices_next}', None, requests),
+            'GET /deliveries': ('GET', '/deliveries', None, requests),
+            'GET /deliveries (page 2)': ('GET', f'/deliveries?after={deliveries_next}', None, requests),
+            'GET /downloads': ('GET', '/downloads', None, requests),
+            'GET /metrics': ('GET', '/metrics', None, requests),
+            'POST /attendance/checkin': ('POST', '/attendance/checkin',
+                                         lambda: {'employee_id': absent.pop() if absent else rng.choice(employee_ids),
+                                                  'work_location': 'office'}, requests),
+            'POST /attendance/checkout': ('POST', '/attendance/checkout',
+                                          lambda: {'record_id': open_records.pop() if open_records else 0}, requests),
+            'POST /invoices/create': ('POST', '/invoices/create', new_invoice, requests),
+            'POST /invoices/update_status': ('POST', lambda: f'/invoices/update_status/{rng.choice(invoice_ids)}',
+                                             lambda: {'status': 'paid'}, requests),
+            'POST /deliveries/create': ('POST', '/deliveries/create', new_delivery, requests),
+            'POST /deliveries/update_status': ('POST', lambda: f'/deliveries/update_status/{rng.choice(delivery_ids)}',
+                                               lambda: {'status': 'delivered'}, requests),
+            'POST /invoices/delete': ('POST', lambda: f'/invoices/delete/{created_id("invoices")}', None, requests),
+            'POST /deliveries/delete': ('POST', lambda: f'/deliveries/delete/{created_id("deliveries")}', None, requests),
+            'POST /attendance/batch checkin': ('POST', '/attendance/batch', lambda: crew('checkin'), requests),
+            'POST /attendance/batch checkout': ('POST', '/attendance/batch', lambda: crew('checkout'), requests),
+            'CSV attendance (daily)': ('GET', '/downloads/attendance', None, exports),
+            'CSV attendance (30 days)': ('GET', f'/downloads/attendance?type=monthly&start={month_ago}&end={today}',
+                                         None, exports),
+            'CSV invoices (30 days)': ('GET', f'/downloads/invoices?start={month_ago}&end={today}', None, exports),
+            'CSV deliveries (30 days)': ('GET', f'/downloads/deliveries?type=monthly&start={month_ago}&end={today}',
+                                         None, exports),
+            'CSV payroll (30 days, weekly)': ('GET', f'/downloads/payroll?period=week&start={month_ago}&end={today}',
+                                              None, exports),
+            'PDF invoice (render)': ('GET', lambda: f'/invoices/download/{to_render.pop()}', None, len(pdf_ids)),
+            'PDF invoice (cached)': ('GET', lambda: f'/invoices/download/{rng.choice(pdf_ids)}', None, len(pdf_ids)),
+            'PDF job (submit, poll, file)': (None, pdf_job, None, len(pdf_ids)),
+            'PDF batch ZIP (1 day)': ('GET', f'/invoices/batch?start={today}&end={today}&format=zip', None, 2),
+            'PDF batch merged (1 day)': ('GET', f'/invoices/batch?start={today}&end={today}&format=pdf', None, 2),
+        }
+        
+        results = {}
+        for name, (method, path, data, iterations) in scenarios.items():
+            latencies, errors, size = [], 0, 0
+            baseline = peak = current_rss_kb()
+            started = time.perf_counter()
+            for _ in range(iterations):
+                target = path() if callable(path) and method is not None else path
+                form = data() if data else None
+                t0 = time.perf_counter()
+                status, body = path() if method is None else _bench_request(client, method, target, form)
+                latencies.append(time.perf_counter() - t0)
+                errors += status >= 400
+                size += body
+                peak = max(peak, current_rss_kb())
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            results[name] = {
+                'requests': iterations,
+                'errors': errors,
+                'p50_ms': round(_percentile(latencies, 0.50) * 1000, 3),
+                'p95_ms': round(_percentile(latencies, 0.95) * 1000, 3),
+                'p99_ms': round(_percentile(latencies, 0.99) * 1000, 3),
+                'throughput_rps': round(iterations / elapsed, 2) if elapsed else 0.0,
+                'bytes_per_request': size // max(iterations, 1),
+                'rss_growth_mb': round((peak - baseline) / 1024, 2),
+            }
+            r = results[name]
+            print(f"{name:<32}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                  f"{r['throughput_rps']:>10.1f}{errors:>8}")
+        
+        app.extensions['erp']['pdf_jobs'].shutdown()
+        app.extensions['erp']['db'].close()
+    return results
+
+def bench_suite_command(argv):
+    """CLI: build (or reuse) a synthetic at_commodities.db, run benchmark_suite and write a JSON report"""
+    parser = argparse.ArgumentParser(prog='bench.py suite')
+    parser.add_argument('--db', default=os.path.join('bench_data', 'at_commodities.db'),
+                        help='dataset database; generated when missing')
+    parser.add_argument('--regenerate', action='store_true', help='rebuild the dataset even if --db exists')
+    parser.add_argument('--seed', type=int, default=1)
+    for name, default in BENCH_DATASET.items():
+        parser.add_argument(f'--{name}', type=int, default=default, help=f'rows to generate (default {default:,})')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--exports', type=int, default=5, help='requests per CSV export')
+    parser.add_argument('--pdfs', type=int, default=20, help='distinct invoices to render')
+    parser.add_argument('--output', default=f'bench-{datetime.now():%Y%m%d-%H%M%S}.json')
+    parser.add_argument('--compare', help='earlier report to compare p95 and throughput against')
+    parser.add_argument('--max-regression', type=float, default=0.0,
+                        help='fail when any p95 grows by more than this fraction over --compare (0 = report only)')
+    args = parser.parse_args(argv)
+    
+    if args.regenerate or not os.path.exists(args.db):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+        os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+        dataset = generate_dataset(args.db, {name: getattr(args, name) for name in BENCH_DATASET}, seed=args.seed)
+    else:
+        with sqlite3.connect(args.db) as conn:
+            dataset = _table_counts(conn)
+        print(f"Reusing {args.db}: " + ", ".join(f"{table} {count:,}" for table, count in dataset.items()))
+    
+    print(f"{'Scenario':<32}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'errors':>8}")
+    scenarios = benchmark_suite(args.db, requests=args.requests, exports=args.exports, pdfs=args.pdfs)
+    try:
+        import resource
+        peak_rss_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        peak_rss_mb = None
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'sqlite': sqlite3.sqlite_version,
+        'cpus': os.cpu_count(),
+        'dataset': dataset,
+        'peak_rss_mb': peak_rss_mb,
+        'scenarios': scenarios,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Report written to {args.output} (peak RSS {peak_rss_mb} MB)")
+    
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        previous = json.load(f)['scenarios']
+    regressed = []
+    print(f"\n{'Scenario':<32}{'p95 before':>12}{'p95 now':>10}{'change':>9}{'req/s change':>14}")
+    for name, now in scenarios.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        change = now['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0.0
+        rps_change = now['throughput_rps'] / before['throughput_rps'] - 1 if before['throughput_rps'] else 0.0
+        flag = ''
+        if args.max_regression and change > args.max_regression:
+            regressed.append(name)
+            flag = ' ❌'
+        print(f"{name:<32}{before['p95_ms']:>12.2f}{now['p95_ms']:>10.2f}{change:>+9.0%}{rps_change:>+14.0%}{flag}")
+    return 1 if regressed else 0
+
+def _http_load(port, path, connections, duration):
+    """Load-test client process: keep-alive GETs from `connections` threads; returns completed requests"""
+    deadline = time.perf_counter() + duration
+    counts = [0] * connections
+    
+    def worker(slot):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            while time.perf_counter() < deadline:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    counts[slot] += 1
+        finally:
+            conn.close()
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(connections)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts)
+
+def _wait_until_serving(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+def benchmark_serve(worker_counts=(1, 2, 4), paths=('/', '/attendance'), connections=16, duration=5.0):
+    """Run `serve` with each worker count on a scratch database and report requests/sec per route"""
+    client_procs = max(2, min(4, os.cpu_count() or 1))
+    per_client = max(1, connections // client_procs)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, ERP_DB_PATH=os.path.join(tmp, 'bench.db'),
+                   ERP_PDF_JOB_DIR=os.path.join(tmp, 'jobs'), ERP_PDF_CACHE_DIR=os.path.join(tmp, 'cache'))
+        for workers in worker_counts:
+            with socket.socket() as probe:
+                probe.bind(('127.0.0.1', 0))
+                port = probe.getsockname()[1]
+            server = subprocess.Popen([sys.executable, ERP_SCRIPT, 'serve', '--quiet',
+                                       '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers)],
+                                      env=env, stdout=subprocess.DEVNULL)
+            try:
+                _wait_until_serving(port)
+                for path in paths:
+                    with ProcessPoolExecutor(client_procs) as clients:
+                        done = clients.map(_http_load, [port] * client_procs, [path] * client_procs,
+                                           [per_client] * client_procs, [duration] * client_procs)
+                        results[(workers, path)] = sum(done) / duration
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+    
+    print(f"{client_procs * per_client} keep-alive connections, {duration:.0f}s per run, {os.cpu_count()} CPU(s)")
+    print(f"{'Workers':<10}{'Route':<14}{'req/s':>10}{'vs 1 worker':>14}")
+    for (workers, path), rps in results.items():
+        base = results.get((worker_counts[0], path)) or 1
+        print(f"{workers:<10}{path:<14}{rps:>10.1f}{rps / base:>13.2f}x")
+    return results
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'routes'
+    if command == 'checkin':
+        benchmark_checkins(employees=int(os.environ.get('ERP_BENCH_EMPLOYEES', 48)))
+    elif command == 'render':
+        benchmark_renders()
+    elif command == 'layouts':
+        sys.exit(0 if benchmark_layouts() else 1)
+    elif command == 'suite':
+        sys.exit(bench_suite_command(sys.argv[2:]))
+    elif command == 'metrics':
+        benchmark_metrics()
+    elif command == 'words':
+        benchmark_amount_words()
+    elif command == 'records':
+        benchmark_record_log(rows=int(os.environ.get('ERP_BENCH_ROWS', 1_000_000)))
+    elif command == 'serve':
+        benchmark_serve(worker_counts=tuple(int(n) for n in os.environ.get('ERP_BENCH_WORKERS', '1,2,4').split(',')),
+                        connections=int(os.environ.get('ERP_BENCH_THREADS', 16)),
+                        duration=float(os.environ.get('ERP_BENCH_SECONDS', 5)))
+    elif command == 'routes':
+        benchmark_routes(concurrency=int(os.environ.get('ERP_BENCH_THREADS', 8)),
+                         duration=float(os.environ.get('ERP_BENCH_SECONDS', 5)))
+    else:
+        sys.exit(f"unknown benchmark {command!r}")
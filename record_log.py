@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Append-only CSV record log with a sidecar index for the CLI's records directory
+Rows are only ever appended to the CSV; lookups binary-search sorted key files and seek to the rows
+"""
+
+import csv
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import os
+import re
+import struct
+import sys
+from array import array
+from datetime import date, datetime
+from functools import lru_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single writer is assumed
+    fcntl = None
+
+_ENTRY = struct.Struct('<QQ')  # (key, byte offset of the row in the log)
+_BLOCK = 4096  # entries read per chunk when streaming a key file
+_NOT_ALNUM = re.compile(r'[\W_]+')
+
+@lru_cache(maxsize=65536)
+def text_key(value):
+    """Case- and spacing-insensitive 64-bit key for equality lookups ('LES-123' == 'les 123')"""
+    normalized = _NOT_ALNUM.sub('', value.casefold())
+    if not normalized:
+        return 0
+    return int.from_bytes(hashlib.blake2b(normalized.encode(), digest_size=8).digest(), 'little') or 1
+
+@lru_cache(maxsize=65536)
+def date_key(value):
+    """Day ordinal of a 'DD-MMM-YYYY' or ISO date, or 0 when it does not parse"""
+    value = value.strip()
+    for parse in (lambda v: datetime.strptime(v, '%d-%b-%Y').date(), date.fromisoformat):
+        try:
+            return parse(value).toordinal()
+        except ValueError:
+            pass
+    return 0
+
+class RecordLog:
+    """Append-only CSV log indexed on selected columns.
+
+    `keys` maps an index name to (column, key function); a key function turns the cell
+    into an unsigned 64-bit key, 0 meaning "not indexed". Layout next to `path`:
+
+        <path>.idx/<name>.idx   sorted (key, offset) pairs, one fixed-width file per key
+        <path>.idx/pending.idx  offsets and keys of rows appended since the last compaction
+        <path>.idx/meta.json    how far into the log the index reaches
+
+    Appends are buffered and fsynced every `sync_every` rows (and on flush/close).
+    """
+    def __init__(self, path, header, keys, sync_every=1, compact_min=4096, compact_max=65536):
+        self.path = path
+        self.header = list(header)
+        self.keys = dict(keys)
+        self.sync_every = sync_every
+        self.compact_min = compact_min
+        self.compact_max = compact_max
+        self.index_dir = path + '.idx'
+        self._pending_entry = struct.Struct('<' + 'Q' * (1 + len(self.keys)))
+        self._log = None
+        self._pending = None
+        self._unsynced = 0
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._lock = open(os.path.join(self.index_dir, 'lock'), 'a')
+        # Readers repair the index only when no writer holds it; a live writer keeps it current
+        if self._try_lock():
+            try:
+                self._recover()
+            finally:
+                self._unlock()
+
+    # Files
+    def _key_path(self, name):
+        return os.path.join(self.index_dir, f'{name}.idx')
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.index_dir, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('keys') != sorted(self.keys):
+            return None
+        return meta
+
+    def _write_meta(self, indexed):
+        tmp = os.path.join(self.index_dir, 'meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'version': 1, 'keys': sorted(self.keys), 'indexed': indexed}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.index_dir, 'meta.json'))
+
+    def _try_lock(self, blocking=False):
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._lock.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+        return True
+
+    def _unlock(self):
+        if fcntl is not None:
+            fcntl.flock(self._lock.fileno(), fcntl.LOCK_UN)
+
+    def _open(self):
+        if self._log is None:
+            # One writer at a time; the lock is held until close()
+            self._try_lock(blocking=True)
+            indexed = self._recover()
+            self._log = open(self.path, 'ab')
+            if self._log.tell() > indexed:
+                # A torn final line from a crashed writer; later rows must not be glued onto it
+                self._log.truncate(indexed)
+                self._log.seek(indexed)
+            self._pending = open(os.path.join(self.index_dir, 'pending.idx'), 'ab')
+            if self._log.tell() == 0:
+                self._write_rows([self.header], index=False)
+
+    def _recover(self):
+        """Bring the index level with the log after a crash, a legacy CSV or a lost index.
+
+        Returns the log offset the index reaches, the end of the last complete line.
+        """
+        meta = self._read_meta()
+        log_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if meta is None or meta['indexed'] > log_size:
+            return self.reindex()
+
+        # Keep whole pending entries for rows the meta file vouches for; anything later is re-read from the log
+        pending_path = os.path.join(self.index_dir, 'pending.idx')
+        size = self._pending_entry.size
+        keep = 0
+        if os.path.exists(pending_path):
+            with open(pending_path, 'rb') as f:
+                data = f.read()
+            for keep in range(len(data) // size, 0, -1):
+                if self._pending_entry.unpack_from(data, (keep - 1) * size)[0] < meta['indexed']:
+                    break
+            else:
+                keep = 0
+        with open(pending_path, 'ab') as f:
+            f.truncate(keep * size)
+        if log_size > meta['indexed']:
+            return self._index_tail(meta['indexed'])
+        return meta['indexed']
+
+    def _index_tail(self, start):
+        """Add pending entries for rows from byte `start` to the end of the log"""
+        entries = []
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if start == 0 and offset == 0:
+                    offset += len(line)  # header
+                    continue
+                if not line.endswith(b'\n'):
+                    break
+                entries.append(self._entry(offset, next(csv.reader([line.decode('utf-8')]), [])))
+                offset += len(line)
+        with open(os.path.join(self.index_dir, 'pending.idx'), 'ab') as f:
+            f.write(b''.join(self._pending_entry.pack(*entry) for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        self._write_meta(offset)
+        return offset
+
+    def reindex(self):
+        """Rebuild every index file from the log"""
+        for name in self.keys:
+            with open(self._key_path(name), 'wb'):
+                pass
+        with open(os.path.join(self.index_dir, 'pending.idx'), 'wb'):
+            pass
+        self._write_meta(0)
+        if not os.path.exists(self.path):
+            return 0
+        indexed = self._index_tail(0)
+        self.compact()
+        return indexed
+
+    # Writing
+    def _entry(self, offset, row):
+        entry = [offset]
+        for column, key in self.keys.values():
+            entry.append(key(row[column]) if column < len(row) else 0)
+        return entry
+
+    def _write_rows(self, rows, index=True):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        offset = self._log.tell()
+        lines, entries = [], []
+        for row in rows:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(row)
+            line = buffer.getvalue().encode('utf-8')
+            if index:
+                entries.append(self._entry(offset, row))
+            lines.append(line)
+            offset += len(line)
+        self._log.write(b''.join(lines))
+        if entries:
+            self._pending.write(b''.join(self._pending_entry.pack(*entry) for entry in entries))
+        return len(entries)
+
+    def append(self, row):
+        self.extend([row])
+
+    def extend(self, rows):
+        """Append rows; they are durable after the next fsync (every `sync_every` rows)"""
+        self._open()
+        rows = [[str(cell) for cell in row] for row in rows]
+        for row in rows:
+            if any('\n' in cell or '\r' in cell for cell in row):
+                raise ValueError(f'line breaks are not allowed in record fields: {row!r}')
+        self._unsynced += self._write_rows(rows)
+        if self._unsynced >= self.sync_every:
+            self.flush()
+
+    def flush(self):
+        """fsync the log, then the pending index, then record how far the index reaches"""
+        if self._log is None or not self._unsynced:
+            return
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._pending.flush()
+        os.fsync(self._pending.fileno())
+        self._write_meta(self._log.tell())
+        self._unsynced = 0
+
+        pending = self._pending.tell() // self._pending_entry.size
+        indexed = os.path.getsize(self._key_path(next(iter(self.keys)))) // _ENTRY.size
+        if pending >= min(max(self.compact_min, indexed // 16), self.compact_max):
+            self.compact()
+
+    def close(self):
+        if self._log is not None:
+            self.flush()
+            self._log.close()
+            self._pending.close()
+            self._log = self._pending = None
+            self._unlock()
+        self._lock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def compact(self):
+        """Merge the pending entries into the sorted key files"""
+        pending = self._read_pending()
+        if not pending:
+            return
+        for i, name in enumerate(self.keys, start=1):
+            new = sorted((entry[i], entry[0]) for entry in pending if entry[i])
+            tmp = self._key_path(name) + '.tmp'
+            with open(tmp, 'wb') as out:
+                merged = heapq.merge(self._iter_key_file(name), new)
+                while True:
+                    block = array('Q', itertools.chain.from_iterable(itertools.islice(merged, _BLOCK)))
+                    if not block:
+                        break
+                    if sys.byteorder != 'little':
+                        block.byteswap()
+                    out.write(block.tobytes())
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, self._key_path(name))
+        # A crash before this truncate only leaves duplicates, which lookups drop by offset
+        with open(os.path.join(self.index_dir, 'pending.idx'), 'ab') as f:
+            f.truncate(0)
+        if self._pending is not None:
+            self._pending.seek(0, io.SEEK_END)
+
+    # Reading
+    def _read_pending(self):
+        if self._pending is not None:
+            self._pending.flush()
+        with open(os.path.join(self.index_dir, 'pending.idx'), 'rb') as f:
+            data = f.read()
+        size = self._pending_entry.size
+        return list(self._pending_entry.iter_unpack(data[:len(data) - len(data) % size]))
+
+    def _iter_key_file(self, name, start=0):
+        with open(self._key_path(name), 'rb') as f:
+            f.seek(start * _ENTRY.size)
+            while True:
+                data = f.read(_BLOCK * _ENTRY.size)
+                if not data:
+                    return
+                yield from _ENTRY.iter_unpack(data)
+
+    def _first_at_least(self, f, count, key):
+        """Binary search the sorted key file for the first entry with key >= `key`"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            f.seek(mid * _ENTRY.size)
+            if _ENTRY.unpack(f.read(_ENTRY.size))[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _matches(self, name, lo, hi):
+        """(key, offset) pairs with lo <= key <= hi, from the pending tail and the sorted file"""
+        # Pending first: a compaction in between then yields duplicates (dropped by the set), never gaps
+        i = list(self.keys).index(name) + 1
+        found = {(entry[i], entry[0]) for entry in self._read_pending() if lo <= entry[i] <= hi}
+        with open(self._key_path(name), 'rb') as f:
+            count = os.fstat(f.fileno()).st_size // _ENTRY.size
+            f.seek(self._first_at_least(f, count, lo) * _ENTRY.size)
+            while True:
+                data = f.read(_BLOCK * _ENTRY.size)
+                entries = list(_ENTRY.iter_unpack(data))
+                found.update(entry for entry in entries if entry[0] <= hi)
+                if not entries or entries[-1][0] > hi:
+                    break
+        return sorted(found)
+
+    def _rows_at(self, matches):
+        if not matches:
+            return  # also covers a log that has not been written yet
+        if self._log is not None:
+            self._log.flush()
+        with open(self.path, 'rb') as f:
+            for _, offset in matches:
+                f.seek(offset)
+                yield next(csv.reader([f.readline().decode('utf-8')]))
+
+    def find(self, name, value):
+        """Rows whose `name` column equals `value` under the key's normalization, in log order"""
+        column, key = self.keys[name]
+        wanted = key(value)
+        if not wanted:
+            return
+        for row in self._rows_at(self._matches(name, wanted, wanted)):
+            # Text keys are hashes; re-check the row to rule out a collision
+            if key(row[column]) == wanted:
+                yield row
+
+    def between(self, name, low, high):
+        """Rows whose ordered key (e.g. date_key) lies in [low, high], in key order"""
+        _, key = self.keys[name]
+        if not key(low) or not key(high):
+            raise ValueError(f'unrecognised {name} range {low!r}..{high!r}')
+        yield from self._rows_at(self._matches(name, key(low), key(high)))
+
+    def scan(self):
+        """Every row in log order, for comparison with the indexed paths"""
+        if self._log is not None:
+            self._log.flush()
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            yield from reader
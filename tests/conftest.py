@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bench  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def erp():
+    """ERP-Bolt.py as a module"""
+    return bench.load_erp()
+
+
+@pytest.fixture
+def app(erp, tmp_path):
+    """A web app on a scratch database, with its PDF jobs and cache under tmp_path"""
+    app = erp.create_app({'db_path': str(tmp_path / 'erp.db'), 'db_pool_size': 4,
+                          'pdf_job_dir': str(tmp_path / 'jobs'), 'pdf_cache_dir': str(tmp_path / 'cache'),
+                          'pdf_workers': 1})
+    yield app
+    app.extensions['erp']['pdf_jobs'].shutdown()
+    app.extensions['erp']['db'].close()
+
+
+@pytest.fixture
+def add_invoices(app):
+    """Insert `count` one-line invoices dated 2025-01-15, numbered BATCH-0 upwards"""
+    def add(count):
+        with app.app_context():
+            with app.extensions['erp']['db'].connection() as conn:
+                for i in range(count):
+                    invoice_id = conn.execute('''
+                        INSERT INTO invoices (invoice_number, client_id, client_name, date, subtotal, tax, discount, total,
+                                              status)
+                        VALUES (?, 1, 'Niazi Bricks', '2025-01-15', 100, 0, 0, 100, 'draft')
+                    ''', (f'BATCH-{i}',)).lastrowid
+                    conn.execute('''
+                        INSERT INTO invoice_items (invoice_id, line_no, description, quantity, unit_price, total)
+                        VALUES (?, 1, 'Coal', 1, 100, 100)
+                    ''', (invoice_id,))
+    return add
@@ -0,0 +1,61 @@
+import random
+from decimal import Decimal
+
+from amount_words import _MAGNITUDES, _ONES, _TENS, amount_in_words
+
+EDGE_CASES = [0, 1, 10, 19, 20, 99, 100, 101, 999, 1000, 99999, 100000, 10 ** 7, 10 ** 9, 10 ** 11, 10 ** 13 + 7]
+
+
+def words_to_paise(words):
+    """Inverse of amount_in_words"""
+    values = {word: n for n, word in enumerate(_ONES) if word}
+    values.update({word: n * 10 for n, word in enumerate(_TENS) if word})
+    scales = dict((name, value) for value, name in _MAGNITUDES)
+
+    def parse(text):
+        total = current = 0
+        for word in text.replace(',', ' ').split():
+            if word in values:
+                current += values[word]
+            elif word == 'Hundred':
+                current *= 100
+            elif word in scales:
+                # A scale closes everything accumulated since the previous larger scale
+                total = (total + current) * scales[word] if total and total < scales[word] else total + current * scales[word]
+                current = 0
+            elif word != 'Zero':
+                raise ValueError(word)
+        return total + current
+
+    sign = -1 if words.startswith('Minus ') else 1
+    words = words.removeprefix('Minus ').removesuffix(' Only')
+    rupees, _, paise = words.partition(' Rupees')
+    if rupees.endswith(' Paise'):
+        return sign * parse(rupees[:-len(' Paise')])
+    return sign * (parse(rupees) * 100 + parse(paise.removeprefix(' and ').removesuffix(' Paise')))
+
+
+def test_known_amounts():
+    assert amount_in_words(0) == 'Zero Rupees Only'
+    assert amount_in_words(500.5) == 'Five Hundred Rupees and Fifty Paise Only'
+    assert amount_in_words(0.75) == 'Seventy Five Paise Only'
+    assert amount_in_words(1234567) == 'Twelve Lakh, Thirty Four Thousand, Five Hundred Sixty Seven Rupees Only'
+    assert amount_in_words(-2) == 'Minus Two Rupees Only'
+
+
+def test_paise_round_half_up():
+    assert amount_in_words(Decimal('1.005')) == 'One Rupees and One Paise Only'
+    assert amount_in_words(Decimal('1.004')) == 'One Rupees Only'
+
+
+def test_words_round_trip(samples=20000, seed=7):
+    """Words parse back to the same paise, with sign symmetry and clean spacing"""
+    rng = random.Random(seed)
+    cases = [Decimal(n) for n in EDGE_CASES]
+    cases += [Decimal(rng.randrange(10 ** rng.randint(1, 15))) / 100 for _ in range(samples)]
+    for amount in cases:
+        words = amount_in_words(amount)
+        assert words_to_paise(words) == int(amount * 100), (amount, words)
+        assert '  ' not in words and words.endswith(' Only'), words
+        if amount:
+            assert amount_in_words(-amount) == 'Minus ' + words, amount
@@ -0,0 +1,47 @@
+from datetime import date, timedelta
+
+
+def add_employees(app, count):
+    with app.app_context():
+        with app.extensions['erp']['db'].connection() as conn:
+            conn.executemany('INSERT INTO employees (name, department, email) VALUES (?, ?, ?)',
+                             [(f'Crew {i}', 'Warehouse', f'crew{i}@atcommodities.com') for i in range(count)])
+            return [row[0] for row in conn.execute("SELECT id FROM employees WHERE name LIKE 'Crew %' ORDER BY id")]
+
+
+def statuses(response):
+    assert response.status_code == 200, response.data
+    return [result['status'] for result in response.get_json()['results']]
+
+
+def test_bad_work_location_is_rejected_per_entry(app):
+    ids = add_employees(app, 4)
+    response = app.test_client().post('/attendance/batch', json={'action': 'checkin', 'entries': [
+        {'employee_id': ids[0], 'work_location': None},
+        {'employee_id': ids[1], 'work_location': 'home'},
+        {'employee_id': ids[2], 'work_location': 'field'},
+        {'employee_id': ids[3]},
+    ]})
+    assert statuses(response) == ['invalid_work_location', 'invalid_work_location', 'checked_in', 'checked_in']
+    with app.app_context():
+        stored = app.extensions['erp']['db'].execute_query(
+            'SELECT employee_id, work_location FROM attendance ORDER BY employee_id', fetch=True)
+    assert stored == [(ids[2], 'field'), (ids[3], 'office')]
+
+
+def test_batch_checkout_after_yesterdays_shift_closed(app):
+    ids = add_employees(app, 3)
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    today = date.today().isoformat()
+    with app.app_context():
+        with app.extensions['erp']['db'].connection() as conn:
+            conn.executemany('''
+                INSERT INTO attendance (employee_id, employee_name, check_in, check_out, work_location, date)
+                VALUES (?, ?, ?, ?, 'office', ?)
+            ''', [
+                (ids[0], 'Crew 0', f'{yesterday} 09:00:00', f'{yesterday} 17:00:00', yesterday),  # went home yesterday
+                (ids[1], 'Crew 1', f'{yesterday} 21:00:00', None, yesterday),  # night shift still open
+                (ids[2], 'Crew 2', f'{today} 00:00:00', f'{today} 00:00:01', today),  # already done today
+            ])
+    response = app.test_client().post('/attendance/batch', json={'action': 'checkout', 'entries': ids})
+    assert statuses(response) == ['not_checked_in', 'checked_out', 'already_checked_out']
@@ -0,0 +1,62 @@
+import os
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import bench
+
+erp = bench.load_erp()
+
+EMPLOYEES = int(os.environ.get('ERP_STRESS_EMPLOYEES', 50))
+PROCESSES = int(os.environ.get('ERP_STRESS_PROCESSES', 4))
+THREADS = int(os.environ.get('ERP_STRESS_THREADS', 8))
+
+
+def _checkin_storm(db_path, employee_ids, threads, seed):
+    """Stress worker process: `threads` threads each check in every employee, in their own order"""
+    app = erp.create_app({'db_path': db_path, 'db_pool_size': threads})
+    start = threading.Barrier(threads)
+    statuses = []
+
+    def storm(slot):
+        client = app.test_client()
+        order = list(employee_ids)
+        random.Random(seed * 1000 + slot).shuffle(order)
+        start.wait()
+        for emp_id in order:
+            statuses.append(client.post('/attendance/checkin', data={'employee_id': emp_id,
+                                                                     'work_location': 'office'}).status_code)
+
+    workers = [threading.Thread(target=storm, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    app.extensions['erp']['db'].close()
+    return statuses
+
+
+def test_concurrent_checkins_store_one_row_per_employee(tmp_path):
+    db_path = str(tmp_path / 'stress.db')
+    setup = erp.DatabaseManager(db_path, pool_size=0)
+    with setup.connection() as conn:
+        conn.executemany('INSERT INTO employees (name, department, email) VALUES (?, ?, ?)',
+                         [(f'Stress {i}', 'Warehouse', f'stress{i}@atcommodities.com') for i in range(EMPLOYEES)])
+        employee_ids = [row[0] for row in conn.execute('SELECT id FROM employees')]
+
+    with ProcessPoolExecutor(PROCESSES) as pool:
+        runs = pool.map(_checkin_storm, [db_path] * PROCESSES, [employee_ids] * PROCESSES,
+                        [THREADS] * PROCESSES, range(PROCESSES))
+        statuses = [status for run in runs for status in run]
+
+    today = date.today().isoformat()
+    with setup.connection() as conn:
+        rows = conn.execute('SELECT COUNT(*), COUNT(DISTINCT employee_id) FROM attendance WHERE date = ?',
+                            (today,)).fetchone()
+        counted = conn.execute('SELECT total FROM daily_attendance_stats WHERE date = ?', (today,)).fetchone()
+
+    assert len(statuses) == len(employee_ids) * PROCESSES * THREADS
+    assert not [status for status in statuses if status >= 500]
+    assert rows == (len(employee_ids), len(employee_ids))
+    assert counted == (len(employee_ids),)
@@ -0,0 +1,31 @@
+import sqlite3
+
+import bench
+
+SIZES = {'employees': 40, 'clients': 5, 'attendance': 400, 'invoices': 50, 'deliveries': 400}
+
+
+def test_generated_dataset_uses_the_app_vocabulary(tmp_path):
+    db_path = str(tmp_path / 'dataset.db')
+    counts = bench.generate_dataset(db_path, SIZES)
+    assert counts['attendance'] == SIZES['attendance'] and counts['deliveries'] == SIZES['deliveries']
+
+    with sqlite3.connect(db_path) as conn:
+        statuses = {row[0] for row in conn.execute('SELECT DISTINCT status FROM deliveries')}
+        locations = {row[0] for row in conn.execute('SELECT DISTINCT work_location FROM attendance')}
+        negative = conn.execute('SELECT COUNT(*) FROM attendance WHERE total_hours < 0').fetchone()[0]
+    assert statuses == {'pending', 'in-transit', 'delivered'}
+    assert locations <= {'office', 'warehouse', 'field'}
+    assert negative == 0
+
+
+def test_suite_runs_every_scenario_and_leaves_the_dataset(tmp_path):
+    db_path = str(tmp_path / 'dataset.db')
+    counts = bench.generate_dataset(db_path, SIZES)
+    results = bench.benchmark_suite(db_path, requests=3, exports=1, pdfs=2)
+    assert {name: result['errors'] for name, result in results.items() if result['errors']} == {}
+    assert 'PDF job (submit, poll, file)' in results and 'POST /invoices/delete' in results
+
+    with sqlite3.connect(db_path) as conn:
+        after = bench._table_counts(conn)
+    assert (after['invoices'], after['deliveries']) == (counts['invoices'], counts['deliveries'])
@@ -0,0 +1,66 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import bench
+
+ROWS = int(os.environ.get('ERP_EXPORT_ROWS', 1_000_000))
+RSS_BUDGET_MB = float(os.environ.get('ERP_EXPORT_RSS_MB', 32))
+
+
+def test_monthly_export_streams_in_flat_memory(app):
+    """A year of attendance streams as CSV without the process growing with the row count"""
+    days = [(date(2025, 1, 1) + timedelta(days=n)).isoformat() for n in range(365)]
+    with app.app_context():
+        with app.extensions['erp']['db'].connection() as conn:
+            conn.executemany('INSERT INTO employees (name, department, email) VALUES (?, ?, ?)',
+                             [(f'Employee {i}', 'Warehouse', f'employee{i}@atcommodities.com')
+                              for i in range(-(-ROWS // len(days)))])
+            ids = [row[0] for row in conn.execute('SELECT id FROM employees')]
+            conn.executemany('''
+                INSERT INTO attendance (employee_id, employee_name, check_in, check_out, work_location, date, total_hours)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', ((ids[i // len(days)], f'Employee {i // len(days)}', f'{day} 09:00:00', f'{day} 17:30:00',
+                   'warehouse', day, 8.5) for i, day in ((i, days[i % len(days)]) for i in range(ROWS))))
+
+    baseline = peak = bench.current_rss_kb()
+    exported = 0
+    response = app.test_client().get('/downloads/attendance?type=monthly&start=2025-01-01&end=2025-12-31',
+                                     buffered=False)
+    try:
+        for chunk in response.response:
+            exported += chunk.count(b'\n') if isinstance(chunk, bytes) else chunk.count('\n')
+            peak = max(peak, bench.current_rss_kb())
+    finally:
+        response.close()
+
+    assert response.status_code == 200
+    assert exported - 1 == ROWS
+    assert (peak - baseline) / 1024 <= RSS_BUDGET_MB
+
+
+def test_open_export_does_not_hold_a_pooled_connection(erp, tmp_path):
+    app = erp.create_app({'db_path': str(tmp_path / 'erp.db'), 'db_pool_size': 1,
+                          'pdf_job_dir': str(tmp_path / 'jobs'), 'pdf_cache_dir': str(tmp_path / 'cache')})
+    database = app.extensions['erp']['db']
+    try:
+        with app.app_context():
+            with database.connection() as conn:
+                conn.executemany('''
+                    INSERT INTO attendance (employee_id, employee_name, check_in, check_out, work_location, date, total_hours)
+                    VALUES (1, 'Employee', ?, ?, 'office', ?, 8.5)
+                ''', [(f'{day} 09:00:00', f'{day} 17:30:00', day)
+                      for day in ((date(2020, 1, 1) + timedelta(days=n)).isoformat() for n in range(5000))])
+
+        client = app.test_client()
+        export = client.get('/downloads/attendance?type=monthly&start=2020-01-01&end=2034-12-31', buffered=False)
+        chunks = iter(export.response)
+        try:
+            next(chunks)  # the export is now paused mid-query, as behind a slow client
+            with ThreadPoolExecutor(1) as other_request:
+                assert other_request.submit(lambda: client.get('/attendance').status_code).result(timeout=30) == 200
+        finally:
+            export.close()
+    finally:
+        app.extensions['erp']['pdf_jobs'].shutdown()
+        database.close()
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+HEADER = 'Date,Client,Vehicle No,Quantity\n'
+
+
+def vehicles(app):
+    return [row[0] for row in app.extensions['erp']['db'].execute_query(
+        'SELECT vehicle_number FROM deliveries ORDER BY id', fetch=True)]
+
+
+def test_appended_file_resumes_after_blank_lines(app, erp, tmp_path):
+    path = tmp_path / 'deliveries.csv'
+    path.write_text(HEADER + '01-Jan-2025,Niazi Bricks,LES-1,20\n\n\n02-Jan-2025,Niazi Bricks,LES-2,20\n\n')
+    with app.app_context():
+        assert erp.import_csv(str(path), chunk_size=1)['inserted'] == 2
+        with open(path, 'a') as f:
+            f.write('03-Jan-2025,Niazi Bricks,LES-3,20\n')
+        os.utime(path, (1, 1))
+        result = erp.import_csv(str(path), chunk_size=1)
+        assert (result['read'], result['inserted']) == (1, 1)
+        assert vehicles(app) == ['LES-1', 'LES-2', 'LES-3']
+
+
+def test_interrupted_import_resumes_without_repeats(app, erp, tmp_path, monkeypatch):
+    path = tmp_path / 'deliveries.csv'
+    path.write_text(HEADER + ''.join(f'{day:02d}-Jan-2025,Niazi Bricks,LES-{day},20\n\n' for day in range(1, 11)))
+    write = erp.IMPORT_WRITERS['deliveries']
+    calls = []
+
+    def crash_on_third_chunk(conn, records):
+        calls.append(records)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return write(conn, records)
+
+    with app.app_context():
+        monkeypatch.setitem(erp.IMPORT_WRITERS, 'deliveries', crash_on_third_chunk)
+        with pytest.raises(KeyboardInterrupt):
+            erp.import_csv(str(path), chunk_size=3)
+        monkeypatch.setitem(erp.IMPORT_WRITERS, 'deliveries', write)
+        erp.import_csv(str(path), chunk_size=3)
+        assert vehicles(app) == [f'LES-{day}' for day in range(1, 11)]
+
+
+def test_cli_delivery_dates_in_either_format(app, erp, tmp_path):
+    path = tmp_path / 'deliveries.csv'
+    path.write_text(HEADER + '05-Jan-2025,Niazi Bricks,LES-1,20\n2025-01-06,Niazi Bricks,LES-2,20\n06/01/2025,X,LES-3,1\n')
+    with app.app_context():
+        result = erp.import_csv(str(path))
+        assert (result['inserted'], result['rejected']) == (2, 1)
+        assert result['errors'] == ["line 4: unrecognised delivery date '06/01/2025'"]
+        assert app.extensions['erp']['db'].execute_query('SELECT delivery_date FROM deliveries ORDER BY id',
+                                                         fetch=True) == [('2025-01-05',), ('2025-01-06',)]
+
+
+def test_rewritten_attendance_day_closes_open_shifts(app, erp, tmp_path):
+    path = tmp_path / 'attendance_2025-01-06.csv'
+    header = 'Employee,Location,Entry Time,Exit Time\n'
+    path.write_text(header + 'Asad,Office,09:00,17:00\nBilal,Warehouse,22:00,\n')
+    with app.app_context():
+        assert erp.import_csv(str(path))['inserted'] == 2
+        # The CLI rewrites the day file in place when Bilal leaves, and adds Kamran
+        path.write_text(header + 'Asad,Office,09:00,18:30\nBilal,Warehouse,22:00,06:00\nKamran,Field,10:00,\n')
+        os.utime(path, (1, 1))
+        result = erp.import_csv(str(path))
+        assert (result['read'], result['skipped'], result['inserted']) == (3, 0, 2)
+        rows = app.extensions['erp']['db'].execute_query(
+            'SELECT employee_name, check_out, total_hours FROM attendance ORDER BY id', fetch=True)
+        assert rows[-3:] == [('Asad', '2025-01-06 17:00:00', 8.0), ('Bilal', '2025-01-07 06:00:00', 8.0),
+                             ('Kamran', None, None)]
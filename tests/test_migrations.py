@@ -0,0 +1,72 @@
+import json
+import sqlite3
+
+
+def legacy_database(path):
+    """A database from before migration 3, with line items as JSON in invoices.items"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_number TEXT NOT NULL UNIQUE,
+            client_id INTEGER,
+            client_name TEXT NOT NULL,
+            date TEXT NOT NULL,
+            items TEXT NOT NULL,
+            subtotal REAL NOT NULL,
+            tax REAL NOT NULL,
+            discount REAL NOT NULL,
+            total REAL NOT NULL,
+            status TEXT DEFAULT 'draft',
+            FOREIGN KEY (client_id) REFERENCES clients (id)
+        )
+    ''')
+    items = [{'description': 'Coal', 'quantity': 2, 'unit_price': 50, 'total': 100},
+             {'description': 'Bricks', 'quantity': 1, 'unit_price': 25, 'total': 25}]
+    conn.executemany('''
+        INSERT INTO invoices (invoice_number, client_id, client_name, date, items, subtotal, tax, discount, total, status)
+        VALUES (?, 1, 'Niazi Bricks', '2025-01-15', ?, 125, 0, 0, 125, 'sent')
+    ''', [(f'OLD-{i}', json.dumps(items)) for i in range(3)])
+    conn.execute("DELETE FROM invoices WHERE invoice_number = 'OLD-2'")
+    conn.commit()
+    conn.close()
+
+
+def test_items_migration_keeps_invoices_and_their_lines(erp, tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    legacy_database(path)
+    db = erp.DatabaseManager(path, pool_size=1)
+    try:
+        with db.connection() as conn:
+            assert 'items' not in [row[1] for row in conn.execute('PRAGMA table_info(invoices)')]
+            assert conn.execute('SELECT id, invoice_number, total, status FROM invoices ORDER BY id').fetchall() == [
+                (1, 'OLD-0', 125, 'sent'), (2, 'OLD-1', 125, 'sent')]
+            assert conn.execute('SELECT invoice_id, line_no, description, total FROM invoice_items ORDER BY id').fetchall() == [
+                (1, 1, 'Coal', 100), (1, 2, 'Bricks', 25), (2, 1, 'Coal', 100), (2, 2, 'Bricks', 25)]
+            indexes = {row[1] for row in conn.execute('PRAGMA index_list(invoices)')}
+            assert {'idx_invoices_date', 'idx_invoices_client_date'} <= indexes
+
+            # Triggers survive the rebuild and ids are not reused
+            invoice_id = conn.execute('''
+                INSERT INTO invoices (invoice_number, client_id, client_name, date, subtotal, tax, discount, total)
+                VALUES ('NEW-0', 1, 'Niazi Bricks', '2025-02-01', 10, 0, 0, 10)
+            ''').lastrowid
+            assert invoice_id == 4
+            stats = dict(conn.execute('SELECT key, value FROM stats'))
+            assert stats['invoices'] == 3
+            assert stats['invoice_value'] == 260
+        assert db.schema_version() == erp.MIGRATIONS[-1][0]
+    finally:
+        db.close()
+
+
+def test_deleting_an_invoice_removes_its_items(app, add_invoices):
+    add_invoices(2)
+    db = app.extensions['erp']['db']
+    with app.app_context():
+        invoice_id = db.execute_query("SELECT id FROM invoices WHERE invoice_number = 'BATCH-0'", fetch=True)[0][0]
+
+    response = app.test_client().post(f'/invoices/delete/{invoice_id}')
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.execute_query('SELECT invoice_id FROM invoice_items', fetch=True) == [(invoice_id + 1,)]
@@ -0,0 +1,67 @@
+import csv
+import io
+from datetime import date, timedelta
+
+
+def add_shifts(app, rows):
+    """Insert (employee_id, employee_name, check_in, check_out, date) attendance rows; returns their ids"""
+    with app.app_context():
+        with app.extensions['erp']['db'].connection() as conn:
+            return [conn.execute('''
+                INSERT INTO attendance (employee_id, employee_name, check_in, check_out, work_location, date)
+                VALUES (?, ?, ?, ?, 'warehouse', ?)
+            ''', row).lastrowid for row in rows]
+
+
+def test_attendance_page_lists_yesterdays_open_shift(app):
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    open_id, _ = add_shifts(app, [
+        (1, 'Night Guard', f'{yesterday} 22:00:00', None, yesterday),
+        (2, 'Day Clerk', f'{yesterday} 09:00:00', f'{yesterday} 17:00:00', yesterday),
+    ])
+    page = app.test_client().get('/attendance').get_data(as_text=True)
+    assert 'Night Guard' in page and '(yesterday)' in page
+    assert f'name="record_id" value="{open_id}"' in page
+    assert 'Day Clerk' not in page
+
+
+def test_timestamp_migration_moves_overnight_check_outs(app, erp):
+    with app.app_context():
+        with app.extensions['erp']['db'].connection() as conn:
+            conn.executemany('''
+                INSERT INTO attendance (employee_id, employee_name, check_in, check_out, work_location, date)
+                VALUES (?, ?, ?, ?, 'office', '2025-01-06')
+            ''', [(1, 'Night', '22:00:00', '06:00:00'), (2, 'Day', '09:00:00', '17:30:00'), (3, 'Open', '08:00:00', None)])
+            erp._timestamp_attendance(conn.cursor())
+            rows = conn.execute("SELECT employee_name, check_in, check_out, total_hours FROM attendance "
+                                "WHERE date = '2025-01-06' ORDER BY employee_id").fetchall()
+    assert rows == [('Night', '2025-01-06 22:00:00', '2025-01-07 06:00:00', 8.0),
+                    ('Day', '2025-01-06 09:00:00', '2025-01-06 17:30:00', 8.5),
+                    ('Open', '2025-01-06 08:00:00', None, None)]
+
+
+def test_check_out_after_midnight(app, erp):
+    (shift_id,) = add_shifts(app, [(1, 'Night', '2025-01-06 22:15:00', None, '2025-01-06')])
+    with app.app_context():
+        with app.extensions['erp']['db'].connection() as conn:
+            conn.execute(erp.CHECK_OUT_SQL, {'now': '2025-01-07 06:45:00', 'id': shift_id})
+            row = conn.execute('SELECT check_out, total_hours FROM attendance WHERE id = ?', (shift_id,)).fetchone()
+    assert row == ('2025-01-07 06:45:00', 8.5)
+
+
+def test_payroll_sums_hours_per_employee_and_week(app):
+    add_shifts(app, [
+        (1, 'Asad', '2025-01-06 22:00:00', '2025-01-07 06:00:00', '2025-01-06'),
+        (1, 'Asad', '2025-01-07 09:00:00', '2025-01-07 13:30:00', '2025-01-07'),
+        (1, 'Asad', '2025-01-08 09:00:00', None, '2025-01-08'),
+        (2, 'Bilal', '2025-01-14 09:00:00', '2025-01-14 17:00:00', '2025-01-14'),
+        (2, 'Bilal', '2025-02-03 09:00:00', '2025-02-03 17:00:00', '2025-02-03'),
+    ])
+    response = app.test_client().get('/downloads/payroll?period=week&start=2025-01-01&end=2025-01-31')
+    assert response.status_code == 200
+    assert 'payroll_week_2025-01-01_to_2025-01-31.csv' in response.headers['Content-Disposition']
+    assert list(csv.reader(io.StringIO(response.get_data(as_text=True)))) == [
+        ['Employee ID', 'Employee Name', 'Period', 'Shifts', 'Total Hours'],
+        ['1', 'Asad', '2025-W01', '2', '12.5'],
+        ['2', 'Bilal', '2025-W02', '1', '8.0'],
+    ]
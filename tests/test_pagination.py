@@ -0,0 +1,44 @@
+import pytest
+
+
+def cursor(erp, values):
+    return erp.encode_cursor(values)
+
+
+@pytest.mark.parametrize('values', [
+    [[1], 2],
+    [{'date': '2025-01-01'}, 2],
+    ['2025-01-01'],
+    ['2025-01-01', 2, 3],
+    ['2025-01-01', 10 ** 30],
+    'not a list',
+])
+@pytest.mark.parametrize('direction', ['after', 'before'])
+def test_malformed_cursor_shows_first_page(app, erp, values, direction):
+    client = app.test_client()
+    first = client.get('/invoices')
+    response = client.get(f'/invoices?{direction}={cursor(erp, values)}')
+    assert response.status_code == 200
+    assert response.data == first.data
+
+
+def test_nested_list_cursor_falls_back_to_first_page(app):
+    assert app.test_client().get('/invoices?after=W1sxXSwgMl0').status_code == 200
+    assert app.test_client().get('/deliveries?before=W1sxXSwgMl0').status_code == 200
+
+
+def test_cursor_pages_through_invoices(app, erp):
+    with app.app_context():
+        with app.extensions['erp']['db'].connection() as conn:
+            conn.executemany('INSERT INTO invoices (invoice_number, client_id, client_name, date, subtotal, tax, discount, '
+                             'total, status) VALUES (?, 1, ?, ?, 100, 0, 0, 100, ?)',
+                             [(f'PAGE-{i}', 'Client', f'2025-01-{i % 28 + 1:02d}', 'draft') for i in range(60)])
+        seen = []
+        after = None
+        while True:
+            page = app.extensions['erp']['db'].fetch_page('invoices', ('date', 'id'), after=after, page_size=25)
+            seen += [row[0] for row in page['rows']]
+            if not page['next']:
+                break
+            after = page['next']
+    assert len(seen) == len(set(seen)) == 60
@@ -0,0 +1,44 @@
+import os
+
+
+def invoice_id(app):
+    with app.app_context():
+        return app.extensions['erp']['db'].execute_query('SELECT MIN(id) FROM invoices', fetch=True)[0][0]
+
+
+def test_cached_download_leaves_no_job_file(app, add_invoices):
+    add_invoices(1)
+    response = app.test_client().get(f'/invoices/download/{invoice_id(app)}')
+    assert response.status_code == 200 and response.data.startswith(b'%PDF-')
+    assert response.headers['Content-Disposition'] == 'attachment; filename=Invoice_BATCH-0.pdf'
+
+    jobs = app.extensions['erp']['pdf_jobs']
+    assert not jobs._jobs and not os.listdir(jobs.output_dir)
+    # The cache holds the only link, so evicting the entry frees its space
+    cache = app.extensions['erp']['pdf_cache']
+    (name,) = os.listdir(cache.directory)
+    assert os.stat(os.path.join(cache.directory, name)).st_nlink == 1
+
+
+def test_download_survives_eviction(app, add_invoices):
+    add_invoices(1)
+    cache = app.extensions['erp']['pdf_cache']
+    cache.max_bytes = 0  # every put evicts straight away
+    client = app.test_client()
+    for _ in range(2):
+        response = client.get(f'/invoices/download/{invoice_id(app)}')
+        assert response.status_code == 200 and response.data.startswith(b'%PDF-')
+        assert response.content_length == len(response.data)
+    assert not [name for name in os.listdir(cache.directory) if name.endswith('.pdf')]
+
+
+def test_open_entry_is_readable_after_eviction(app, add_invoices):
+    add_invoices(1)
+    app.test_client().get(f'/invoices/download/{invoice_id(app)}')
+    cache = app.extensions['erp']['pdf_cache']
+    (name,) = os.listdir(cache.directory)
+    entry_id, key = name[:-len('.pdf')].split('-', 1)
+    with cache.open(entry_id, key) as f:
+        cache.invalidate(entry_id)
+        assert f.read(5) == b'%PDF-'
+    assert cache.open(entry_id, key) is None
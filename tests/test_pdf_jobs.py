@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+INVOICE = {'invoice_number': 'JOB-1', 'client_name': 'Niazi Bricks', 'date': '2025-01-01', 'subtotal': 100.0,
+           'tax': 0.0, 'discount': 0.0, 'total': 100.0, 'status': 'draft',
+           'items': [{'description': 'Coal', 'quantity': 1, 'unit_price': 100.0, 'total': 100.0}]}
+
+
+class ClosedPool:
+    def submit(self, *args):
+        raise RuntimeError('cannot schedule new futures after shutdown')
+
+
+@pytest.fixture
+def jobs(erp, tmp_path):
+    queue = erp.PdfJobQueue(str(tmp_path / 'jobs'), workers=1, max_pending=2)
+    yield queue
+    queue.shutdown()
+
+
+def test_render_job(jobs):
+    job = jobs.wait(jobs.submit(INVOICE), timeout=60)
+    assert job['status'] == 'done', job
+    with open(jobs.result_path(job['id']), 'rb') as f:
+        assert f.read(5) == b'%PDF-'
+
+
+def test_submit_failure_fails_the_job_and_frees_its_slot(jobs, monkeypatch):
+    monkeypatch.setattr(jobs, '_executor', ClosedPool)
+    for _ in range(jobs.max_pending + 1):
+        job = jobs.wait(jobs.submit(INVOICE), timeout=0)
+        assert job['status'] == 'failed'
+        assert job['attempts'] == 1
+        assert 'shutdown' in job['error']
+    assert jobs._pending == 0
+
+
+def test_batch_leaves_slots_for_single_downloads(erp, tmp_path):
+    jobs = erp.PdfJobQueue(str(tmp_path / 'jobs'), workers=2, max_pending=2)
+    try:
+        results = jobs.render_batch([dict(INVOICE, invoice_number=f'B-{i}') for i in range(6)])
+        assert next(results)[0] == 'B-0'
+        assert jobs._pending <= jobs.max_batch_pending == 1
+        job_id = jobs.submit(INVOICE)  # PdfQueueFull if the batch had taken every slot
+        assert [number for number, _, _ in results] == [f'B-{i}' for i in range(1, 6)]
+        assert jobs.wait(job_id, timeout=60)['status'] == 'done'
+        assert jobs._pending == 0
+    finally:
+        jobs.shutdown()
+
+
+def test_merged_batch_pdf_renders_as_a_job(app, add_invoices):
+    add_invoices(3)
+    response = app.test_client().get('/invoices/batch?start=2025-01-01&end=2025-01-31&format=pdf')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf' and response.data.startswith(b'%PDF-')
+    assert 'invoices_2025-01-01_to_2025-01-31.pdf' in response.headers['Content-Disposition']
+    assert app.extensions['erp']['pdf_jobs']._pending == 0
+
+
+def test_batch_zip(app, add_invoices):
+    add_invoices(3)
+    response = app.test_client().get('/invoices/batch?start=2025-01-01&end=2025-01-31&format=zip')
+    assert response.status_code == 200 and response.data.startswith(b'PK')
+
+
+def test_job_file_is_served_once(app, add_invoices):
+    add_invoices(1)
+    with app.app_context():
+        (invoice_id,), = app.extensions['erp']['db'].execute_query('SELECT MIN(id) FROM invoices', fetch=True)
+    client = app.test_client()
+    job_id = client.post(f'/invoices/{invoice_id}/pdf').get_json()['id']
+    jobs = app.extensions['erp']['pdf_jobs']
+    assert jobs.wait(job_id, timeout=60)['status'] == 'done'
+    response = client.get(f'/pdf-jobs/{job_id}/file')
+    assert response.status_code == 200 and response.data.startswith(b'%PDF-')
+    assert not os.listdir(jobs.output_dir)
+    assert client.get(f'/pdf-jobs/{job_id}/file').status_code == 404
+
+
+def test_shutdown_deletes_job_files(erp, tmp_path):
+    jobs = erp.PdfJobQueue(str(tmp_path / 'jobs'), workers=1)
+    assert jobs.wait(jobs.submit(INVOICE), timeout=60)['status'] == 'done'
+    jobs.shutdown()
+    assert not os.listdir(tmp_path / 'jobs')
+
+
+def test_startup_sweeps_stale_job_files(erp, tmp_path):
+    jobs_dir = tmp_path / 'jobs'
+    jobs_dir.mkdir()
+    for name in ('stale.pdf', 'fresh.pdf'):
+        (jobs_dir / name).write_bytes(b'%PDF-')
+    os.utime(jobs_dir / 'stale.pdf', (1, 1))
+    erp.PdfJobQueue(str(jobs_dir), keep_seconds=3600).shutdown()
+    assert os.listdir(jobs_dir) == ['fresh.pdf']
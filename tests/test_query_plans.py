@@ -0,0 +1,46 @@
+import pytest
+
+import bench
+
+erp = bench.load_erp()
+
+# Route queries that must be answered from an index, never a full table scan
+INDEXED_QUERIES = [
+    ('SELECT COUNT(*) FROM attendance WHERE date = ?', ('2025-01-01',)),
+    ('SELECT * FROM attendance WHERE date = ? ORDER BY check_in DESC', ('2025-01-01',)),
+    (erp.ATTENDANCE_STATS_QUERY, ('2025-01-01',)),
+    (erp.OPEN_SHIFTS_QUERY, ('2025-01-01',)),
+    ('SELECT id FROM attendance WHERE employee_id = ? AND date = ?', (1, '2025-01-01')),
+    ('SELECT * FROM attendance WHERE date BETWEEN ? AND ?', ('2025-01-01', '2025-01-31')),
+    ('SELECT * FROM invoices ORDER BY date DESC', ()),
+    ('SELECT * FROM invoices WHERE date BETWEEN ? AND ?', ('2025-01-01', '2025-01-31')),
+    ('SELECT * FROM invoices WHERE date BETWEEN ? AND ? AND client_id = ?', ('2025-01-01', '2025-01-31', 1)),
+    ('SELECT * FROM deliveries ORDER BY delivery_date DESC, delivery_time DESC', ()),
+    ('SELECT * FROM deliveries WHERE delivery_date = ?', ('2025-01-01',)),
+    ('SELECT * FROM invoice_items WHERE invoice_id = ? ORDER BY line_no', (1,)),
+    ('SELECT description, SUM(quantity), SUM(total) FROM invoice_items GROUP BY description', ()),
+    ('SELECT * FROM attendance WHERE date = ? AND (check_in, id) < (?, ?) ORDER BY check_in DESC, id DESC LIMIT ?',
+     ('2025-01-01', '2025-01-01 09:00:00', 10, 26)),
+    ('SELECT * FROM invoices WHERE (date, id) < (?, ?) ORDER BY date DESC, id DESC LIMIT ?', ('2025-01-01', 10, 26)),
+    ('SELECT * FROM invoices WHERE (date, id) > (?, ?) ORDER BY date ASC, id ASC LIMIT ?', ('2025-01-01', 10, 26)),
+    ('SELECT * FROM deliveries WHERE (delivery_date, delivery_time, id) < (?, ?, ?) '
+     'ORDER BY delivery_date DESC, delivery_time DESC, id DESC LIMIT ?', ('2025-01-01', '10:00', 10, 26)),
+    ('SELECT * FROM deliveries WHERE delivery_date BETWEEN ? AND ?', ('2025-01-01', '2025-01-31')),
+]
+
+
+@pytest.fixture(scope='module')
+def conn(tmp_path_factory):
+    """A connection to a freshly migrated database"""
+    database = erp.DatabaseManager(str(tmp_path_factory.mktemp('plans') / 'erp.db'), pool_size=1)
+    with database.connection() as conn:
+        yield conn
+    database.close()
+
+
+@pytest.mark.parametrize('query, params', INDEXED_QUERIES)
+def test_route_query_uses_an_index(conn, query, params):
+    plan = [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + query, params)]
+    scans = [detail for detail in plan
+             if (detail.startswith('SCAN') and 'INDEX' not in detail) or 'TEMP B-TREE' in detail]
+    assert not scans, f"{scans} in plan for {query}"
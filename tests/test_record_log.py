@@ -0,0 +1,75 @@
+import csv
+import os
+import random
+import subprocess
+import sys
+from datetime import date
+
+import pytest
+
+from record_log import RecordLog, date_key, text_key
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, 'ERP-Chatgpt-CLIBased.py')
+HEADER = ['Date', 'Client', 'Vehicle No', 'Quantity']
+KEYS = {'date': (0, date_key), 'client': (1, text_key), 'vehicle': (2, text_key)}
+
+
+def test_lookups_match_a_full_scan(tmp_path, rows=20000, seed=3):
+    """Index lookups agree with a full scan, across compaction, reopen and a lost index"""
+    rng = random.Random(seed)
+    path = str(tmp_path / 'deliveries.csv')
+    with RecordLog(path, HEADER, KEYS, sync_every=500, compact_min=3000) as log:
+        for i in range(rows):
+            day = date.fromordinal(738000 + rng.randrange(400)).strftime('%d-%b-%Y')
+            log.append([day, f'Client {rng.randrange(50)}', f'LES-{rng.randrange(900)}', str(i)])
+        log.append(['not a date', 'Client "Quoted", Ltd', 'les 1', 'x'])
+
+    for attempt in ('reopen', 'reindex'):
+        if attempt == 'reindex':
+            os.remove(os.path.join(path + '.idx', 'meta.json'))
+        with RecordLog(path, HEADER, KEYS) as log:
+            everything = list(log.scan())
+            assert len(everything) == rows + 1
+            for vehicle in ('LES-1', 'les 1', 'LES-899', 'LES-9999'):
+                expected = [row for row in everything if text_key(row[2]) == text_key(vehicle)]
+                assert list(log.find('vehicle', vehicle)) == expected, (attempt, vehicle)
+            low, high = '01-Feb-2022', '2022-03-15'
+            expected = sorted((row for row in everything if date_key(low) <= date_key(row[0]) <= date_key(high)),
+                              key=lambda row: date_key(row[0]))
+            assert sorted(log.between('date', low, high), key=lambda row: (date_key(row[0]), int(row[3]))) == expected
+            assert list(log.find('client', 'Client "Quoted", Ltd'))[0][3] == 'x'
+
+
+def test_search_empty_log(tmp_path):
+    with RecordLog(str(tmp_path / 'deliveries.csv'), HEADER, KEYS) as log:
+        assert list(log.find('vehicle', 'LES-1')) == []
+        assert list(log.find('client', 'Niazi Bricks')) == []
+        assert list(log.between('date', '01-Jan-2025', '31-Jan-2025')) == []
+        assert list(log.scan()) == []
+    assert not os.path.exists(tmp_path / 'deliveries.csv')
+
+
+@pytest.mark.parametrize('argv, stdin', [
+    (['search', '--vehicle', 'LES-1'], ''),
+    (['search', '--from', '01-Jan-2025', '--to', '31-Jan-2025'], ''),
+    ([], '5\n1\nLES-1\n4\n'),
+])
+def test_cli_search_before_any_delivery(argv, stdin, tmp_path):
+    proc = subprocess.run([sys.executable, CLI, *argv], input=stdin, cwd=tmp_path,
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_cli_batch_attendance_allows_open_shifts(tmp_path):
+    records = ('{"employee": "Asad Anwar", "location": "warehouse", "entry": "22:00"}\n'
+               '{"employee": "Ebad Ur Rehman", "location": "Office", "entry": "09:00", "exit": "17:00"}\n'
+               '{"employee": "Talha Sidiqqui", "location": "Home", "entry": "09:00", "exit": "17:00"}\n')
+    proc = subprocess.run([sys.executable, CLI, 'attendance', '--date', '2025-01-06'], input=records, cwd=tmp_path,
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 1
+    assert "Record 3: unknown location 'Home'" in proc.stderr
+    with open(tmp_path / 'records' / 'attendance_2025-01-06.csv', newline='') as f:
+        assert list(csv.reader(f)) == [['Employee', 'Location', 'Entry Time', 'Exit Time'],
+                                       ['Asad Anwar', 'Warehouse', '22:00', ''],
+                                       ['Ebad Ur Rehman', 'Office', '09:00', '17:00']]
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay out of a cold start; they are imported on first use
+LAZY_MODULES = ('reportlab', 'num2words')
+
+WEB_IMPORT = ('import importlib.util, sys; sys.path.insert(0, sys.argv[1]); '
+              'spec = importlib.util.spec_from_file_location("erp", sys.argv[1] + "/ERP-Bolt.py"); '
+              'spec.loader.exec_module(importlib.util.module_from_spec(spec))')
+
+# label -> (interpreter arguments, stdin, import budget in ms)
+TARGETS = {
+    'web app import': (['-c', WEB_IMPORT, ROOT], '', float(os.environ.get('ERP_STARTUP_WEB_MS', 260))),
+    'CLI menu': ([os.path.join(ROOT, 'ERP-Chatgpt-CLIBased.py')], '4\n',
+                 float(os.environ.get('ERP_STARTUP_CLI_MS', 80))),
+}
+
+
+def import_profile(argv, stdin, workdir):
+    """Run a fresh interpreter under -X importtime; returns (total ms, top-level modules imported)"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', *argv], input=stdin, cwd=workdir,
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    total_us, modules = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        modules.add(name.strip().split('.')[0])
+    return total_us / 1000, modules
+
+
+@pytest.mark.parametrize('label', TARGETS)
+def test_cold_start(label, tmp_path):
+    argv, stdin, budget_ms = TARGETS[label]
+    # Best of several runs, so a busy machine doesn't fail the check
+    runs = [import_profile(argv, stdin, tmp_path) for _ in range(3)]
+    elapsed = min(total for total, _ in runs)
+
+    assert not set(LAZY_MODULES) & runs[0][1], "PDF dependencies imported at startup"
+    # The CLI keeps its records/ directory; the web app must not touch the disk on import
+    assert [name for name in os.listdir(tmp_path) if name != 'records'] == []
+    assert elapsed <= budget_ms